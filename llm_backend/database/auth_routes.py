@@ -3,11 +3,11 @@ Authentication Routes: register, login, logout, and user info
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, EmailStr, ConfigDict
 from datetime import timedelta
 from .database import get_db, User
-from .auth import (get_password_hash, authenticate_user, create_access_token, verify_token, get_user_by_id, ACCESS_TOKEN_EXPIRE_MINUTES)
+from .auth import (get_password_hash, authenticate_user, create_access_token, verify_token, get_user_by_id, get_user_by_username, get_user_by_email, ACCESS_TOKEN_EXPIRE_MINUTES)
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
@@ -37,7 +37,7 @@ class UserResponse(BaseModel):
     email: str
 
 
-def get_current_user(request: Request, db: Session = Depends(get_db)) -> User:
+async def get_current_user(request: Request, db: AsyncSession = Depends(get_db)) -> User:
 
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -54,12 +54,13 @@ def get_current_user(request: Request, db: Session = Depends(get_db)) -> User:
     if payload is None:
         raise credentials_exception
     
-    user_id: int = payload.get("sub")
-
-    if user_id is None:
+    # "sub" is a string in the token; asyncpg will not coerce it to the integer id column.
+    try:
+        user_id = int(payload.get("sub"))
+    except (TypeError, ValueError):
         raise credentials_exception
     
-    user = get_user_by_id(db, user_id)
+    user = await get_user_by_id(db, user_id)
     
     if user is None:
         raise credentials_exception
@@ -68,14 +69,14 @@ def get_current_user(request: Request, db: Session = Depends(get_db)) -> User:
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserRegister, db: Session = Depends(get_db)):
-    if db.query(User).filter(User.username == user_data.username).first():
+async def register(user_data: UserRegister, db: AsyncSession = Depends(get_db)):
+    if await get_user_by_username(db, user_data.username):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already registered"
         )
     
-    if db.query(User).filter(User.email == user_data.email).first():
+    if await get_user_by_email(db, user_data.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
@@ -86,15 +87,14 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
     db_user = User(username=user_data.username, email=user_data.email, hashed_password=hashed_password)
 
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
     
     return db_user
 
 
 @router.post("/login", response_model=Token)
-async def login(response: Response, form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = authenticate_user(db, form_data.username, form_data.password)
+async def login(response: Response, form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
+    user = await authenticate_user(db, form_data.username, form_data.password)
 
     if not user:
         raise HTTPException(
@@ -1,89 +1,89 @@
 """
 Database functions for chat sessions and conversations
 """
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from .database import ChatSession, Conversation
 from datetime import datetime
 import uuid
 
-def get_or_create_chat_session(db: Session, user_id: int, session_id: str = None) -> ChatSession:
+async def find_chat_session(db: AsyncSession, session_id: str, user_id: int) -> ChatSession | None:
+    result = await db.execute(select(ChatSession).where(ChatSession.session_id == session_id, ChatSession.user_id == user_id))
+    return result.scalars().first()
+
+
+async def get_or_create_chat_session(db: AsyncSession, user_id: int, session_id: str = None) -> ChatSession:
     if session_id:
-        session = db.query(ChatSession).filter(ChatSession.session_id == session_id, ChatSession.user_id == user_id).first()
+        session = await find_chat_session(db, session_id, user_id)
 
         if session:
             return session
-    
+
     new_session_id = session_id or str(uuid.uuid4())
     chat_session = ChatSession(session_id=new_session_id, user_id=user_id)
 
     db.add(chat_session)
-    db.commit()
-    db.refresh(chat_session)
+    await db.commit()
     return chat_session
 
 
-def get_conversation_history(db: Session, session_id: str, user_id: int) -> list:
-    chat_session = db.query(ChatSession).filter(ChatSession.session_id == session_id, ChatSession.user_id == user_id).first()
-    
-    if not chat_session:
-        return []
-    
-    messages = db.query(Conversation).filter(Conversation.session_id == chat_session.id).order_by(Conversation.created_at).all()
-    
-    result = []
+async def get_conversation_history(db: AsyncSession, session_id: str, user_id: int) -> list:
+    result = await db.execute(
+        select(Conversation.role, Conversation.content)
+        .join(ChatSession, Conversation.session_id == ChatSession.id)
+        .where(ChatSession.session_id == session_id, ChatSession.user_id == user_id)
+        .order_by(Conversation.created_at)
+    )
+
+    return [{"role": role, "content": content} for role, content in result.all()]
 
-    for msg in messages:
-        result.append({"role": msg.role, "content": msg.content})
-    
-    return result
 
+async def save_message(db: AsyncSession, session_id: str, user_id: int, role: str, content: str):
+    chat_session = await find_chat_session(db, session_id, user_id)
 
-def save_message(db: Session, session_id: str, user_id: int, role: str, content: str):
-    chat_session = db.query(ChatSession).filter(ChatSession.session_id == session_id, ChatSession.user_id == user_id).first()
-    
     if not chat_session:
-        chat_session = get_or_create_chat_session(db, user_id, session_id)
-    
+        chat_session = await get_or_create_chat_session(db, user_id, session_id)
+
     message = Conversation(session_id=chat_session.id, user_id=user_id, role=role, content=content)
 
     db.add(message)
     chat_session.updated_at = datetime.utcnow()
-    
-    db.commit()
-    db.refresh(message)
+
+    await db.commit()
     return message
 
 
-def get_user_sessions(db: Session, user_id: int) -> list:
-    sessions = db.query(ChatSession).filter(ChatSession.user_id == user_id).order_by(ChatSession.updated_at.desc()).all()
-    
+async def get_user_sessions(db: AsyncSession, user_id: int) -> list:
+    result = await db.execute(select(ChatSession).where(ChatSession.user_id == user_id).order_by(ChatSession.updated_at.desc()))
+
     return [
         {
             "session_id": session.session_id,
             "created_at": session.created_at.isoformat(),
             "updated_at": session.updated_at.isoformat()
         }
-        for session in sessions
+        for session in result.scalars().all()
     ]
 
 
-def delete_chat_session(db: Session, session_id: str, user_id: int) -> bool:
-    session = db.query(ChatSession).filter(ChatSession.session_id == session_id, ChatSession.user_id == user_id).first()
-    
+async def delete_chat_session(db: AsyncSession, session_id: str, user_id: int) -> bool:
+    session = await find_chat_session(db, session_id, user_id)
+
     if not session:
         return False
-    
-    db.delete(session)
-    db.commit()
+
+    await db.delete(session)
+    await db.commit()
     return True
 
 
-def delete_all_user_sessions(db: Session, user_id: int) -> int:
-    sessions = db.query(ChatSession).filter(ChatSession.user_id == user_id).all()
+async def delete_all_user_sessions(db: AsyncSession, user_id: int) -> int:
+    result = await db.execute(select(ChatSession).where(ChatSession.user_id == user_id))
+    sessions = result.scalars().all()
     count = len(sessions)
 
     for session in sessions:
-        db.delete(session)
-    
-    db.commit()
-    return count
\ No newline at end of file
+        await db.delete(session)
+
+    await db.commit()
+    return count
@@ -1,24 +1,37 @@
 import os
+import re
 import json
+import asyncio
+import time
 import xml.etree.ElementTree as ET
-from contextlib import asynccontextmanager
+from contextlib import aclosing, asynccontextmanager
 from fastapi import FastAPI, Request, Depends
-from fastapi.responses import HTMLResponse, JSONResponse, Response
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from openai import OpenAI
+from openai import AsyncOpenAI
 from dotenv import load_dotenv
-from sqlalchemy.orm import Session
-from mcp_client import get_mcp_tools_for_openai, execute_mcp_tool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from mcp_client import get_mcp_tools_for_openai, execute_mcp_tool, start_mcp_pool, close_mcp_pool
 from database.auth_routes import router as auth_router, get_current_user
-from database.database import init_db, get_db, User, ChatSession, Conversation  
-from database.db_utils import (get_or_create_chat_session, get_conversation_history, save_message, get_user_sessions, delete_chat_session, delete_all_user_sessions)
+from database.database import init_db, get_db, engine, SessionLocal, User, ChatSession, Conversation  
+from database.db_utils import (find_chat_session, get_or_create_chat_session, get_conversation_history, save_message, get_user_sessions, delete_chat_session, delete_all_user_sessions)
+
+LOCAL_WORDS = re.compile(r"\b(local|nfs)\b")
 
 def detect_backend(user_text: str) -> str | None:
     text = user_text.lower()
-    if "dropbox" in text or "dbx" in text:
+    mentions_dropbox = "dropbox" in text or "dbx" in text
+    # Whole words only, so "locally", "location" or "allocate" do not count.
+    mentions_local = LOCAL_WORDS.search(text) is not None
+    if mentions_local and not mentions_dropbox and "google" not in text and "drive" not in text:
+        return "local"
+    if mentions_dropbox and ("google" in text or "drive" in text.replace("dropbox", "")):
+        return "all"
+    if mentions_dropbox:
         return "dropbox"
     if "google" in text or ("drive" in text and "dropbox" not in text):
         return "google"
@@ -28,8 +41,12 @@ load_dotenv()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    init_db()
+    await init_db()
+    await start_mcp_pool()
     yield
+    await close_mcp_pool()
+    await async_client.close()
+    await engine.dispose()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -52,7 +69,55 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 if not OPENAI_API_KEY:
     raise ValueError("OPENAI_API_KEY environment variable is required")
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "16"))
+OPENAI_TIMEOUT_SECONDS = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "60"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+
+# One client for the whole process, so every chat shares its keep-alive
+# connection pool instead of opening a new TLS connection per call.
+async_client = AsyncOpenAI(
+    api_key=OPENAI_API_KEY,
+    timeout=OPENAI_TIMEOUT_SECONDS,
+    max_retries=OPENAI_MAX_RETRIES,
+)
+openai_slots = asyncio.Semaphore(OPENAI_MAX_CONCURRENCY)
+
+
+async def create_completion(messages: list, tools: list | None):
+    """
+    Non-blocking chat completion. At most OPENAI_MAX_CONCURRENCY calls are
+    in flight at once; the rest wait here without holding up the event loop.
+    """
+    async with openai_slots:
+        return await async_client.chat.completions.create(
+            model=OPENAI_MODEL,
+            messages=messages,
+            tools=tools if tools else None,
+            tool_choice="auto" if tools else None,
+            max_tokens=MAX_TOKENS,
+        )
+
+
+async def stream_completion(messages: list, tools: list | None):
+    """
+    Like create_completion, yielding chunks. The slot is held until the
+    stream ends, so consume this with contextlib.aclosing: a consumer that
+    stops early (a disconnected client) then closes the HTTP stream and
+    frees the slot at once instead of whenever the generator is collected.
+    """
+    async with openai_slots:
+        stream = await async_client.chat.completions.create(
+            model=OPENAI_MODEL,
+            messages=messages,
+            tools=tools if tools else None,
+            tool_choice="auto" if tools else None,
+            max_tokens=MAX_TOKENS,
+            stream=True,
+        )
+        async with stream:
+            async for chunk in stream:
+                yield chunk
 
 def load_system_prompt():
     path = os.path.join(os.path.dirname(__file__), "prompts", "system_prompt.xml")
@@ -76,6 +141,118 @@ def load_system_prompt():
 SYSTEM_PROMPT = load_system_prompt()
 
 
+def resolve_tool_backend(tool_name: str, tool_args: dict, messages: list, backend_to_use: str) -> str:
+    """
+    Pick the backend for a list_files/search_files call that did not name
+    one, from the most recent tool result that mentions the folder. Sets
+    tool_args["backend"] and returns the backend to carry forward.
+    """
+    if tool_name == "list_files" or tool_name == "search_files":
+        if "backend" in tool_args and tool_args.get("backend", "").lower() in ["dropbox", "google", "local", "all"]:
+            backend_to_use = tool_args["backend"].lower()
+        else:
+            folder_id = tool_args.get("folder_id")
+            folder_name = tool_args.get("folder_name")
+
+            for msg in reversed(messages[-BACKEND_CONTEXT_MESSAGES:]):
+                role = msg.get("role") if isinstance(msg, dict) else getattr(msg, "role", None)
+                content = msg.get("content") if isinstance(msg, dict) else getattr(msg, "content", None)
+
+                if role == "tool" and content:
+                    content_str = str(content)
+                    content_lower = content_str.lower()
+
+                    is_dropbox_result = "[backend: dropbox]" in content_lower
+                    is_google_result = "[backend: google drive]" in content_lower
+                    is_local_result = "[backend: local]" in content_lower
+
+                    if not is_dropbox_result and not is_google_result:
+                        dropbox_patterns = ["dropbox root contents", "dropbox folder:", "dropbox root search", "dropbox folder search"]
+                        google_patterns = ["google drive", "first 5 google drive", "google folder:"]
+                        is_dropbox_result = any(pattern in content_lower for pattern in dropbox_patterns)
+                        is_google_result = any(pattern in content_lower for pattern in google_patterns)
+
+                    if is_local_result:
+                        result_backend = "local"
+                    else:
+                        result_backend = "dropbox" if is_dropbox_result else "google"
+
+                    if is_dropbox_result or is_google_result or is_local_result:
+                        if folder_id or folder_name:
+                            folder_found = False
+                            if folder_id and folder_id in content_str:
+                                folder_found = True
+                            elif folder_name and folder_name.lower() in content_str.lower():
+                                folder_found = True
+
+                            if folder_found:
+                                backend_to_use = result_backend
+                                break
+                        else:
+                            backend_to_use = result_backend
+                            break
+
+            tool_args["backend"] = backend_to_use
+
+    return backend_to_use
+
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def prepare_tool_calls(calls: list, messages: list, backend_to_use: str) -> list:
+    """
+    Parse arguments and resolve the backend for each (id, name, arguments)
+    call of one turn, in order, before any of them run. A call whose
+    arguments do not parse carries the error as its result instead.
+    """
+    prepared = []
+
+    for call_id, tool_name, arguments in calls:
+        call = {"id": call_id, "name": tool_name, "args": None, "error": None}
+        try:
+            call["args"] = json.loads(arguments or "{}")
+        except json.JSONDecodeError as e:
+            call["error"] = f"Error parsing tool arguments: {str(e)}"
+        else:
+            backend_to_use = resolve_tool_backend(tool_name, call["args"], messages, backend_to_use)
+        prepared.append(call)
+
+    return prepared
+
+
+async def run_tool_call(call: dict, slots: asyncio.Semaphore) -> dict:
+    """Run one prepared call under the turn's semaphore and TOOL_CALL_TIMEOUT_SECONDS."""
+    started = time.perf_counter()
+
+    if call["error"]:
+        content, ok = call["error"], False
+    else:
+        async with slots:
+            try:
+                content, ok = await asyncio.wait_for(execute_mcp_tool(call["name"], call["args"]), TOOL_CALL_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                content, ok = f"Error: tool {call['name']} timed out after {TOOL_CALL_TIMEOUT_SECONDS:g}s", False
+
+    return {
+        "id": call["id"],
+        "name": call["name"],
+        "content": content,
+        "ok": ok,
+        "duration_ms": round((time.perf_counter() - started) * 1000),
+    }
+
+
+def tool_message(result: dict) -> dict:
+    return {
+        "role": "tool",
+        "tool_call_id": result["id"],
+        "name": result["name"],
+        "content": result["content"]
+    }
+
+
 class ChatMessage(BaseModel):
     message: str
     session_id: str | None = None
@@ -104,21 +281,19 @@ async def favicon():
 async def get_chat_history(
     session_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     from fastapi import HTTPException
     
-    session = db.query(ChatSession).filter(
-        ChatSession.session_id == session_id,
-        ChatSession.user_id == current_user.id
-    ).first()
+    session = await find_chat_session(db, session_id, current_user.id)
     
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    conversations = db.query(Conversation).filter(
-        Conversation.session_id == session.id 
-    ).order_by(Conversation.created_at.asc()).all()
+    result = await db.execute(
+        select(Conversation).where(Conversation.session_id == session.id).order_by(Conversation.created_at.asc())
+    )
+    conversations = result.scalars().all()
     
     return JSONResponse({
         "messages": [
@@ -135,9 +310,9 @@ async def get_chat_history(
 @app.post("/chat/new")
 async def new_chat(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    chat_session = get_or_create_chat_session(db, current_user.id)
+    chat_session = await get_or_create_chat_session(db, current_user.id)
     return JSONResponse({"session_id": chat_session.session_id})
 
 
@@ -145,19 +320,19 @@ async def new_chat(
 async def chat_endpoint(
     chat: ChatMessage,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    chat_session = get_or_create_chat_session(db, current_user.id, chat.session_id)
+    chat_session = await get_or_create_chat_session(db, current_user.id, chat.session_id)
     session_id = chat_session.session_id
 
     mcp_tools = await get_mcp_tools_for_openai()
-    conversation_history = get_conversation_history(db, session_id, current_user.id)
+    conversation_history = await get_conversation_history(db, session_id, current_user.id)
 
     messages = [{"role": "system", "content": SYSTEM_PROMPT}]
     messages.extend(conversation_history)
     messages.append({"role": "user", "content": chat.message})
 
-    save_message(db, session_id, current_user.id, "user", chat.message)
+    await save_message(db, session_id, current_user.id, "user", chat.message)
 
     iteration = 0
     
@@ -166,16 +341,10 @@ async def chat_endpoint(
             iteration += 1
             
             try:
-                response = client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=messages,
-                    tools=mcp_tools if mcp_tools else None,
-                    tool_choice="auto" if mcp_tools else None,  
-                    max_tokens=MAX_TOKENS,
-                )
+                response = await create_completion(messages, mcp_tools)
             except Exception as e:
                 error_msg = f"OpenAI API error: {str(e)}"
-                save_message(db, session_id, current_user.id, "assistant", error_msg)
+                await save_message(db, session_id, current_user.id, "assistant", error_msg)
                 return ChatResponse(reply=error_msg, session_id=session_id)
 
             response_message = response.choices[0].message
@@ -188,77 +357,24 @@ async def chat_endpoint(
                 if detected_from_message:
                     backend_to_use = detected_from_message
 
-                for tool_call in response_message.tool_calls:
-                    tool_name = tool_call.function.name
-
-                    try:
-                        tool_args = json.loads(tool_call.function.arguments)
-                    except json.JSONDecodeError as e:
-                        tool_result = f"Error parsing tool arguments: {str(e)}"
-                        messages.append({
-                            "role": "tool",
-                            "tool_call_id": tool_call.id,
-                            "name": tool_name,
-                            "content": tool_result
-                        })
-                        continue
-
-                    if tool_name == "list_files" or tool_name == "search_files":
-                        if "backend" in tool_args and tool_args.get("backend", "").lower() in ["dropbox", "google"]:
-                            backend_to_use = tool_args["backend"].lower()
-                        else:
-                            folder_id = tool_args.get("folder_id")
-                            folder_name = tool_args.get("folder_name")
-                            
-                            for msg in reversed(messages[-BACKEND_CONTEXT_MESSAGES:]):
-                                role = msg.get("role") if isinstance(msg, dict) else getattr(msg, "role", None)
-                                content = msg.get("content") if isinstance(msg, dict) else getattr(msg, "content", None)
-                                
-                                if role == "tool" and content:
-                                    content_str = str(content)
-                                    content_lower = content_str.lower()
-                                    
-                                    is_dropbox_result = "[backend: dropbox]" in content_lower
-                                    is_google_result = "[backend: google drive]" in content_lower
-                                    
-                                    if not is_dropbox_result and not is_google_result:
-                                        dropbox_patterns = ["dropbox root contents", "dropbox folder:", "dropbox root search", "dropbox folder search"]
-                                        google_patterns = ["google drive", "first 5 google drive", "google folder:"]
-                                        is_dropbox_result = any(pattern in content_lower for pattern in dropbox_patterns)
-                                        is_google_result = any(pattern in content_lower for pattern in google_patterns)
-                                    
-                                    if is_dropbox_result or is_google_result:
-                                        if folder_id or folder_name:
-                                            folder_found = False
-                                            if folder_id and folder_id in content_str:
-                                                folder_found = True
-                                            elif folder_name and folder_name.lower() in content_str.lower():
-                                                folder_found = True
-                                            
-                                            if folder_found:
-                                                backend_to_use = "dropbox" if is_dropbox_result else "google"
-                                                break
-                                        else:
-                                            backend_to_use = "dropbox" if is_dropbox_result else "google"
-                                            break
-                            
-                            tool_args["backend"] = backend_to_use
-
-                    tool_result = await execute_mcp_tool(tool_name, tool_args)
-
-                    messages.append({
-                        "role": "tool",
-                        "tool_call_id": tool_call.id,
-                        "name": tool_name,
-                        "content": tool_result
-                    })
+                prepared = prepare_tool_calls(
+                    [(tc.id, tc.function.name, tc.function.arguments) for tc in response_message.tool_calls],
+                    messages,
+                    backend_to_use,
+                )
+
+                # Calls in one turn are independent, so they run together;
+                # results go back in the order the model asked for them.
+                slots = asyncio.Semaphore(TOOL_CALL_CONCURRENCY)
+                results = await asyncio.gather(*(run_tool_call(call, slots) for call in prepared))
+                messages.extend(tool_message(result) for result in results)
 
                 continue
             
             else:
                 ai_reply = response_message.content
                 
-                save_message(db, session_id, current_user.id, "assistant", ai_reply)
+                await save_message(db, session_id, current_user.id, "assistant", ai_reply)
                 
                 return ChatResponse(reply=ai_reply, session_id=session_id)
 
@@ -269,17 +385,143 @@ async def chat_endpoint(
             error_msg = "ERROR: MAX ITERATIONS REACHED"
         else:
             error_msg = f"An unexpected error occurred: {str(e)}"
-        save_message(db, session_id, current_user.id, "assistant", error_msg)
+        await save_message(db, session_id, current_user.id, "assistant", error_msg)
         return ChatResponse(reply=error_msg, session_id=session_id)
 
 
+@app.post("/chat/stream")
+async def chat_stream_endpoint(
+    chat: ChatMessage,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Same tool loop as /chat, streamed as server-sent events:
+
+        session     {session_id}
+        token       {content}                      reply text as it arrives
+        tool_start  {id, name, arguments}
+        tool_end    {id, name, ok, duration_ms}
+        done        {reply, session_id}
+        error       {message, session_id}
+    """
+    chat_session = await get_or_create_chat_session(db, current_user.id, chat.session_id)
+    session_id = chat_session.session_id
+    user_id = current_user.id
+
+    mcp_tools = await get_mcp_tools_for_openai()
+    conversation_history = await get_conversation_history(db, session_id, user_id)
+
+    messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+    messages.extend(conversation_history)
+    messages.append({"role": "user", "content": chat.message})
+
+    await save_message(db, session_id, user_id, "user", chat.message)
+
+    async def events():
+        # The request's session is closed once the endpoint returns, before
+        # the body is streamed, so the generator uses its own.
+        stream_db = SessionLocal()
+        try:
+            yield sse_event("session", {"session_id": session_id})
+
+            for _ in range(MAX_ITERATIONS):
+                try:
+                    content = []
+                    tool_calls = {}
+                    async with aclosing(stream_completion(messages, mcp_tools)) as chunks:
+                        async for chunk in chunks:
+                            if not chunk.choices:
+                                continue
+                            delta = chunk.choices[0].delta
+
+                            if delta.content:
+                                content.append(delta.content)
+                                yield sse_event("token", {"content": delta.content})
+
+                            # Tool calls arrive in fragments keyed by index:
+                            # the first carries the id and name, the rest
+                            # append to the JSON arguments.
+                            for fragment in delta.tool_calls or []:
+                                call = tool_calls.setdefault(fragment.index, {"id": "", "name": "", "arguments": ""})
+                                if fragment.id:
+                                    call["id"] = fragment.id
+                                if fragment.function and fragment.function.name:
+                                    call["name"] += fragment.function.name
+                                if fragment.function and fragment.function.arguments:
+                                    call["arguments"] += fragment.function.arguments
+                except Exception as e:
+                    error_msg = f"OpenAI API error: {str(e)}"
+                    await save_message(stream_db, session_id, user_id, "assistant", error_msg)
+                    yield sse_event("error", {"message": error_msg, "session_id": session_id})
+                    return
+
+                ai_reply = "".join(content)
+
+                if not tool_calls:
+                    await save_message(stream_db, session_id, user_id, "assistant", ai_reply)
+                    yield sse_event("done", {"reply": ai_reply, "session_id": session_id})
+                    return
+
+                calls = [tool_calls[index] for index in sorted(tool_calls)]
+                messages.append({
+                    "role": "assistant",
+                    "content": ai_reply or None,
+                    "tool_calls": [
+                        {"id": call["id"], "type": "function", "function": {"name": call["name"], "arguments": call["arguments"]}}
+                        for call in calls
+                    ],
+                })
+
+                prepared = prepare_tool_calls(
+                    [(call["id"], call["name"], call["arguments"]) for call in calls],
+                    messages,
+                    detect_backend(chat.message) or "google",
+                )
+
+                for call in calls:
+                    yield sse_event("tool_start", {"id": call["id"], "name": call["name"], "arguments": call["arguments"]})
+
+                # tool_end is sent as each call finishes; the results are
+                # added to the conversation in the original order.
+                slots = asyncio.Semaphore(TOOL_CALL_CONCURRENCY)
+                tasks = [asyncio.create_task(run_tool_call(call, slots)) for call in prepared]
+                try:
+                    for finished in asyncio.as_completed(tasks):
+                        result = await finished
+                        yield sse_event("tool_end", {key: result[key] for key in ("id", "name", "ok", "duration_ms")})
+                finally:
+                    # Client went away mid-turn: stop the calls still running.
+                    for task in tasks:
+                        task.cancel()
+
+                messages.extend(tool_message(task.result()) for task in tasks)
+
+            error_msg = "ERROR: MAX ITERATIONS REACHED"
+            await save_message(stream_db, session_id, user_id, "assistant", error_msg)
+            yield sse_event("error", {"message": error_msg, "session_id": session_id})
+
+        except Exception as e:
+            error_msg = f"An unexpected error occurred: {str(e)}"
+            await save_message(stream_db, session_id, user_id, "assistant", error_msg)
+            yield sse_event("error", {"message": error_msg, "session_id": session_id})
+        finally:
+            await stream_db.close()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.get("/chat/sessions")
 async def get_sessions(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get all chat sessions for the current user."""
-    sessions = get_user_sessions(db, current_user.id)
+    sessions = await get_user_sessions(db, current_user.id)
     return JSONResponse({"sessions": sessions})
 
 
@@ -287,10 +529,10 @@ async def get_sessions(
 async def delete_session(
     session_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete a specific chat session and all its messages."""
-    deleted = delete_chat_session(db, session_id, current_user.id)
+    deleted = await delete_chat_session(db, session_id, current_user.id)
     if not deleted:
         return JSONResponse(
             {"error": "Session not found or access denied"},
@@ -302,13 +544,15 @@ async def delete_session(
 @app.delete("/chat/sessions")
 async def delete_all_sessions(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete all chat sessions for the current user."""
-    count = delete_all_user_sessions(db, current_user.id)
+    count = await delete_all_user_sessions(db, current_user.id)
     return JSONResponse({"message": f"Deleted {count} session(s) successfully", "count": count})
 
 
 MAX_ITERATIONS = 5
 MAX_TOKENS = 500
-BACKEND_CONTEXT_MESSAGES = 5
\ No newline at end of file
+BACKEND_CONTEXT_MESSAGES = 5
+TOOL_CALL_CONCURRENCY = int(os.getenv("TOOL_CALL_CONCURRENCY", "4"))
+TOOL_CALL_TIMEOUT_SECONDS = float(os.getenv("TOOL_CALL_TIMEOUT_SECONDS", "120"))
\ No newline at end of file
@@ -1,30 +1,237 @@
 import os
+import time
+import random
 import asyncio
 import logging
+from contextlib import asynccontextmanager, AsyncExitStack
 from fastmcp import Client
+from fastmcp.client.messages import MessageHandler
 from dotenv import load_dotenv
 
 load_dotenv()
 
 MCP_SERVER_URL = os.getenv("MCP_SERVER_URL")
+MCP_POOL_SIZE = int(os.getenv("MCP_POOL_SIZE", "4"))
+MCP_HEALTH_INTERVAL_SECONDS = float(os.getenv("MCP_HEALTH_INTERVAL_SECONDS", "30"))
+MCP_PING_TIMEOUT_SECONDS = float(os.getenv("MCP_PING_TIMEOUT_SECONDS", "5"))
+MCP_RECONNECT_BASE_SECONDS = float(os.getenv("MCP_RECONNECT_BASE_SECONDS", "0.5"))
+MCP_RECONNECT_MAX_SECONDS = float(os.getenv("MCP_RECONNECT_MAX_SECONDS", "30"))
+MCP_TOOLS_TTL_SECONDS = float(os.getenv("MCP_TOOLS_TTL_SECONDS", "300"))
 
 _cached_mcp_tools = None
+_tools_fetched_at = 0.0
 _tools_fetch_error = False
 
+logger = logging.getLogger(__name__)
 logging.getLogger("asyncio").setLevel(logging.ERROR)
 
 
+def invalidate_tools_cache():
+    # The stale list is kept as the fallback if the refetch fails.
+    global _tools_fetched_at
+    _tools_fetched_at = 0.0
+
+
+class _ToolListHandler(MessageHandler):
+    async def on_tool_list_changed(self, message):
+        invalidate_tools_cache()
+
+
+class _Slot:
+    """One pooled connection: the client, its exit stack and reconnect backoff state."""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.client = None
+        self.stack = None
+        self.failures = 0
+        self.retry_at = 0.0
+        self.lock = asyncio.Lock()
+
+    def connected(self):
+        return self.client is not None and self.client.is_connected()
+
+
+class MCPSessionPool:
+    """
+    A fixed set of long-lived MCP client sessions shared by all requests, so
+    a tool call reuses an initialized session instead of paying for a new
+    connection and the initialize handshake.
+
+    fastmcp clients multiplex concurrent requests over one session, so
+    sessions are handed out round-robin without being checked out: any
+    number of calls can share them and none waits for another to finish.
+    Several sessions only spread the load and keep calls going while one
+    reconnects.
+
+    A session that fails is closed and reconnected on next use, with
+    exponential backoff plus jitter between attempts; requests meanwhile
+    go to the sessions that are still connected. A background task pings
+    every session each MCP_HEALTH_INTERVAL_SECONDS so a dead server is
+    noticed, and reconnected to, before a request needs it.
+    """
+
+    def __init__(self, url: str, size: int = MCP_POOL_SIZE):
+        self.url = url
+        self.slots = [_Slot(i) for i in range(max(1, size))]
+        self._next = 0
+        self._health_task = None
+
+    async def start(self):
+        for slot in self.slots:
+            try:
+                await self._connect(slot)
+            except Exception as e:
+                logger.warning("MCP session %d could not connect: %s", slot.index, e)
+        self._health_task = asyncio.create_task(self._health_loop())
+
+    async def close(self):
+        if self._health_task:
+            self._health_task.cancel()
+        for slot in self.slots:
+            await self._disconnect(slot)
+
+    async def _connect(self, slot: _Slot):
+        await self._disconnect(slot)
+        client = Client(self.url, message_handler=_ToolListHandler())
+        stack = AsyncExitStack()
+        try:
+            await stack.enter_async_context(client)
+        except Exception:
+            await stack.aclose()
+            slot.failures += 1
+            delay = min(MCP_RECONNECT_MAX_SECONDS, MCP_RECONNECT_BASE_SECONDS * 2 ** (slot.failures - 1))
+            slot.retry_at = time.monotonic() + delay * random.uniform(0.5, 1.0)
+            raise
+
+        if slot.failures:
+            # The server may have restarted with a different tool set.
+            invalidate_tools_cache()
+        slot.client, slot.stack = client, stack
+        slot.failures = 0
+
+    async def _disconnect(self, slot: _Slot):
+        stack, slot.client, slot.stack = slot.stack, None, None
+        if stack:
+            try:
+                await stack.aclose()
+            except Exception:
+                pass
+
+    async def _reconnect(self, slot: _Slot):
+        # Requests that find the same slot down wait for one attempt
+        # instead of each opening a session.
+        async with slot.lock:
+            if not slot.connected() and time.monotonic() >= slot.retry_at:
+                await self._connect(slot)
+
+    def _rotation(self):
+        start = self._next
+        self._next = (start + 1) % len(self.slots)
+        return self.slots[start:] + self.slots[:start]
+
+    async def _pick(self):
+        """The next connected slot, reconnecting one whose backoff has expired if none is."""
+        slots = self._rotation()
+        for slot in slots:
+            if slot.connected():
+                return slot
+
+        error = None
+        for slot in slots:
+            if time.monotonic() < slot.retry_at:
+                continue
+            try:
+                await self._reconnect(slot)
+            except Exception as e:
+                error = e
+                continue
+            if slot.connected():
+                return slot
+
+        if error is not None:
+            raise ConnectionError(f"MCP server unavailable: {error}")
+        wait = min(slot.retry_at for slot in slots) - time.monotonic()
+        raise ConnectionError(f"MCP server unavailable, next reconnect attempt in {max(wait, 0):.1f}s")
+
+    @asynccontextmanager
+    async def session(self):
+        """A connected client, shared with other requests. A client left disconnected by an error is dropped."""
+        slot = await self._pick()
+        client = slot.client
+        try:
+            yield client
+        finally:
+            if slot.client is client and not client.is_connected():
+                await self._disconnect(slot)
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(MCP_HEALTH_INTERVAL_SECONDS)
+            for slot in self.slots:
+                try:
+                    if slot.client is not None:
+                        await self._check(slot)
+                    elif time.monotonic() >= slot.retry_at:
+                        await self._reconnect(slot)
+                except Exception as e:
+                    logger.warning("MCP session %d failed health check: %s", slot.index, e)
+                    await self._disconnect(slot)
+
+    async def _check(self, slot: _Slot):
+        try:
+            await asyncio.wait_for(slot.client.ping(), MCP_PING_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            raise
+        except Exception:
+            # An error reply (some servers do not implement ping) still
+            # proves the session is alive; a lost connection does not.
+            if not slot.client.is_connected():
+                raise
+
+
+_pool = None
+
+
+async def start_mcp_pool():
+    global _pool
+    if MCP_SERVER_URL and _pool is None:
+        _pool = MCPSessionPool(MCP_SERVER_URL)
+        await _pool.start()
+
+
+async def close_mcp_pool():
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+@asynccontextmanager
+async def mcp_session():
+    if _pool is None:
+        await start_mcp_pool()
+    async with _pool.session() as mcp_client:
+        yield mcp_client
+
+
 async def get_mcp_tools_for_openai(force_refresh: bool = False):
-    global _cached_mcp_tools, _tools_fetch_error
-    
-    if _cached_mcp_tools is not None and not force_refresh:
+    """
+    The server's tools in OpenAI function format. Cached until the server
+    sends tools/list_changed, a session reconnects, or MCP_TOOLS_TTL_SECONDS
+    pass.
+    """
+    global _cached_mcp_tools, _tools_fetched_at, _tools_fetch_error
+
+    fresh = time.monotonic() - _tools_fetched_at < MCP_TOOLS_TTL_SECONDS
+    if _cached_mcp_tools is not None and fresh and not force_refresh:
         return _cached_mcp_tools
-    
+
     if not MCP_SERVER_URL:
         return []
-    
+
     try:
-        async with Client(MCP_SERVER_URL) as mcp_client:
+        async with mcp_session() as mcp_client:
             tools = await mcp_client.list_tools()
             openai_tools = []
             for tool in tools:
@@ -41,8 +248,9 @@ async def get_mcp_tools_for_openai(force_refresh: bool = False):
                     }
                 }
                 openai_tools.append(openai_tool)
-            
+
             _cached_mcp_tools = openai_tools
+            _tools_fetched_at = time.monotonic()
             _tools_fetch_error = False
 
             return openai_tools
@@ -57,20 +265,31 @@ async def get_mcp_tools_for_openai(force_refresh: bool = False):
 
 
 async def execute_mcp_tool(tool_name: str, parameters: dict):
+    """
+    Call `tool_name` and return `(text, ok)`. `ok` is the negation of the
+    MCP result's isError flag; failures to reach the server are not ok.
+    """
     if not MCP_SERVER_URL:
-        return f"Error: MCP server not configured. Cannot call tool {tool_name}"
-    
-    try:
-        async with Client(MCP_SERVER_URL) as mcp_client:
-            result = await mcp_client.call_tool(tool_name, parameters)
-            if result.content and len(result.content) > 0:
-                return result.content[0].text
-            else:
-                return f"Tool {tool_name} returned empty result"
+        return f"Error: MCP server not configured. Cannot call tool {tool_name}", False
 
-    except (ConnectionError, ConnectionResetError, OSError) as e:
-        return f"Error: Could not connect to MCP server. {str(e)}"
+    # A session that dropped mid-call is reconnected and the call retried
+    # once; the tools only read, so repeating one is safe.
+    for attempt in range(2):
+        try:
+            async with mcp_session() as mcp_client:
+                try:
+                    result = await mcp_client.call_tool(tool_name, parameters, raise_on_error=False)
+                except Exception:
+                    if attempt == 0 and not mcp_client.is_connected():
+                        continue
+                    raise
+                if result.content and len(result.content) > 0:
+                    return result.content[0].text, not result.is_error
+                else:
+                    return f"Tool {tool_name} returned empty result", not result.is_error
 
-    except Exception as e:
-        return f"Error calling tool {tool_name}: {str(e)}"
+        except (ConnectionError, ConnectionResetError, OSError) as e:
+            return f"Error: Could not connect to MCP server. {str(e)}", False
 
+        except Exception as e:
+            return f"Error calling tool {tool_name}: {str(e)}", False
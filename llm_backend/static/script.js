@@ -546,6 +546,70 @@ function hideLoading() {
   }
 }
 
+function parseSseEvent(raw) {
+  let event = 'message';
+  const data = [];
+
+  for (const line of raw.split('\n')) {
+    if (line.startsWith('event:')) {
+      event = line.slice(6).trim();
+    } else if (line.startsWith('data:')) {
+      data.push(line.slice(5).trimStart());
+    }
+  }
+
+  return { event, data: data.length ? JSON.parse(data.join('\n')) : {} };
+}
+
+async function readEventStream(response, onEvent) {
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const raw = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      if (raw.trim()) {
+        const { event, data } = parseSseEvent(raw);
+        onEvent(event, data);
+      }
+    }
+  }
+}
+
+function addToolEvent(messageDiv, data) {
+  const bubble = messageDiv.querySelector('.message-bubble');
+  let list = bubble.querySelector('.tool-events');
+
+  if (!list) {
+    list = document.createElement("div");
+    list.className = "tool-events";
+    bubble.insertBefore(list, bubble.firstChild);
+  }
+
+  const item = document.createElement("div");
+  item.className = "tool-event tool-running";
+  item.dataset.toolId = data.id;
+  item.textContent = `Running ${data.name}...`;
+  list.appendChild(item);
+}
+
+function finishToolEvent(messageDiv, data) {
+  const item = messageDiv.querySelector(`.tool-event[data-tool-id="${data.id}"]`);
+  if (!item) return;
+
+  item.className = `tool-event ${data.ok ? 'tool-done' : 'tool-failed'}`;
+  item.textContent = `${data.name} ${data.ok ? 'done' : 'failed'} (${(data.duration_ms / 1000).toFixed(1)}s)`;
+}
+
 async function sendMessage() {
   if (!isSignedIn) {
     addMessage('Please sign in to send messages.', 'error');
@@ -570,7 +634,7 @@ async function sendMessage() {
 
   try {
     const sessionId = getSessionId();
-    const res = await fetch("/chat", {
+    const res = await fetch("/chat/stream", {
       method: "POST",
       headers: getAuthHeaders(),
       credentials: 'include',
@@ -580,9 +644,9 @@ async function sendMessage() {
       })
     });
 
-    hideLoading();
-
     if (!res.ok) {
+      hideLoading();
+
       if (res.status === 401) {
         addMessage('Your session has expired. Please sign in again', 'error');
         isSignedIn = false;
@@ -597,17 +661,51 @@ async function sendMessage() {
       return;
     }
 
-    const data = await res.json();
-    
-    if (data.reply && data.reply.toLowerCase().includes('error')) {
-      addMessage(data.reply, 'error');
-    } else {
-      addMessage(data.reply || 'No response received', 'assistant');
+    const chatDiv = document.getElementById("chat");
+    let messageDiv = null;
+    let reply = '';
+    let finished = false;
 
+    // The reply bubble replaces the spinner once there is something to show.
+    const replyMessage = () => {
+      if (!messageDiv) {
+        hideLoading();
+        messageDiv = addMessage('', 'assistant');
+      }
+      return messageDiv;
+    };
+
+    await readEventStream(res, (event, data) => {
+      if (event === 'session') {
+        setSessionId(data.session_id);
+      } else if (event === 'token') {
+        reply += data.content;
+        replyMessage().querySelector('.message-content').innerHTML = parseMessage(reply);
+      } else if (event === 'tool_start') {
+        addToolEvent(replyMessage(), data);
+      } else if (event === 'tool_end') {
+        finishToolEvent(replyMessage(), data);
+      } else if (event === 'done') {
+        finished = true;
+        replyMessage().querySelector('.message-content').innerHTML = parseMessage(data.reply || 'No response received');
+      } else if (event === 'error') {
+        finished = true;
+        hideLoading();
+        if (messageDiv && !reply && !messageDiv.querySelector('.tool-event')) {
+          messageDiv.remove();
+        }
+        addMessage(data.message, 'error');
+      }
+      chatDiv.scrollTop = chatDiv.scrollHeight;
+    });
+
+    hideLoading();
+
+    if (!finished) {
+      addMessage('The response was interrupted. Please try again.', 'error');
     }
-    
-    if (data.session_id) {
-      setSessionId(data.session_id);
+
+    if (getSessionId()) {
       loadChatSessions(); 
     }
 
@@ -0,0 +1,362 @@
+import io
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlparse, parse_qs
+
+import dropbox
+import httplib2
+from googleapiclient.discovery import build
+
+DRIVE_FOLDER_MIME = "application/vnd.google-apps.folder"
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+WORDS = (
+    "budget roadmap meeting report quarterly revenue design review notes "
+    "customer launch hiring forecast metrics project timeline summary draft"
+).split()
+
+
+def make_text(size, seed=0):
+    """Deterministic prose of about `size` bytes, in paragraphs."""
+    rng = random.Random(seed)
+    paragraphs = []
+    total = 0
+
+    while total < size:
+        sentences = [
+            " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 14))).capitalize() + "."
+            for _ in range(rng.randint(2, 5))
+        ]
+        paragraph = " ".join(sentences)
+        paragraphs.append(paragraph)
+        total += len(paragraph) + 2
+
+    return "\n\n".join(paragraphs)[:size]
+
+
+_docx_cache = {}
+_docx_lock = threading.Lock()
+
+
+def make_docx(paragraphs):
+    """A .docx with `paragraphs` paragraphs of prose, built once per size."""
+    with _docx_lock:
+        if paragraphs not in _docx_cache:
+            from docx import Document
+
+            doc = Document()
+            for i in range(paragraphs):
+                doc.add_paragraph(make_text(400, seed=i))
+            buffer = io.BytesIO()
+            doc.save(buffer)
+            _docx_cache[paragraphs] = buffer.getvalue()
+        return _docx_cache[paragraphs]
+
+
+class Corpus:
+    """
+    The synthetic account both fakes serve: `folders` folders under the
+    root, each holding `files_per_folder` .txt files plus one .docx per
+    entry in `docx_paragraphs`.
+    """
+
+    def __init__(self, folders=5, files_per_folder=200, txt_bytes=20000, docx_paragraphs=(50,)):
+        self.modified = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        self.folders = []
+        self.files = {}
+        self.children = {"root": []}
+
+        for i in range(folders):
+            folder = {"id": f"fld{i}", "name": f"Folder {i}", "path": f"/folder {i}", "mimeType": DRIVE_FOLDER_MIME}
+            self.folders.append(folder)
+            self.children["root"].append(folder)
+            self.children[folder["id"]] = []
+
+            for j in range(files_per_folder):
+                data = make_text(txt_bytes, seed=i * 100003 + j).encode("utf-8")
+                self._add(folder, f"f{i}_{j}", f"notes {j}.txt", "text/plain", data)
+
+            for paragraphs in docx_paragraphs:
+                self._add(folder, f"d{i}_{paragraphs}", f"report {paragraphs}p.docx", DOCX_MIME, make_docx(paragraphs))
+
+        self.by_path = {f["path"]: f for f in self.files.values()}
+        self.by_path.update({f["path"]: f for f in self.folders})
+
+    def _add(self, folder, file_id, name, mime, data):
+        entry = {
+            "id": file_id,
+            "name": name,
+            "path": f"{folder['path']}/{name}",
+            "mimeType": mime,
+            "parent": folder["id"],
+            "data": data,
+        }
+        self.files[file_id] = entry
+        self.children[folder["id"]].append(entry)
+
+    def sample_file(self, kind="txt", paragraphs=None):
+        if kind == "docx":
+            return self.files[f"d0_{paragraphs}"]
+        return self.files["f0_0"]
+
+    def write_to(self, root):
+        """Materialize the corpus under `root`, for the local backend."""
+        import os
+
+        for folder in self.folders:
+            os.makedirs(os.path.join(root, folder["path"].lstrip("/")), exist_ok=True)
+        for f in self.files.values():
+            with open(os.path.join(root, f["path"].lstrip("/")), "wb") as out:
+                out.write(f["data"])
+
+
+class Latency:
+    """Per-request delay: a base latency with jitter plus transfer time."""
+
+    def __init__(self, latency_ms=50.0, jitter_ms=10.0, bandwidth_mb_s=50.0, seed=0):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.bandwidth = bandwidth_mb_s * 1024 * 1024
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+
+    def wait(self, nbytes=0):
+        with self._lock:
+            self.requests += 1
+            delay = max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+        if self.bandwidth and nbytes:
+            delay += nbytes / self.bandwidth
+        time.sleep(delay)
+
+
+def _parse_range(header, size):
+    match = re.match(r"bytes=(\d+)-(\d*)", header or "")
+    if not match:
+        return 0, size - 1
+    start = int(match.group(1))
+    end = int(match.group(2)) if match.group(2) else size - 1
+    return start, min(end, size - 1)
+
+
+class FakeDriveHttp:
+    """
+    Stands in for httplib2.Http under a real googleapiclient service, so
+    request building, paging and MediaIoBaseDownload all run unchanged.
+    Serves files.list (parents, folder mime and name filters), files.get
+    and media downloads with Range. `page_cap` is the most files the
+    "server" returns per page, whatever pageSize asks for.
+    """
+
+    def __init__(self, corpus, latency, page_cap=1000):
+        self.corpus = corpus
+        self.latency = latency
+        self.page_cap = page_cap
+
+    def request(self, uri, method="GET", body=None, headers=None, **kwargs):
+        url = urlparse(uri)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        parts = url.path.split("/drive/v3/files")
+
+        if len(parts) != 2:
+            return self._respond(404, {"error": {"code": 404, "message": "not found"}})
+
+        file_id = parts[1].strip("/")
+        if not file_id:
+            return self._list(params)
+
+        file_id = file_id.split("/")[0]
+        entry = self.corpus.files.get(file_id) or next((f for f in self.corpus.folders if f["id"] == file_id), None)
+        if entry is None:
+            return self._respond(404, {"error": {"code": 404, "message": f"File not found: {file_id}"}})
+
+        if params.get("alt") == "media":
+            return self._media(entry, (headers or {}).get("range") or (headers or {}).get("Range"))
+        return self._respond(200, self._meta(entry))
+
+    def _meta(self, entry):
+        meta = {
+            "id": entry["id"],
+            "name": entry["name"],
+            "mimeType": entry["mimeType"],
+            "modifiedTime": self.corpus.modified.isoformat().replace("+00:00", "Z"),
+            "parents": [entry.get("parent", "root")],
+        }
+        if "data" in entry:
+            meta["size"] = str(len(entry["data"]))
+            meta["md5Checksum"] = f"{hash(entry['data']) & 0xffffffff:08x}"
+        return meta
+
+    def _list(self, params):
+        q = params.get("q", "")
+        parent = re.search(r"'([^']+)' in parents", q)
+        name = re.search(r"name contains '((?:[^'\\]|\\.)*)'", q)
+
+        if parent:
+            items = self.corpus.children.get(parent.group(1), [])
+        elif DRIVE_FOLDER_MIME in q:
+            items = self.corpus.folders
+        else:
+            items = list(self.corpus.files.values())
+
+        if name:
+            term = name.group(1).replace("\\'", "'").lower()
+            items = [f for f in items if term in f["name"].lower()]
+
+        start = int(params.get("pageToken") or 0)
+        size = min(int(params.get("pageSize") or 100), self.page_cap)
+        page = items[start:start + size]
+
+        result = {"files": [self._meta(f) for f in page]}
+        if start + size < len(items):
+            result["nextPageToken"] = str(start + size)
+        return self._respond(200, result)
+
+    def _media(self, entry, range_header):
+        data = entry["data"]
+        start, end = _parse_range(range_header, len(data))
+        chunk = data[start:end + 1]
+        self.latency.wait(len(chunk))
+        resp = httplib2.Response({
+            "status": "206" if range_header else "200",
+            "content-range": f"bytes {start}-{end}/{len(data)}",
+            "content-length": str(len(chunk)),
+        })
+        return resp, chunk
+
+    def _respond(self, status, payload):
+        self.latency.wait()
+        resp = httplib2.Response({"status": str(status), "content-type": "application/json"})
+        return resp, json.dumps(payload).encode("utf-8")
+
+
+class _FakeDownload:
+    def __init__(self, data):
+        self.data = data
+
+    def iter_content(self, chunk_size=1024 * 1024):
+        for start in range(0, len(self.data), chunk_size):
+            yield self.data[start:start + chunk_size]
+
+    def close(self):
+        pass
+
+
+class FakeDropbox:
+    """
+    Duck-typed dropbox.Dropbox covering the calls the tools make, returning
+    real SDK metadata types. `page_cap` limits entries per list_folder page.
+    """
+
+    def __init__(self, corpus, latency, page_cap=2000):
+        self.corpus = corpus
+        self.latency = latency
+        self.page_cap = page_cap
+
+    def _metadata(self, entry):
+        if "data" not in entry:
+            return dropbox.files.FolderMetadata(
+                name=entry["name"], path_lower=entry["path"].lower(), path_display=entry["path"], id=f"id:{entry['id']}"
+            )
+        return dropbox.files.FileMetadata(
+            name=entry["name"],
+            path_lower=entry["path"].lower(),
+            path_display=entry["path"],
+            id=f"id:{entry['id']}",
+            rev="0123456789abcdef",
+            size=len(entry["data"]),
+            client_modified=self.corpus.modified.replace(tzinfo=None),
+            server_modified=self.corpus.modified.replace(tzinfo=None),
+            content_hash=f"{hash(entry['data']) & 0xffffffff:064x}",
+        )
+
+    def _entries(self, path, recursive):
+        path = path.lower()
+        if recursive:
+            items = [f for f in self.corpus.folders + list(self.corpus.files.values()) if f["path"].lower().startswith(path + "/")]
+        elif not path:
+            items = self.corpus.folders
+        else:
+            folder = self.corpus.by_path.get(path)
+            items = self.corpus.children.get(folder["id"], []) if folder else None
+        if items is None:
+            raise self._not_found(path)
+        return items
+
+    def _page(self, path, start, limit, recursive):
+        items = self._entries(path, recursive)
+        page = items[start:start + limit]
+        end = start + len(page)
+        self.latency.wait()
+        return _ListResult(
+            entries=[self._metadata(f) for f in page],
+            has_more=end < len(items),
+            cursor=f"{path}|{end}|{limit}|{int(recursive)}",
+        )
+
+    def _not_found(self, path):
+        error = dropbox.files.GetMetadataError.path(dropbox.files.LookupError.not_found)
+        return dropbox.exceptions.ApiError("fake", error, None, None)
+
+    def files_list_folder(self, path, recursive=False, limit=None, **kwargs):
+        return self._page(path, 0, min(limit or self.page_cap, self.page_cap), recursive)
+
+    def files_list_folder_continue(self, cursor):
+        path, start, limit, recursive = cursor.split("|")
+        return self._page(path, int(start), int(limit), recursive == "1")
+
+    def files_get_metadata(self, path, **kwargs):
+        self.latency.wait()
+        entry = self.corpus.by_path.get(path.lower())
+        if entry is None:
+            raise self._not_found(path)
+        return self._metadata(entry)
+
+    def files_download(self, path, rev=None, extra_headers=None):
+        entry = self.corpus.by_path.get(path.lower())
+        if entry is None or "data" not in entry:
+            self.latency.wait()
+            raise self._not_found(path)
+
+        data = entry["data"]
+        if extra_headers and "Range" in extra_headers:
+            start, end = _parse_range(extra_headers["Range"], len(data))
+            data = data[start:end + 1]
+
+        self.latency.wait(len(data))
+        return self._metadata(entry), _FakeDownload(data)
+
+    def close(self):
+        pass
+
+
+class _ListResult:
+    def __init__(self, entries, has_more, cursor):
+        self.entries = entries
+        self.has_more = has_more
+        self.cursor = cursor
+
+
+def install(clients, corpus, latency, drive_page_cap=1000, dropbox_page_cap=2000):
+    """
+    Point the process-wide ClientManager at the fakes. Drive still gets one
+    service per thread, like the real manager builds.
+    """
+    http = FakeDriveHttp(corpus, latency, drive_page_cap)
+    dbx = FakeDropbox(corpus, latency, dropbox_page_cap)
+    local = threading.local()
+
+    def drive():
+        service = getattr(local, "service", None)
+        if service is None:
+            service = build("drive", "v3", http=http, cache_discovery=False)
+            local.service = service
+        return service
+
+    clients.drive = drive
+    clients.dropbox = lambda: dbx
+    return http, dbx
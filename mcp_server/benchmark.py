@@ -0,0 +1,314 @@
+"""
+Benchmark the tool functions against simulated Google Drive and Dropbox
+backends (bench_fakes.py), with no credentials or network.
+
+    python benchmark.py
+    python benchmark.py --latency-ms 100 --files-per-folder 1000 --docx-paragraphs 50 500
+    python benchmark.py --compare benchmark_results/<earlier run>.json
+
+Each scenario reports p50/p99 latency, throughput and peak RSS, and the
+whole run is written as JSON (with the git commit) so runs can be
+compared across commits.
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", default="google,dropbox", help="comma-separated: google, dropbox, local")
+    parser.add_argument("--only", default="", help="run only scenarios whose name contains this")
+    parser.add_argument("--iterations", type=int, default=50, help="calls per scenario")
+    parser.add_argument("--concurrency", type=int, default=4, help="calls in flight at once")
+    parser.add_argument("--warmup", type=int, default=2, help="untimed calls before each scenario")
+
+    parser.add_argument("--folders", type=int, default=5)
+    parser.add_argument("--files-per-folder", type=int, default=200)
+    parser.add_argument("--txt-bytes", type=int, default=20000)
+    parser.add_argument("--docx-paragraphs", type=int, nargs="+", default=[50, 500], help="one .docx per size")
+    parser.add_argument("--page-size", type=int, default=25, help="page_size passed to list/search tools")
+    parser.add_argument("--drive-page-cap", type=int, default=1000, help="max files per simulated Drive page")
+    parser.add_argument("--dropbox-page-cap", type=int, default=2000, help="max entries per simulated Dropbox page")
+
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="simulated round trip per request")
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--bandwidth-mb", type=float, default=50.0, help="simulated download speed in MB/s")
+
+    parser.add_argument("--text-cache", action="store_true", help="keep the text and summary cache on")
+    parser.add_argument("--output", default=None, help="JSON path (default: benchmark_results/<time>-<commit>.json)")
+    parser.add_argument("--compare", default=None, help="earlier results JSON to compare against")
+    return parser.parse_args(argv)
+
+
+def configure_environment(args, workdir):
+    """
+    Must run before the tool modules are imported, since they read their
+    settings at import time. The metadata index is off so every call hits
+    the simulated API, and summaries use the offline stub client.
+    """
+    os.environ["METADATA_INDEX_ENABLED"] = "false"
+    os.environ["SUMMARY_CLIENT"] = "stub"
+    os.environ["TEXT_CACHE_ENABLED"] = "true" if args.text_cache else "false"
+    os.environ["TEXT_CACHE_DIR"] = os.path.join(workdir, "text_cache")
+    os.environ["CONTENT_INDEX_PATH"] = os.path.join(workdir, "content_index.sqlite3")
+    os.environ["VECTOR_INDEX_DIR"] = os.path.join(workdir, "vector_index")
+    if "local" in args.backends.split(","):
+        os.environ["LOCAL_ROOT"] = os.path.join(workdir, "local")
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class RssSampler:
+    """
+    Samples the resident set size of this process plus its multiprocessing
+    children (the extraction workers) every few milliseconds, so each
+    scenario gets its own peak. Falls back to this process's lifetime
+    high-water mark from getrusage where /proc is not available.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+    def _rss(self, pid):
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * self._page_size
+
+    def _current(self):
+        try:
+            total = self._rss("self")
+        except OSError:
+            # ru_maxrss is KB on Linux and bytes on macOS.
+            scale = 1 if sys.platform == "darwin" else 1024
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+        for child in multiprocessing.active_children():
+            try:
+                total += self._rss(child.pid)
+            except OSError:
+                # Exited between listing and reading.
+                pass
+        return total
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self._current())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = self._current()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self._current())
+
+
+def tool_ok(output):
+    return isinstance(output, str) and not output.startswith("Invalid backend") and "Error" not in output[:300]
+
+
+def with_hits(call):
+    """
+    Report a search that finds nothing as an error, so a scenario never
+    times an empty result as a success.
+    """
+    def checked():
+        output = call()
+        if "\n- " not in output.split("\nSome searches failed", 1)[0]:
+            return "Error: search returned no results"
+        return output
+    return checked
+
+
+def run_scenario(name, call, iterations, concurrency, warmup, latency):
+    for _ in range(warmup):
+        call()
+
+    def timed(_):
+        started = time.perf_counter()
+        try:
+            ok = tool_ok(call())
+        except Exception:
+            ok = False
+        return time.perf_counter() - started, ok
+
+    requests_before = latency.requests
+    with RssSampler() as rss, ThreadPoolExecutor(max_workers=concurrency) as pool:
+        started = time.perf_counter()
+        outcomes = list(pool.map(timed, range(iterations)))
+        wall = time.perf_counter() - started
+
+    latencies = sorted(seconds * 1000 for seconds, _ in outcomes)
+    return {
+        "name": name,
+        "iterations": iterations,
+        "concurrency": concurrency,
+        "errors": sum(1 for _, ok in outcomes if not ok),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "mean_ms": round(sum(latencies) / len(latencies), 3),
+        "max_ms": round(latencies[-1], 3),
+        "throughput_per_s": round(iterations / wall, 3),
+        "upstream_requests": latency.requests - requests_before,
+        "peak_rss_mb": round(rss.peak / (1024 * 1024), 1),
+    }
+
+
+def build_scenarios(args, corpus, tf):
+    """(name, zero-argument call) pairs for every selected backend."""
+    scenarios = []
+    folder = corpus.folders[0]
+    txt = corpus.sample_file("txt")
+
+    def list_all_pages(backend, **kwargs):
+        output = tf.list_files_fn(backend, page_size=args.page_size, **kwargs)
+        pages = [output]
+        while "cursor='" in output:
+            cursor = output.rsplit("cursor='", 1)[1].split("'", 1)[0]
+            output = tf.list_files_fn(backend, cursor=cursor)
+            pages.append(output)
+        return "\n".join(pages)
+
+    for backend in args.backends.split(","):
+        backend = backend.strip()
+        if backend == "google":
+            location = {"folder_id": folder["id"]}
+            file_arg = lambda f: {"file_id": f["id"]}
+            # With no folder, a Drive search fans out over the top folders.
+            fan_out = lambda: tf.search_files_fn("google", "notes 1", page_size=args.page_size)
+        elif backend in ("dropbox", "local"):
+            location = {"folder_id": folder["path"]}
+            file_arg = lambda f: {"file_path": f["path"]}
+            # A search with no folder only lists the root, which holds no
+            # files, so fan out over the sample folder instead.
+            fan_out = lambda b=backend: tf.search_fan_out([b], "notes 1", folder["path"], None, args.page_size)
+        else:
+            raise SystemExit(f"Unknown backend '{backend}'")
+
+        scenarios += [
+            (f"{backend}.list_files.first_page",
+             lambda b=backend, loc=location: tf.list_files_fn(b, page_size=args.page_size, **loc)),
+            (f"{backend}.list_files.all_pages",
+             lambda b=backend, loc=location: list_all_pages(b, **loc)),
+            (f"{backend}.search_files.folder",
+             with_hits(lambda b=backend, loc=location: tf.search_files_fn(b, "notes 1", page_size=args.page_size, **loc))),
+            (f"{backend}.search_files.fan_out", with_hits(fan_out)),
+            (f"{backend}.get_file.txt",
+             lambda b=backend, a=file_arg(txt): tf.get_file_fn(b, **a)),
+        ]
+
+        for paragraphs in args.docx_paragraphs:
+            docx = corpus.sample_file("docx", paragraphs)
+            scenarios += [
+                (f"{backend}.get_file.docx_{paragraphs}p",
+                 lambda b=backend, a=file_arg(docx): tf.get_file_fn(b, **a)),
+                (f"{backend}.summarize_file.docx_{paragraphs}p",
+                 lambda b=backend, a=file_arg(docx): tf.summarize_file_fn(b, **a)),
+            ]
+
+    return [(name, call) for name, call in scenarios if args.only in name]
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_table(results, baseline=None):
+    base = {r["name"]: r for r in (baseline or {}).get("results", [])}
+    header = f"{'scenario':44} {'p50 ms':>10} {'p99 ms':>10} {'ops/s':>9} {'rss MB':>8} {'err':>4}"
+    print(header)
+    print("-" * len(header))
+
+    for r in results:
+        line = (
+            f"{r['name']:44} {r['p50_ms']:>10.1f} {r['p99_ms']:>10.1f} "
+            f"{r['throughput_per_s']:>9.1f} {r['peak_rss_mb']:>8.1f} {r['errors']:>4}"
+        )
+        old = base.get(r["name"])
+        if old:
+            def change(key):
+                return f"{(r[key] - old[key]) / old[key] * 100:+.0f}%" if old[key] else "n/a"
+            line += f"   vs {baseline['commit']}: p50 {change('p50_ms')}, p99 {change('p99_ms')}, ops/s {change('throughput_per_s')}"
+        print(line)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    workdir = tempfile.mkdtemp(prefix="mcp-bench-")
+    configure_environment(args, workdir)
+
+    # Imported here so the environment above is in place first.
+    import bench_fakes
+    import tool_functions as tf
+    from client_manager import clients
+
+    print("Building corpus...", flush=True)
+    corpus = bench_fakes.Corpus(args.folders, args.files_per_folder, args.txt_bytes, tuple(args.docx_paragraphs))
+    latency = bench_fakes.Latency(args.latency_ms, args.jitter_ms, args.bandwidth_mb)
+    bench_fakes.install(clients, corpus, latency, args.drive_page_cap, args.dropbox_page_cap)
+    if "LOCAL_ROOT" in os.environ:
+        corpus.write_to(os.environ["LOCAL_ROOT"])
+
+    results = []
+    for name, call in build_scenarios(args, corpus, tf):
+        print(f"Running {name}...", flush=True)
+        results.append(run_scenario(name, call, args.iterations, args.concurrency, args.warmup, latency))
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "results": results,
+    }
+
+    output = args.output or os.path.join(
+        "benchmark_results", f"{time.strftime('%Y%m%d-%H%M%S')}-{report['commit']}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    print()
+    print_table(results, baseline)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import os
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+
+from dotenv import load_dotenv
+load_dotenv()
+
+DEFAULT_MAX_CHARS = int(os.getenv("GET_FILE_MAX_CHARS", "20000"))
+CHARS_PER_TOKEN = 4
+MIN_CHUNK_CHARS = 200
+BOUNDARY_CACHE_SIZE = 256
+
+_boundary_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def resolve_max_chars(max_chars=None, max_tokens=None):
+    if max_tokens:
+        return max(MIN_CHUNK_CHARS, int(max_tokens) * CHARS_PER_TOKEN)
+    if max_chars:
+        return max(MIN_CHUNK_CHARS, int(max_chars))
+    return DEFAULT_MAX_CHARS
+
+
+def compute_boundaries(text, max_chars):
+    """
+    Return chunk start offsets. Chunks end on paragraph breaks where
+    possible; a paragraph longer than max_chars is split on the last
+    whitespace that fits, or hard at max_chars if there is none.
+    """
+    starts = [0]
+    start = 0
+    length = len(text)
+
+    while length - start > max_chars:
+        limit = start + max_chars
+        # The chunk runs up to and including the separator, so the
+        # separator itself must sit before `limit`.
+        cut = text.rfind("\n", start + 1, limit)
+        if cut == -1:
+            cut = text.rfind(" ", start + 1, limit)
+        cut = limit if cut == -1 else cut + 1
+
+        starts.append(cut)
+        start = cut
+
+    return starts
+
+
+def get_boundaries(text, max_chars, key=None):
+    """
+    compute_boundaries, cached by `key`: the (backend, file_id, version)
+    identity of the text. Without a key the boundaries are just computed.
+    """
+    if key is None:
+        return compute_boundaries(text, max_chars)
+    key = (key, max_chars)
+
+    with _cache_lock:
+        starts = _boundary_cache.get(key)
+        if starts is not None:
+            _boundary_cache.move_to_end(key)
+            return starts
+
+    starts = compute_boundaries(text, max_chars)
+
+    with _cache_lock:
+        _boundary_cache[key] = starts
+        while len(_boundary_cache) > BOUNDARY_CACHE_SIZE:
+            _boundary_cache.popitem(last=False)
+
+    return starts
+
+
+def get_chunk(text, offset=0, max_chars=None, max_tokens=None, key=None):
+    """
+    Return (chunk, info) for the chunk containing `offset`. info holds the
+    chunk's start/end offsets, its index, the chunk count, the total length
+    and next_offset (None on the last chunk). `key` identifies the file
+    version, for the boundary cache.
+    """
+    max_chars = resolve_max_chars(max_chars, max_tokens)
+    starts = get_boundaries(text, max_chars, key)
+    total = len(text)
+    offset = max(0, min(int(offset or 0), total))
+
+    index = max(0, bisect_right(starts, offset) - 1)
+    end = starts[index + 1] if index + 1 < len(starts) else total
+
+    return text[offset:end], {
+        "start": offset,
+        "end": end,
+        "index": index,
+        "count": len(starts),
+        "total": total,
+        "next_offset": end if end < total else None,
+    }
+
+
+def format_chunk_header(info):
+    if info["count"] == 1 and info["start"] == 0:
+        return ""
+
+    header = (
+        f"[Characters {info['start']}-{info['end']} of {info['total']} "
+        f"(chunk {info['index'] + 1} of {info['count']})."
+    )
+    if info["next_offset"] is not None:
+        header += f" Call again with offset={info['next_offset']} to continue.]"
+    else:
+        header += " End of file.]"
+    return header + "\n"
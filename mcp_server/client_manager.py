@@ -0,0 +1,202 @@
+import copy
+import os
+import pickle
+import threading
+from datetime import datetime, timedelta, timezone
+
+import dropbox
+import httplib2
+from google.auth.transport.requests import Request
+from google_auth_oauthlib.flow import InstalledAppFlow
+from googleapiclient.discovery import build
+
+from rate_limit import RateLimitedHttp, RateLimitedDropbox, credential_key
+from local_utils import LOCAL_ROOT
+
+from dotenv import load_dotenv
+load_dotenv()
+
+SCOPES = ["https://www.googleapis.com/auth/drive.readonly"]
+
+TOKEN_PATH = "token.pickle"
+CREDENTIALS_PATH = "credentials.json"
+
+DROPBOX_ACCESS_TOKEN = os.getenv("DROPBOX_ACCESS_TOKEN", "").strip()
+DROPBOX_REFRESH_TOKEN = os.getenv("DROPBOX_REFRESH_TOKEN", "").strip()
+DROPBOX_APP_KEY = os.getenv("DROPBOX_APP_KEY", "").strip()
+DROPBOX_APP_SECRET = os.getenv("DROPBOX_APP_SECRET", "").strip()
+
+REFRESH_MARGIN_SECONDS = int(os.getenv("CREDENTIAL_REFRESH_MARGIN_SECONDS", "300"))
+REFRESH_CHECK_INTERVAL_SECONDS = int(os.getenv("CREDENTIAL_REFRESH_CHECK_INTERVAL_SECONDS", "60"))
+DROPBOX_MAX_CONNECTIONS = int(os.getenv("DROPBOX_MAX_CONNECTIONS", "16"))
+
+
+class ClientManager:
+    """
+    Process-wide holder for authenticated Drive and Dropbox clients.
+
+    Credentials are loaded once and kept fresh by a background thread.
+    Dropbox shares a single client over a pooled requests session. The
+    Drive client wraps httplib2, which is not thread-safe, so each worker
+    thread gets its own Drive service built on the shared credentials.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._drive_creds = None
+        self._drive_generation = 0
+        self._dbx = None
+        self._refresher = None
+        self._stop = threading.Event()
+
+    def drive(self):
+        with self._lock:
+            if self._drive_creds is None:
+                self._drive_creds = self._load_drive_credentials()
+                self._drive_generation += 1
+                self._start_refresher()
+            creds = self._drive_creds
+            generation = self._drive_generation
+
+        service = getattr(self._local, "drive_service", None)
+        if service is None or getattr(self._local, "drive_generation", None) != generation:
+            http = RateLimitedHttp(creds, self.credential_id("google"), http=httplib2.Http())
+            service = build("drive", "v3", http=http, cache_discovery=False)
+            self._local.drive_service = service
+            self._local.drive_generation = generation
+
+        return service
+
+    def dropbox(self):
+        with self._lock:
+            if self._dbx is None:
+                self._dbx = self._create_dropbox_client()
+                self._start_refresher()
+            return self._dbx
+
+    def credential_id(self, backend):
+        """
+        Stable id for the credential a backend's calls run under. Known from
+        configuration alone, so it can be used before any client is built.
+        """
+        if backend == "google":
+            return credential_key("google", os.path.abspath(TOKEN_PATH))
+        if backend == "local":
+            return credential_key("local", os.path.realpath(LOCAL_ROOT) if LOCAL_ROOT else "")
+        return credential_key("dropbox", DROPBOX_APP_KEY, DROPBOX_REFRESH_TOKEN or DROPBOX_ACCESS_TOKEN)
+
+    def reset(self):
+        """
+        Drop the current clients so the next call builds fresh ones. Calls
+        already running keep the old Dropbox client they hold; it is not
+        closed here, and its pooled connections go once the last of them
+        releases it.
+        """
+        with self._lock:
+            self._drive_creds = None
+            self._drive_generation += 1
+            dbx, self._dbx = self._dbx, None
+        return dbx
+
+    def shutdown(self):
+        self._stop.set()
+        dbx = self.reset()
+        if dbx is not None:
+            dbx.close()
+
+    def _load_drive_credentials(self):
+        creds = None
+
+        if os.path.exists(TOKEN_PATH):
+            with open(TOKEN_PATH, "rb") as token:
+                creds = pickle.load(token)
+
+        if not creds or not creds.valid:
+            if creds and creds.expired and creds.refresh_token:
+                creds.refresh(Request())
+            else:
+                flow = InstalledAppFlow.from_client_secrets_file(CREDENTIALS_PATH, SCOPES)
+                creds = flow.run_local_server(port=0)
+            self._save_drive_credentials(creds)
+
+        return creds
+
+    def _save_drive_credentials(self, creds):
+        with open(TOKEN_PATH, "wb") as token:
+            pickle.dump(creds, token)
+
+    def _create_dropbox_client(self):
+        has_refresh = DROPBOX_REFRESH_TOKEN and DROPBOX_APP_KEY
+
+        if not DROPBOX_ACCESS_TOKEN and not has_refresh:
+            raise RuntimeError(
+                "DROPBOX_ACCESS_TOKEN is missing. Add it to mcp_server/.env"
+            )
+
+        try:
+            session = dropbox.create_session(max_connections=DROPBOX_MAX_CONNECTIONS)
+            credential = self.credential_id("dropbox")
+            if has_refresh:
+                return RateLimitedDropbox(
+                    oauth2_access_token=DROPBOX_ACCESS_TOKEN or None,
+                    oauth2_refresh_token=DROPBOX_REFRESH_TOKEN,
+                    app_key=DROPBOX_APP_KEY,
+                    app_secret=DROPBOX_APP_SECRET or None,
+                    session=session,
+                    credential=credential,
+                )
+            return RateLimitedDropbox(DROPBOX_ACCESS_TOKEN, session=session, credential=credential)
+        except Exception as e:
+            raise RuntimeError(f"Error creating Dropbox client: {e}")
+
+    def _start_refresher(self):
+        if self._refresher is not None and self._refresher.is_alive():
+            return
+
+        self._refresher = threading.Thread(
+            target=self._refresh_loop,
+            name="credential-refresher",
+            daemon=True,
+        )
+        self._refresher.start()
+
+    def _refresh_loop(self):
+        while not self._stop.wait(REFRESH_CHECK_INTERVAL_SECONDS):
+            try:
+                self.refresh_if_needed()
+            except Exception as e:
+                print(f"Error refreshing credentials: {e}")
+
+    def refresh_if_needed(self):
+        margin = timedelta(seconds=REFRESH_MARGIN_SECONDS)
+
+        with self._lock:
+            creds = self._drive_creds
+            dbx = self._dbx
+
+        if creds is not None and creds.refresh_token:
+            expiry = creds.expiry
+            if expiry is not None and expiry - _utc_now_like(expiry) <= margin:
+                # Refresh a copy without the lock, so callers are not held
+                # up by the token request; the lock only covers the swap.
+                # Threads rebuild their Drive service on the new generation.
+                fresh = copy.copy(creds)
+                fresh.refresh(Request())
+                self._save_drive_credentials(fresh)
+                with self._lock:
+                    if self._drive_creds is creds:
+                        self._drive_creds = fresh
+                        self._drive_generation += 1
+
+        if dbx is not None and DROPBOX_REFRESH_TOKEN:
+            dbx.check_and_refresh_access_token()
+
+
+def _utc_now_like(value):
+    """Current UTC time, naive if `value` is (google-auth stores expiry as naive UTC)."""
+    now = datetime.now(timezone.utc)
+    return now.replace(tzinfo=None) if value.tzinfo is None else now
+
+
+clients = ClientManager()
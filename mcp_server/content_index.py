@@ -0,0 +1,288 @@
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+from extractors import is_supported
+
+from dotenv import load_dotenv
+load_dotenv()
+
+CONTENT_INDEX_PATH = os.getenv("CONTENT_INDEX_PATH", "content_index.sqlite3")
+CONTENT_INDEX_REFRESH_SECONDS = float(os.getenv("CONTENT_INDEX_REFRESH_SECONDS", "300"))
+CONTENT_INDEX_MAX_CHARS = int(os.getenv("CONTENT_INDEX_MAX_CHARS", "2000000"))
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+SNIPPET_CHARS = 200
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or that the "
+    "this to was were will with".split()
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    doc_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    backend TEXT NOT NULL,
+    file_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    version TEXT,
+    length INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    UNIQUE (backend, file_id)
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    doc_id INTEGER NOT NULL,
+    tf INTEGER NOT NULL,
+    PRIMARY KEY (term, doc_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_postings_doc ON postings (doc_id);
+CREATE TABLE IF NOT EXISTS failed (
+    backend TEXT NOT NULL,
+    file_id TEXT NOT NULL,
+    version TEXT,
+    PRIMARY KEY (backend, file_id)
+) WITHOUT ROWID;
+"""
+
+
+def tokenize(text):
+    return [t for t in _TOKEN_RE.findall(text.lower()) if len(t) > 1 and t not in _STOPWORDS]
+
+
+def is_indexable(name, mime_type=None):
+    return is_supported(name, mime_type)
+
+
+def make_snippet(text, terms):
+    lowered = text.lower()
+    positions = [lowered.find(t) for t in terms]
+    positions = [p for p in positions if p >= 0]
+    start = max(0, min(positions) - SNIPPET_CHARS // 2) if positions else 0
+
+    snippet = " ".join(text[start:start + SNIPPET_CHARS].split())
+    if start > 0:
+        snippet = "..." + snippet
+    if start + SNIPPET_CHARS < len(text):
+        snippet += "..."
+    return snippet
+
+
+class ContentIndex:
+    """
+    Inverted index over extracted file text with BM25 ranking.
+
+    Files to index are enumerated from the metadata mirror, so the content
+    index covers every backend the mirror does. A refresh only re-reads
+    files whose modified time changed and drops files that disappeared.
+    A file that could not be read (too large, unparseable) is recorded as
+    failed at its version and skipped until it changes.
+    Refreshes run in a background thread; searches always answer from
+    whatever has been indexed so far.
+    """
+
+    def __init__(self, path=CONTENT_INDEX_PATH, refresh_seconds=CONTENT_INDEX_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._db_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._last_refresh = {}
+        self._refresh_thread = None
+
+        with self._db_lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+            self._conn.commit()
+
+    @property
+    def refreshing(self):
+        return self._refresh_thread is not None and self._refresh_thread.is_alive()
+
+    def refresh_in_background(self, backends, metadata_index, read_text):
+        """
+        Start a refresh of any backend not refreshed in the last
+        `refresh_seconds`. `read_text(backend, file_id)` returns the
+        extracted text, or None if the file cannot be read.
+        """
+        now = time.time()
+        due = [b for b in backends if now - self._last_refresh.get(b, 0) > self.refresh_seconds]
+
+        with self._refresh_lock:
+            if not due or self.refreshing:
+                return
+            self._refresh_thread = threading.Thread(
+                target=self._refresh,
+                args=(due, metadata_index, read_text),
+                name="content-index-refresh",
+                daemon=True,
+            )
+            self._refresh_thread.start()
+
+    def _refresh(self, backends, metadata_index, read_text):
+        for backend in backends:
+            try:
+                if self.refresh_backend(backend, metadata_index, read_text):
+                    self._last_refresh[backend] = time.time()
+            except Exception as e:
+                print(f"Error refreshing {backend} content index: {e}")
+
+    def refresh_backend(self, backend, metadata_index, read_text):
+        if not metadata_index.ensure_fresh(backend):
+            return False
+
+        current = {
+            row["id"]: row
+            for row in metadata_index.all_files(backend)
+            if is_indexable(row["name"], row["mime_type"])
+        }
+        indexed = {
+            row["file_id"]: row["version"]
+            for row in self._query("SELECT file_id, version FROM docs WHERE backend = ?", (backend,))
+        }
+        failed = {
+            row["file_id"]: row["version"]
+            for row in self._query("SELECT file_id, version FROM failed WHERE backend = ?", (backend,))
+        }
+
+        for file_id in (indexed.keys() | failed.keys()) - current.keys():
+            self.remove(backend, file_id)
+
+        for file_id, row in current.items():
+            version = row["modified_time"]
+            if file_id in indexed and indexed[file_id] == version:
+                continue
+            if file_id in failed and failed[file_id] == version:
+                continue
+            try:
+                text = read_text(backend, file_id)
+            except Exception as e:
+                # Unexpected errors may be transient; retried next refresh.
+                print(f"Error indexing {backend} file {file_id}: {e}")
+                continue
+            if text is None:
+                self.mark_failed(backend, file_id, version)
+            else:
+                self.add(backend, file_id, row["name"], version, text)
+
+        return True
+
+    def add(self, backend, file_id, name, version, text):
+        text = text[:CONTENT_INDEX_MAX_CHARS]
+        counts = Counter(tokenize(text))
+        length = sum(counts.values())
+
+        with self._db_lock:
+            with self._conn:
+                self._delete_locked(backend, file_id)
+                cur = self._conn.execute(
+                    "INSERT INTO docs (backend, file_id, name, version, length, text) VALUES (?, ?, ?, ?, ?, ?)",
+                    (backend, file_id, name, version, length, text),
+                )
+                doc_id = cur.lastrowid
+                self._conn.executemany(
+                    "INSERT INTO postings (term, doc_id, tf) VALUES (?, ?, ?)",
+                    [(term, doc_id, tf) for term, tf in counts.items()],
+                )
+
+    def mark_failed(self, backend, file_id, version):
+        with self._db_lock:
+            with self._conn:
+                self._delete_locked(backend, file_id)
+                self._conn.execute(
+                    "INSERT INTO failed (backend, file_id, version) VALUES (?, ?, ?)",
+                    (backend, file_id, version),
+                )
+
+    def remove(self, backend, file_id):
+        with self._db_lock:
+            with self._conn:
+                self._delete_locked(backend, file_id)
+
+    def search(self, query, backends, limit=10):
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+
+        placeholders = ", ".join("?" for _ in backends)
+        stats = self._query(
+            f"SELECT COUNT(*) AS n, AVG(length) AS avgdl FROM docs WHERE backend IN ({placeholders})",
+            list(backends),
+        )[0]
+        n_docs, avgdl = stats["n"], stats["avgdl"] or 1.0
+        if not n_docs:
+            return []
+
+        scores = {}
+
+        for term in terms:
+            rows = self._query(
+                "SELECT p.doc_id, p.tf, d.length FROM postings p JOIN docs d ON d.doc_id = p.doc_id "
+                f"WHERE p.term = ? AND d.backend IN ({placeholders})",
+                [term] + list(backends),
+            )
+            df = len(rows)
+            if not df:
+                continue
+
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            for row in rows:
+                tf = row["tf"]
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * row["length"] / avgdl)
+                scores[row["doc_id"]] = scores.get(row["doc_id"], 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+        results = []
+
+        for doc_id, score in ranked:
+            doc = self._query("SELECT backend, file_id, name, text FROM docs WHERE doc_id = ?", (doc_id,))[0]
+            results.append({
+                "backend": doc["backend"],
+                "file_id": doc["file_id"],
+                "name": doc["name"],
+                "score": score,
+                "snippet": make_snippet(doc["text"], terms),
+            })
+
+        return results
+
+    def snippet(self, backend, file_id, query):
+        rows = self._query("SELECT text FROM docs WHERE backend = ? AND file_id = ?", (backend, file_id))
+        return make_snippet(rows[0]["text"], tokenize(query)) if rows else ""
+
+    def signature(self):
+        """Changes whenever a document is added, replaced or removed."""
+        row = self._query("SELECT COUNT(*) AS n, MAX(doc_id) AS last_id FROM docs", ())[0]
+        return row["n"], row["last_id"]
+
+    def documents(self):
+        return self._query("SELECT doc_id, backend, file_id, name FROM docs ORDER BY doc_id", ())
+
+    def postings(self):
+        return self._query("SELECT term, doc_id, tf FROM postings", ())
+
+    def doc_count(self, backends):
+        placeholders = ", ".join("?" for _ in backends)
+        return self._query(f"SELECT COUNT(*) AS n FROM docs WHERE backend IN ({placeholders})", list(backends))[0]["n"]
+
+    def _delete_locked(self, backend, file_id):
+        rows = self._conn.execute(
+            "SELECT doc_id FROM docs WHERE backend = ? AND file_id = ?", (backend, file_id)
+        ).fetchall()
+        for row in rows:
+            self._conn.execute("DELETE FROM postings WHERE doc_id = ?", (row["doc_id"],))
+            self._conn.execute("DELETE FROM docs WHERE doc_id = ?", (row["doc_id"],))
+        self._conn.execute("DELETE FROM failed WHERE backend = ? AND file_id = ?", (backend, file_id))
+
+    def _query(self, sql, params):
+        with self._db_lock:
+            return self._conn.execute(sql, params).fetchall()
+
+
+content_index = ContentIndex()
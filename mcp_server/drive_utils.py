@@ -1,36 +1,23 @@
-from googleapiclient.discovery import build
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-import os, pickle
+import time
 
-SCOPES = ["https://www.googleapis.com/auth/drive.readonly"]
+from client_manager import clients
+from rate_limit import rate_limiter, drive_error_retry_hint, backoff_delay
+from folder_index import folder_index, FolderMatch, FOLDER_INDEX_TTL_SECONDS
 
 _TARGET_FOLDERS = None
+_TARGET_FOLDERS_FETCHED_AT = 0.0
 
-def get_drive_service():
-    creds = None
-    token_path = "token.pickle"
-
-    if os.path.exists(token_path):
-        with open(token_path, "rb") as token:
-            creds = pickle.load(token)
-
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            flow = InstalledAppFlow.from_client_secrets_file("credentials.json", SCOPES)
-            creds = flow.run_local_server(port=0)
-        with open(token_path, "wb") as token:
-            pickle.dump(creds, token)
+FILE_FIELDS = "id,name,mimeType,modifiedTime,md5Checksum,size"
+MAX_BATCH_SIZE = 100
 
-    return build("drive", "v3", credentials=creds)
+def get_drive_service():
+    return clients.drive()
 
 
 def get_first_5_folders(service):
-    global _TARGET_FOLDERS
-    
-    if _TARGET_FOLDERS is not None:
+    global _TARGET_FOLDERS, _TARGET_FOLDERS_FETCHED_AT
+
+    if _TARGET_FOLDERS is not None and time.time() - _TARGET_FOLDERS_FETCHED_AT < FOLDER_INDEX_TTL_SECONDS:
         return [folder["id"] for folder in _TARGET_FOLDERS]
     
     try:
@@ -43,6 +30,7 @@ def get_first_5_folders(service):
         
         folders = results.get("files", [])
         _TARGET_FOLDERS = [{"id": folder["id"], "name": folder.get("name", "Unknown")} for folder in folders]
+        _TARGET_FOLDERS_FETCHED_AT = time.time()
         
         return [folder["id"] for folder in _TARGET_FOLDERS]
     except Exception as e:
@@ -51,9 +39,7 @@ def get_first_5_folders(service):
 
 
 def get_first_5_folders_with_names(service):
-    global _TARGET_FOLDERS
-    
-    if _TARGET_FOLDERS is not None:
+    if _TARGET_FOLDERS is not None and time.time() - _TARGET_FOLDERS_FETCHED_AT < FOLDER_INDEX_TTL_SECONDS:
         return _TARGET_FOLDERS
     
     get_first_5_folders(service)
@@ -61,14 +47,54 @@ def get_first_5_folders_with_names(service):
 
 
 def find_folder_by_name(service, folder_name):
+    try:
+        return folder_index.resolve("google", folder_name)
+    except Exception as e:
+        print(f"Error resolving folder from folder index: {e}")
+
     try:
         folders = get_first_5_folders_with_names(service)
         for folder in folders:
             if folder.get("name", "").lower() == folder_name.lower():
-                return folder["id"]
+                return FolderMatch(folder["id"], folder["name"], True)
 
         return None
 
     except Exception as e:
         print(f"Error finding folder by name: {e}")
         return None
+
+
+def get_files_metadata(service, file_ids, fields=FILE_FIELDS):
+    """
+    Fetch metadata for many files with one batch request per MAX_BATCH_SIZE
+    ids. Sub-requests that were rate limited are batched again after a
+    backoff. Returns {file_id: metadata dict or the exception for that id}.
+    """
+    results = {}
+    pending = list(dict.fromkeys(file_ids))
+
+    def callback(request_id, response, exception):
+        results[request_id] = exception if exception is not None else response
+
+    for attempt in range(rate_limiter.max_retries + 1):
+        for start in range(0, len(pending), MAX_BATCH_SIZE):
+            batch = service.new_batch_http_request(callback=callback)
+            for file_id in pending[start:start + MAX_BATCH_SIZE]:
+                batch.add(service.files().get(fileId=file_id, fields=fields), request_id=file_id)
+            batch.execute()
+
+        throttled = [
+            file_id for file_id in pending
+            if isinstance(results[file_id], Exception) and drive_error_retry_hint(results[file_id]) is not None
+        ]
+        if not throttled or attempt == rate_limiter.max_retries:
+            break
+
+        rate_limiter.count("google", "throttled", len(throttled))
+        rate_limiter.count("google", "retries", len(throttled))
+        hint = max(drive_error_retry_hint(results[file_id]) for file_id in throttled)
+        time.sleep(backoff_delay(attempt, hint))
+        pending = throttled
+
+    return results
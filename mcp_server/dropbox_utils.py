@@ -1,43 +1,35 @@
-import os
-import dropbox
+import time
 
-from dotenv import load_dotenv
-load_dotenv()
+import dropbox
 
-DROPBOX_ACCESS_TOKEN = os.getenv("DROPBOX_ACCESS_TOKEN", "").strip()
+from client_manager import clients
+from fanout import run_concurrently
+from folder_index import folder_index, FolderMatch, FOLDER_INDEX_TTL_SECONDS
 
 _TARGET_FOLDERS = None
+_TARGET_FOLDERS_FETCHED_AT = 0.0
 
 
 def get_dropbox_client():
-    if not DROPBOX_ACCESS_TOKEN:
-        raise RuntimeError(
-            "DROPBOX_ACCESS_TOKEN is missing. Add it to mcp_server/.env"
-        )
-    try:
-        return dropbox.Dropbox(DROPBOX_ACCESS_TOKEN)
-    except Exception as e:
-        raise RuntimeError(f"Error creating Dropbox client: {e}")
+    return clients.dropbox()
 
 
 def get_first_5_folders(dbx):
-    global _TARGET_FOLDERS
+    global _TARGET_FOLDERS, _TARGET_FOLDERS_FETCHED_AT
 
-    if _TARGET_FOLDERS is not None:
+    if _TARGET_FOLDERS is not None and time.time() - _TARGET_FOLDERS_FETCHED_AT < FOLDER_INDEX_TTL_SECONDS:
         return [folder["id"] for folder in _TARGET_FOLDERS]
 
     try:
-        _TARGET_FOLDERS = []
         result = dbx.files_list_folder(path="", recursive=False)
 
-        for entry in result.entries:
-            if isinstance(entry, dropbox.files.FolderMetadata):
-                _TARGET_FOLDERS.append({
-                    "id": entry.path_lower,
-                    "name": entry.name
-                })
-                if len(_TARGET_FOLDERS) >= 5:
-                    break
+        folders = [
+            {"id": entry.path_lower, "name": entry.name}
+            for entry in result.entries
+            if isinstance(entry, dropbox.files.FolderMetadata)
+        ][:5]
+        _TARGET_FOLDERS = folders
+        _TARGET_FOLDERS_FETCHED_AT = time.time()
 
         return [folder["id"] for folder in _TARGET_FOLDERS]
 
@@ -47,9 +39,7 @@ def get_first_5_folders(dbx):
 
 
 def get_first_5_folders_with_names(dbx):
-    global _TARGET_FOLDERS
-
-    if _TARGET_FOLDERS is not None:
+    if _TARGET_FOLDERS is not None and time.time() - _TARGET_FOLDERS_FETCHED_AT < FOLDER_INDEX_TTL_SECONDS:
         return _TARGET_FOLDERS
 
     get_first_5_folders(dbx)
@@ -61,6 +51,11 @@ def find_folder_by_name(dbx, name):
     normalized_path = name if name.startswith("/") else f"/{name}"
     normalized_path = normalized_path.lower()
 
+    try:
+        return folder_index.resolve("dropbox", name)
+    except Exception as e:
+        print(f"Error resolving folder from folder index: {e}")
+
     try:
         result = dbx.files_list_folder("", recursive=False)
     except Exception:
@@ -72,6 +67,20 @@ def find_folder_by_name(dbx, name):
                 entry.name.lower() == normalized
                 or entry.path_lower == normalized_path
             ):
-                return entry.path_lower
-
-    return None
\ No newline at end of file
+                return FolderMatch(entry.path_lower, entry.name, True)
+
+    return None
+
+
+def get_files_metadata(dbx, paths):
+    """
+    Fetch metadata for many paths concurrently. Dropbox has no batch
+    metadata endpoint, so this runs one call per path on the fan-out pool.
+    Returns {path: metadata or the exception for that path}.
+    """
+    unique_paths = list(dict.fromkeys(paths))
+    outcomes = run_concurrently([("dropbox", dbx.files_get_metadata, (path,)) for path in unique_paths])
+    return {
+        path: error if error is not None else result
+        for path, (result, error) in zip(unique_paths, outcomes)
+    }
@@ -0,0 +1,391 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+from html.parser import HTMLParser
+
+from streaming import decode_text
+
+from dotenv import load_dotenv
+load_dotenv()
+
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", str(os.cpu_count() or 1)))
+EXTRACT_TIMEOUT_SECONDS = float(os.getenv("EXTRACT_TIMEOUT_SECONDS", "60"))
+EXTRACT_MEMORY_MB = int(os.getenv("EXTRACT_MEMORY_MB", "1024"))
+EXTRACT_START_SECONDS = float(os.getenv("EXTRACT_START_SECONDS", "30"))
+EXTRACT_TASKS_PER_WORKER = 50
+SPILL_CHUNK_BYTES = 1024 * 1024
+
+# Google-native files have no bytes of their own; they are exported to one
+# of these formats and extracted as that.
+GOOGLE_EXPORTS = {
+    "application/vnd.google-apps.document": "text/plain",
+    "application/vnd.google-apps.spreadsheet": "text/csv",
+    "application/vnd.google-apps.presentation": "text/plain",
+}
+
+Extractor = namedtuple("Extractor", ["name", "fn", "in_pool", "prefix_ok", "preview"])
+
+_by_name = {}
+_by_extension = {}
+_by_mime = {}
+
+
+class ExtractionError(Exception):
+    pass
+
+
+def register(name, extensions=(), mime_types=(), in_pool=True, prefix_ok=False, preview=None):
+    """
+    Register `fn(fileobj) -> str` as the extractor for the given extensions
+    and mime types. Extractors with in_pool=True run in the worker process
+    pool; cheap ones (plain text) run inline on the spooled download.
+
+    prefix_ok marks formats that can be read from the first bytes of a file
+    alone. `preview(fileobj, max_chars) -> str` is an optional cheaper
+    extraction that stops once it has max_chars characters.
+    """
+    def decorator(fn):
+        extractor = Extractor(name, fn, in_pool, prefix_ok, preview)
+        _by_name[name] = extractor
+        for ext in extensions:
+            _by_extension[ext] = extractor
+        for mime in mime_types:
+            _by_mime[mime] = extractor
+        return fn
+    return decorator
+
+
+def resolve(name, mime_type=None):
+    """
+    Return (extractor, export_mime) for a file, or (None, None) if no
+    extractor handles it. export_mime is set for Google-native files.
+    """
+    export_mime = GOOGLE_EXPORTS.get(mime_type)
+    if export_mime:
+        return _by_mime[export_mime], export_mime
+
+    if mime_type in _by_mime:
+        return _by_mime[mime_type], None
+
+    ext = os.path.splitext(name or "")[1].lower()
+    return _by_extension.get(ext), None
+
+
+def is_supported(name, mime_type=None):
+    return resolve(name, mime_type)[0] is not None
+
+
+def supported_extensions():
+    return sorted(_by_extension)
+
+
+@register(
+    "text",
+    extensions=(".txt", ".md", ".csv"),
+    mime_types=("text/plain", "text/markdown", "text/csv"),
+    in_pool=False,
+    prefix_ok=True,
+)
+def extract_text(fileobj):
+    return decode_text(fileobj)
+
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+def preview_docx(fileobj, max_chars):
+    """Stream paragraphs out of word/document.xml and stop at max_chars."""
+    import zipfile
+    from xml.etree.ElementTree import iterparse
+
+    paragraphs = []
+    total = 0
+
+    with zipfile.ZipFile(fileobj) as archive, archive.open("word/document.xml") as xml:
+        for _, element in iterparse(xml):
+            if element.tag != f"{_W}p":
+                continue
+            text = "".join(t.text or "" for t in element.iter(f"{_W}t"))
+            element.clear()
+            paragraphs.append(text)
+            total += len(text) + 1
+            if total >= max_chars:
+                break
+
+    return "\n".join(paragraphs)
+
+
+@register(
+    "docx",
+    extensions=(".docx",),
+    mime_types=("application/vnd.openxmlformats-officedocument.wordprocessingml.document",),
+    preview=preview_docx,
+)
+def extract_docx(fileobj):
+    from docx import Document
+
+    doc = Document(fileobj)
+    return "\n".join(p.text for p in doc.paragraphs)
+
+
+@register("pdf", extensions=(".pdf",), mime_types=("application/pdf",))
+def extract_pdf(fileobj):
+    from pypdf import PdfReader
+
+    reader = PdfReader(fileobj)
+    return "\n\n".join((page.extract_text() or "").strip() for page in reader.pages)
+
+
+@register(
+    "xlsx",
+    extensions=(".xlsx",),
+    mime_types=("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",),
+)
+def extract_xlsx(fileobj):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    sections = []
+
+    for sheet in workbook.worksheets:
+        rows = [
+            "\t".join("" if cell is None else str(cell) for cell in row)
+            for row in sheet.iter_rows(values_only=True)
+            if any(cell is not None for cell in row)
+        ]
+        sections.append(f"## Sheet: {sheet.title}\n" + "\n".join(rows))
+
+    workbook.close()
+    return "\n\n".join(sections)
+
+
+@register(
+    "pptx",
+    extensions=(".pptx",),
+    mime_types=("application/vnd.openxmlformats-officedocument.presentationml.presentation",),
+)
+def extract_pptx(fileobj):
+    from pptx import Presentation
+
+    presentation = Presentation(fileobj)
+    sections = []
+
+    for number, slide in enumerate(presentation.slides, start=1):
+        texts = [
+            shape.text_frame.text
+            for shape in slide.shapes
+            if shape.has_text_frame and shape.text_frame.text.strip()
+        ]
+        sections.append(f"## Slide {number}\n" + "\n".join(texts))
+
+    return "\n\n".join(sections)
+
+
+class _HTMLText(HTMLParser):
+    SKIP = {"script", "style", "noscript", "template"}
+    BLOCK = {"p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6", "section", "article", "table"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP:
+            self.skipping += 1
+        elif tag in self.BLOCK:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP and self.skipping:
+            self.skipping -= 1
+        elif tag in self.BLOCK:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self.skipping:
+            self.parts.append(data)
+
+    def text(self):
+        lines = (" ".join(line.split()) for line in "".join(self.parts).splitlines())
+        return "\n".join(line for line in lines if line)
+
+
+@register("html", extensions=(".html", ".htm"), mime_types=("text/html",), prefix_ok=True)
+def extract_html(fileobj):
+    parser = _HTMLText()
+    parser.feed(decode_text(fileobj))
+    parser.close()
+    return parser.text()
+
+
+def _limit_memory(megabytes):
+    try:
+        import resource
+    except ImportError:
+        return
+    limit = megabytes * 1024 * 1024
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+def _worker_main(conn, memory_mb):
+    """
+    Extraction worker loop: receive (extractor name, file path), report that
+    the job started, then send back ("ok", text) or ("error", exception).
+    """
+    _limit_memory(memory_mb)
+    while True:
+        try:
+            name, path = conn.recv()
+        except EOFError:
+            return
+        conn.send(("started", None))
+        try:
+            with open(path, "rb") as f:
+                result = ("ok", _by_name[name].fn(f))
+        except Exception as e:
+            result = ("error", e)
+        try:
+            conn.send(result)
+        except Exception:
+            # The exception itself would not pickle.
+            conn.send(("error", ExtractionError(f"{type(result[1]).__name__}: {result[1]}")))
+
+
+class _Worker:
+    """One spawned extraction process and the pipe to it."""
+
+    def __init__(self, context, memory_mb):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, memory_mb), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+
+    def call(self, name, path, timeout):
+        """
+        Run one job. The timeout starts once the worker has picked the job
+        up, so spawning the process does not count against it; starting is
+        bounded separately by EXTRACT_START_SECONDS. Raises TimeoutError, or
+        EOFError/OSError if the worker died.
+        """
+        self.jobs += 1
+        self.conn.send((name, path))
+        if not self.conn.poll(EXTRACT_START_SECONDS):
+            raise TimeoutError(f"extraction worker did not start within {EXTRACT_START_SECONDS:g}s")
+        self.conn.recv()
+        if not self.conn.poll(timeout):
+            raise TimeoutError(f"extraction timed out after {timeout:g}s")
+        return self.conn.recv()
+
+    def stop(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class ExtractionPool:
+    """
+    Process pool for CPU-heavy parsing, so extraction uses every core and a
+    slow parse never holds the GIL for request threads. Workers are spawned
+    (not forked from the threaded server), capped at EXTRACT_MEMORY_MB of
+    address space, and recycled every EXTRACT_TASKS_PER_WORKER jobs.
+
+    Jobs get the path of a file to parse rather than its bytes, so a large
+    download is never held in memory or pickled. Each job has a worker to
+    itself: waiting for a free worker does not count against
+    EXTRACT_TIMEOUT_SECONDS, and a job that overruns it gets only its own
+    worker killed, since a stuck parse cannot be interrupted any other way.
+    """
+
+    def __init__(self, workers=EXTRACT_WORKERS, timeout=EXTRACT_TIMEOUT_SECONDS, memory_mb=EXTRACT_MEMORY_MB):
+        self.workers = workers
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self._context = multiprocessing.get_context("spawn")
+        self._slots = threading.BoundedSemaphore(workers)
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _checkout(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return _Worker(self._context, self.memory_mb)
+
+    def _checkin(self, worker):
+        if worker.jobs >= EXTRACT_TASKS_PER_WORKER:
+            worker.stop()
+            return
+        with self._lock:
+            self._idle.append(worker)
+
+    def run(self, name, path):
+        for attempt in range(2):
+            with self._slots:
+                worker = self._checkout()
+                try:
+                    status, value = worker.call(name, path, self.timeout)
+                except TimeoutError as e:
+                    worker.stop()
+                    raise ExtractionError(str(e))
+                except (EOFError, OSError):
+                    # The worker crashed (or was killed by the OS); run once
+                    # more on a fresh one.
+                    worker.stop()
+                    if attempt:
+                        raise ExtractionError("extraction worker crashed")
+                    continue
+                except BaseException:
+                    # E.g. a reply that would not unpickle: the worker's
+                    # state is unknown, so it is not reused.
+                    worker.stop()
+                    raise
+                self._checkin(worker)
+
+            if status == "ok":
+                return value
+            if isinstance(value, MemoryError):
+                raise ExtractionError(f"extraction exceeded the {self.memory_mb} MB memory limit")
+            raise value
+
+
+extraction_pool = ExtractionPool() if EXTRACT_WORKERS > 0 else None
+
+
+@contextmanager
+def _spill(fileobj):
+    """Copy a file object to a named temporary file a worker can open."""
+    with tempfile.NamedTemporaryFile(prefix="extract-", delete=False) as f:
+        shutil.copyfileobj(fileobj, f, SPILL_CHUNK_BYTES)
+    try:
+        yield f.name
+    finally:
+        os.unlink(f.name)
+
+
+def extract(extractor, fileobj):
+    """Extract text from a binary file object with the given extractor."""
+    try:
+        if not extractor.in_pool or extraction_pool is None:
+            return extractor.fn(fileobj)
+        path = getattr(fileobj, "path", None)
+        if path is not None:
+            return extraction_pool.run(extractor.name, path)
+        with _spill(fileobj) as path:
+            return extraction_pool.run(extractor.name, path)
+    except ExtractionError:
+        raise
+    except ImportError as e:
+        raise ExtractionError(f"{extractor.name} support is not installed ({e.name})")
+    except MemoryError:
+        raise ExtractionError("file is too large to extract")
+    except Exception as e:
+        raise ExtractionError(f"could not parse {extractor.name} file: {e}")
@@ -0,0 +1,74 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from dotenv import load_dotenv
+load_dotenv()
+
+FANOUT_MAX_WORKERS = int(os.getenv("FANOUT_MAX_WORKERS", "8"))
+BACKEND_TIMEOUTS = {
+    "google": float(os.getenv("GOOGLE_TIMEOUT_SECONDS", "15")),
+    "dropbox": float(os.getenv("DROPBOX_TIMEOUT_SECONDS", "15")),
+    "local": float(os.getenv("LOCAL_TIMEOUT_SECONDS", "15")),
+}
+DEFAULT_TIMEOUT = 15.0
+
+_executor = ThreadPoolExecutor(max_workers=FANOUT_MAX_WORKERS, thread_name_prefix="fanout")
+
+
+def run_concurrently(tasks):
+    """
+    Run `tasks`, a list of (backend, fn, args) tuples, on the shared worker
+    pool. Each backend has its own deadline measured from submission, so a
+    slow backend cannot hold up results from a fast one beyond its timeout.
+
+    The deadline bounds how long the caller waits, not the work itself: a
+    task still queued at its deadline is cancelled, but one already running
+    keeps its worker thread until it returns (threads cannot be stopped).
+    Calls that must end sooner need their own timeout, such as the HTTP
+    client's.
+
+    Returns a list aligned with `tasks` of (result, error) pairs, where
+    error is None, a TimeoutError or the exception the task raised.
+    """
+    started = time.monotonic()
+    futures = [_executor.submit(fn, *args) for _, fn, args in tasks]
+    outcomes = []
+
+    for (backend, _, _), future in zip(tasks, futures):
+        deadline = started + BACKEND_TIMEOUTS.get(backend, DEFAULT_TIMEOUT)
+        try:
+            outcomes.append((future.result(timeout=max(0.0, deadline - time.monotonic())), None))
+        except FutureTimeoutError:
+            future.cancel()
+            outcomes.append((None, TimeoutError(f"timed out after {BACKEND_TIMEOUTS.get(backend, DEFAULT_TIMEOUT):g}s")))
+        except Exception as e:
+            outcomes.append((None, e))
+
+    return outcomes
+
+
+def rank_hits(hits, query):
+    """
+    Deduplicate hits by (backend, id) and order them: exact name matches,
+    then prefix matches, then substring matches, then content-only matches,
+    newest first within each group.
+    """
+    unique = {}
+    for hit in hits:
+        unique.setdefault((hit["backend"], hit["id"]), hit)
+
+    def tier(hit):
+        name = hit["name"].lower()
+        stem = name.rsplit(".", 1)[0]
+        if query and (name == query or stem == query):
+            return 0
+        if query and name.startswith(query):
+            return 1
+        if query in name:
+            return 2
+        return 3
+
+    ranked = sorted(unique.values(), key=lambda hit: hit.get("modified") or "", reverse=True)
+    ranked.sort(key=tier)
+    return ranked
@@ -0,0 +1,204 @@
+import difflib
+import os
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from collections import namedtuple
+
+import dropbox
+
+from client_manager import clients
+import local_utils
+from metadata_index import metadata_index
+from pagination import iter_drive_pages, iter_dropbox_pages
+
+from dotenv import load_dotenv
+load_dotenv()
+
+FOLDER_INDEX_TTL_SECONDS = float(os.getenv("FOLDER_INDEX_TTL_SECONDS", "300"))
+MISS_REFRESH_SECONDS = float(os.getenv("FOLDER_INDEX_MISS_REFRESH_SECONDS", "60"))
+FUZZY_CUTOFF = 0.75
+
+DRIVE_FOLDER_MIME = "application/vnd.google-apps.folder"
+
+# `name` is the matched folder's own name; `exact` is False for prefix and
+# fuzzy matches, so callers can say which folder they used instead.
+FolderMatch = namedtuple("FolderMatch", ["id", "name", "exact"])
+
+
+def normalize_name(name):
+    name = unicodedata.normalize("NFKC", name or "").casefold()
+    return " ".join(name.strip().strip("/").split())
+
+
+class _Snapshot:
+    def __init__(self, folders, generation=None):
+        self.built_at = time.time()
+        self.generation = generation
+        self.by_name = {}
+        self.by_path = {}
+
+        # Newest first, so a name shared by several folders resolves to the
+        # most recently modified one, like the SQL lookup it replaces.
+        for folder in sorted(folders, key=lambda f: f["modified"] or "", reverse=True):
+            self.by_name.setdefault(normalize_name(folder["name"]), []).append(folder)
+            if folder["path"]:
+                self.by_path[folder["path"]] = folder
+
+        self.names = sorted(self.by_name)
+
+
+class FolderIndex:
+    """
+    In-memory map from normalized folder name to folders, per backend.
+
+    Built from the metadata mirror when it is ready, otherwise from one
+    paged listing of every folder. Lookups are a dict probe, falling back to
+    a bisect over the sorted names for prefixes and difflib for typos.
+    Snapshots built from the mirror are rebuilt as soon as a sync changes
+    it; others expire after FOLDER_INDEX_TTL_SECONDS. A miss on a live
+    snapshot also forces a rebuild, at most once per MISS_REFRESH_SECONDS
+    per backend, so a folder created a moment ago is still found without
+    every typo relisting all folders. Mirror snapshots already follow each
+    sync, so a miss never rebuilds them.
+    """
+
+    def __init__(self, ttl=FOLDER_INDEX_TTL_SECONDS):
+        self.ttl = ttl
+        self._snapshots = {}
+        self._forced_at = {}
+        self._locks = {"google": threading.Lock(), "dropbox": threading.Lock(), "local": threading.Lock()}
+
+    def resolve(self, backend, name):
+        """
+        Return a FolderMatch for the best match, or None. Its id is the
+        folder id (Drive) or path (Dropbox, local).
+        """
+        if not name or not name.strip():
+            return None
+
+        snapshot = self._snapshot(backend)
+        match = self._lookup(snapshot, name)
+        if match is None and self._may_force(backend, snapshot):
+            match = self._lookup(self._snapshot(backend, force=True), name)
+
+        return match
+
+    def _may_force(self, backend, snapshot):
+        if snapshot.generation is not None:
+            return False
+        with self._locks[backend]:
+            now = time.time()
+            if now - self._forced_at.get(backend, 0) < MISS_REFRESH_SECONDS:
+                return False
+            self._forced_at[backend] = now
+            return True
+
+    def suggest(self, backend, name, limit=5):
+        """Folder names close to `name`, for 'not found' messages."""
+        snapshot = self._snapshot(backend)
+        key = normalize_name(name)
+        keys = self._prefixed(snapshot, key)[:limit]
+        keys += [k for k in difflib.get_close_matches(key, snapshot.names, limit, 0.5) if k not in keys]
+        return [snapshot.by_name[k][0]["name"] for k in keys[:limit]]
+
+    def invalidate(self, backend=None):
+        if backend is None:
+            self._snapshots.clear()
+        else:
+            self._snapshots.pop(backend, None)
+
+    def _lookup(self, snapshot, name):
+        key = normalize_name(name)
+
+        matches = snapshot.by_name.get(key)
+        if matches:
+            return self._match(matches[0], True)
+
+        path = "/" + key
+        if path in snapshot.by_path:
+            return self._match(snapshot.by_path[path], True)
+
+        prefixed = self._prefixed(snapshot, key)
+        if prefixed:
+            return self._match(snapshot.by_name[min(prefixed, key=len)][0], False)
+
+        close = difflib.get_close_matches(key, snapshot.names, 1, FUZZY_CUTOFF)
+        if close:
+            return self._match(snapshot.by_name[close[0]][0], False)
+
+        return None
+
+    def _match(self, folder, exact):
+        return FolderMatch(folder["id"], folder["name"], exact)
+
+    def _prefixed(self, snapshot, key):
+        keys = []
+        i = bisect_left(snapshot.names, key)
+        while i < len(snapshot.names) and snapshot.names[i].startswith(key):
+            keys.append(snapshot.names[i])
+            i += 1
+        return keys
+
+    def _snapshot(self, backend, force=False):
+        snapshot = self._snapshots.get(backend)
+        if not force and snapshot is not None and not self._expired(backend, snapshot):
+            return snapshot
+
+        with self._locks[backend]:
+            current = self._snapshots.get(backend)
+            if current is not snapshot and current is not None:
+                return current
+
+            snapshot = self._load(backend)
+            self._snapshots[backend] = snapshot
+            return snapshot
+
+    def _expired(self, backend, snapshot):
+        if snapshot.generation is not None:
+            metadata_index.ensure_fresh(backend)
+            return snapshot.generation != metadata_index.generation[backend]
+        return time.time() - snapshot.built_at >= self.ttl
+
+    def _load(self, backend):
+        if metadata_index is not None and metadata_index.ensure_fresh(backend):
+            generation = metadata_index.generation[backend]
+            return _Snapshot([
+                {"id": r["id"], "name": r["name"], "path": r["path"], "modified": r["modified_time"]}
+                for r in metadata_index.all_folders(backend)
+            ], generation)
+
+        return _Snapshot(self._load_live(backend))
+
+    def _load_live(self, backend):
+        if backend == "google":
+            pages = iter_drive_pages(
+                clients.drive(),
+                q=f"mimeType='{DRIVE_FOLDER_MIME}' and trashed=false",
+                fields="id, name, modifiedTime",
+                page_size=1000
+            )
+            return [
+                {"id": f["id"], "name": f["name"], "path": None, "modified": f.get("modifiedTime")}
+                for files, _, _ in pages
+                for f in files
+            ]
+
+        if backend == "local":
+            return [
+                {"id": e["id"], "name": e["name"], "path": e["id"], "modified": e["modified"]}
+                for e in local_utils.walk("")
+                if e["is_folder"]
+            ]
+
+        pages = iter_dropbox_pages(clients.dropbox(), "", 2000, recursive=True)
+        return [
+            {"id": e.path_lower, "name": e.name, "path": e.path_lower, "modified": None}
+            for entries, _, _ in pages
+            for e in entries
+            if isinstance(e, dropbox.files.FolderMetadata)
+        ]
+
+
+folder_index = FolderIndex()
@@ -0,0 +1,235 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import dropbox
+
+from drive_utils import get_drive_service
+from dropbox_utils import get_dropbox_client
+from local_utils import list_folder as local_list_folder
+from metadata_index import metadata_index
+from pagination import iter_drive_pages, iter_dropbox_pages
+
+from dotenv import load_dotenv
+load_dotenv()
+
+TREE_MAX_DEPTH = int(os.getenv("TREE_MAX_DEPTH", "3"))
+TREE_DEPTH_LIMIT = 10
+TREE_MAX_ENTRIES = int(os.getenv("TREE_MAX_ENTRIES", "1000"))
+TREE_CONCURRENCY = int(os.getenv("TREE_CONCURRENCY", "4"))
+TREE_CACHE_SECONDS = float(os.getenv("TREE_CACHE_SECONDS", "60"))
+TREE_CACHE_SIZE = 32
+
+DRIVE_FOLDER_MIME = "application/vnd.google-apps.folder"
+DROPBOX_LIST_LIMIT = 2000
+INDEX_PAGE_SIZE = 1000
+
+_executor = ThreadPoolExecutor(max_workers=TREE_CONCURRENCY, thread_name_prefix="tree")
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def clamp_depth(max_depth):
+    try:
+        max_depth = int(max_depth)
+    except (TypeError, ValueError):
+        return TREE_MAX_DEPTH
+    return max(1, min(max_depth, TREE_DEPTH_LIMIT))
+
+
+def _index_children(backend, parent):
+    children = []
+    offset = 0
+    while True:
+        rows, position = metadata_index.list_children(backend, parent, INDEX_PAGE_SIZE, offset)
+        children.extend(
+            {"id": r["id"], "name": r["name"], "is_folder": bool(r["is_folder"])}
+            for r in rows
+        )
+        if not position:
+            return children
+        offset = position[1]
+
+
+def _drive_children(folder_id, use_index):
+    if use_index:
+        return _index_children("google", folder_id)
+
+    pages = iter_drive_pages(
+        get_drive_service(),
+        q=f"'{folder_id}' in parents and trashed=false",
+        fields="id, name, mimeType",
+        page_size=1000,
+        order_by="folder,name"
+    )
+    return [
+        {"id": f["id"], "name": f["name"], "is_folder": f["mimeType"] == DRIVE_FOLDER_MIME}
+        for files, _, _ in pages
+        for f in files
+    ]
+
+
+def _dropbox_children(path, use_index):
+    if use_index:
+        return _index_children("dropbox", path)
+
+    pages = iter_dropbox_pages(get_dropbox_client(), path, DROPBOX_LIST_LIMIT)
+    return [
+        {"id": e.path_lower, "name": e.name, "is_folder": isinstance(e, dropbox.files.FolderMetadata)}
+        for entries, _, _ in pages
+        for e in entries
+    ]
+
+
+def _local_children(path):
+    return [
+        {"id": e["id"], "name": e["name"], "is_folder": e["is_folder"]}
+        for e in local_list_folder(path)
+    ]
+
+
+def _walk_levels(list_children, root, max_depth, max_entries):
+    """
+    Breadth-first walk: every folder on a level is listed concurrently on
+    the tree pool, then the next level starts. Stops at max_depth levels or
+    max_entries entries.
+    """
+    children = {}
+    errors = []
+    count = 0
+    level = [root]
+
+    for _ in range(max_depth):
+        if not level:
+            break
+
+        futures = [_executor.submit(list_children, folder) for folder in level]
+        next_level = []
+
+        for folder, future in zip(level, futures):
+            try:
+                entries = future.result()
+            except Exception as e:
+                errors.append(f"{folder}: {e}")
+                continue
+
+            entries = entries[:max_entries - count]
+            children[folder] = entries
+            count += len(entries)
+            next_level.extend(e["id"] for e in entries if e["is_folder"])
+
+            if count >= max_entries:
+                for pending in futures:
+                    pending.cancel()
+                return children, True, errors
+
+        level = next_level
+
+    return children, False, errors
+
+
+def _walk_dropbox_recursive(root, max_depth, max_entries):
+    """
+    One recursive list_folder call instead of one call per folder. Dropbox
+    returns the subtree in no particular order, so entries are grouped by
+    parent afterwards.
+
+    The recursive listing pages through everything under root, including
+    entries deeper than max_depth, so every entry received counts against
+    max_entries. Returns None once that budget is spent: the subtree is too
+    big for one listing and the caller walks it level by level instead.
+    """
+    children = {}
+    scanned = 0
+    base_depth = root.count("/")
+    pages = iter_dropbox_pages(get_dropbox_client(), root, DROPBOX_LIST_LIMIT, recursive=True)
+
+    for entries, _, _ in pages:
+        scanned += len(entries)
+        if scanned > max_entries:
+            pages.close()
+            return None
+
+        for e in entries:
+            path = e.path_lower
+            if path == root or isinstance(e, dropbox.files.DeletedMetadata):
+                continue
+            if path.count("/") - base_depth > max_depth:
+                continue
+
+            children.setdefault(path.rsplit("/", 1)[0], []).append({
+                "id": path,
+                "name": e.name,
+                "is_folder": isinstance(e, dropbox.files.FolderMetadata),
+            })
+
+    for entries in children.values():
+        entries.sort(key=lambda e: (not e["is_folder"], e["name"].lower()))
+    return children, False, []
+
+
+def _flatten(children, root):
+    """Depth-first order with depths, so the tree renders as an outline."""
+    rows = []
+    stack = [(entry, 1) for entry in reversed(children.get(root, []))]
+
+    while stack:
+        entry, depth = stack.pop()
+        rows.append(dict(entry, depth=depth))
+        if entry["is_folder"]:
+            stack.extend((child, depth + 1) for child in reversed(children.get(entry["id"], [])))
+
+    return rows
+
+
+def walk_tree(backend, root, max_depth=TREE_MAX_DEPTH, max_entries=TREE_MAX_ENTRIES):
+    """
+    Return (entries, truncated, errors) for the subtree under `root`.
+    entries are dicts with id, name, is_folder and depth in outline order.
+    Results are cached for TREE_CACHE_SECONDS so paging through a tree, or
+    walking it again, does not repeat the traversal.
+    """
+    key = (backend, root, max_depth, max_entries)
+
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None and time.time() - cached[0] < TREE_CACHE_SECONDS:
+            _cache.move_to_end(key)
+            return cached[1]
+
+    # scandir is cheaper than an index query, so local trees are always
+    # listed live.
+    use_index = (
+        backend != "local"
+        and metadata_index is not None
+        and metadata_index.ensure_fresh(backend)
+        and root != "root"
+    )
+
+    if backend == "local":
+        children, truncated, errors = _walk_levels(_local_children, root, max_depth, max_entries)
+    elif backend == "google":
+        children, truncated, errors = _walk_levels(
+            lambda folder: _drive_children(folder, use_index), root, max_depth, max_entries
+        )
+    else:
+        walked = None
+        if not use_index and max_depth > 1:
+            walked = _walk_dropbox_recursive(root, max_depth, max_entries)
+        if walked is None:
+            walked = _walk_levels(
+                lambda folder: _dropbox_children(folder, use_index), root, max_depth, max_entries
+            )
+        children, truncated, errors = walked
+
+    result = (_flatten(children, root), truncated, errors)
+
+    if not errors:
+        with _cache_lock:
+            _cache[key] = (time.time(), result)
+            while len(_cache) > TREE_CACHE_SIZE:
+                _cache.popitem(last=False)
+
+    return result
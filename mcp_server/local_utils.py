@@ -0,0 +1,186 @@
+import io
+import mmap
+import os
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from dotenv import load_dotenv
+load_dotenv()
+
+LOCAL_ROOT = os.getenv("LOCAL_ROOT", "").strip()
+
+
+class LocalPathError(Exception):
+    pass
+
+
+def is_configured():
+    return bool(LOCAL_ROOT)
+
+
+def get_local_root():
+    if not LOCAL_ROOT:
+        raise RuntimeError("LOCAL_ROOT is missing. Set it to the directory the local backend should serve.")
+    root = os.path.realpath(LOCAL_ROOT)
+    if not os.path.isdir(root):
+        raise RuntimeError(f"LOCAL_ROOT '{LOCAL_ROOT}' is not a directory")
+    return root
+
+
+def normalize_local_path(path):
+    """
+    Canonical id for a path under the root: "" for the root itself,
+    otherwise "/a/b" with separators and dot segments collapsed. Case is
+    kept, since local filesystems are usually case-sensitive.
+    """
+    path = (path or "").strip().replace("\\", "/").strip("/")
+    if not path:
+        return ""
+    path = os.path.normpath("/" + path).replace(os.sep, "/")
+    return "" if path == "/" else path
+
+
+def resolve(path):
+    """
+    Absolute filesystem path for a local id. Symlinks are followed, but the
+    target must still be inside the root.
+    """
+    root = get_local_root()
+    full = os.path.realpath(os.path.join(root, normalize_local_path(path).lstrip("/")))
+    if not _inside(root, full):
+        raise LocalPathError(f"'{path}' is outside the local root")
+    return full
+
+
+def _inside(root, full):
+    return os.path.commonpath([root, full]) == root
+
+
+def _iso(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+
+def _entry(parent, dir_entry):
+    is_folder = dir_entry.is_dir()
+    st = dir_entry.stat()
+    return {
+        "id": f"{parent}/{dir_entry.name}",
+        "name": dir_entry.name,
+        "parent": parent,
+        "is_folder": is_folder,
+        "is_link": dir_entry.is_symlink(),
+        "size": None if is_folder else st.st_size,
+        "modified": _iso(st.st_mtime),
+        "version": f"{st.st_mtime_ns}:{st.st_size}",
+    }
+
+
+def list_folder(path=""):
+    """
+    Entries of one folder via os.scandir, folders first then by name.
+    scandir returns the type with each name, so this is one directory read
+    plus a stat per entry. Hidden entries (leading dot) and symlinks that
+    point outside the root are skipped.
+    """
+    parent = normalize_local_path(path)
+    root = get_local_root()
+    entries = []
+
+    with os.scandir(resolve(parent)) as it:
+        for dir_entry in it:
+            if dir_entry.name.startswith("."):
+                continue
+            if dir_entry.is_symlink() and not _inside(root, os.path.realpath(dir_entry.path)):
+                continue
+            try:
+                entries.append(_entry(parent, dir_entry))
+            except OSError:
+                # Vanished between the directory read and the stat, or a
+                # dangling symlink.
+                continue
+
+    entries.sort(key=lambda e: (not e["is_folder"], e["name"].lower()))
+    return entries
+
+
+def walk(path="", max_depth=None):
+    """
+    Yield every entry under `path`, depth first, each with a "depth" key
+    (1 for direct children). Folders that cannot be read are skipped, and
+    symlinked folders are listed but not descended into, so a link cycle
+    cannot make the walk loop.
+    """
+    stack = [(normalize_local_path(path), 1)]
+
+    while stack:
+        folder, depth = stack.pop()
+        try:
+            entries = list_folder(folder)
+        except OSError:
+            continue
+
+        for entry in entries:
+            yield dict(entry, depth=depth)
+            if entry["is_folder"] and not entry["is_link"] and (max_depth is None or depth < max_depth):
+                stack.append((entry["id"], depth + 1))
+
+
+def stat_file(path):
+    path = normalize_local_path(path)
+    full = resolve(path)
+    st = os.stat(full)
+    is_folder = os.path.isdir(full)
+    return {
+        "id": path,
+        "name": os.path.basename(full) if path else "/",
+        "is_folder": is_folder,
+        "size": None if is_folder else st.st_size,
+        "modified": _iso(st.st_mtime),
+        "version": f"{st.st_mtime_ns}:{st.st_size}",
+    }
+
+
+def get_files_metadata(paths):
+    """Returns {path: metadata dict or the exception for that path}."""
+    results = {}
+    for path in dict.fromkeys(paths):
+        try:
+            results[path] = stat_file(path)
+        except Exception as e:
+            results[path] = e
+    return results
+
+
+class _MappedFile(mmap.mmap):
+    """mmap plus the file-object queries zipfile and friends check for."""
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+
+@contextmanager
+def open_mapped(path):
+    """
+    Memory-map a file read-only. The kernel pages it in on demand, so a
+    prefix read touches only the first pages and extraction reads straight
+    from the page cache without an intermediate copy. The map supports
+    read/seek/tell, so it can be handed to extractors as a file object;
+    its `path` lets pooled extraction open the file itself.
+    """
+    full = resolve(path)
+    with open(full, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # Empty files cannot be mapped.
+            yield io.BytesIO(b"")
+            return
+        with _MappedFile(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            mapped.path = full
+            yield mapped
+
+
+def read_prefix(path, length):
+    with open_mapped(path) as mapped:
+        return mapped.read(length)
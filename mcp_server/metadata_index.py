@@ -0,0 +1,364 @@
+import os
+import sqlite3
+import threading
+import time
+
+import dropbox
+
+from client_manager import clients
+import local_utils
+
+from dotenv import load_dotenv
+load_dotenv()
+
+INDEX_PATH = os.getenv("METADATA_INDEX_PATH", "metadata_index.sqlite3")
+MAX_STALENESS_SECONDS = float(os.getenv("METADATA_MAX_STALENESS_SECONDS", "60"))
+METADATA_INDEX_ENABLED = os.getenv("METADATA_INDEX_ENABLED", "true").lower() not in ("0", "false", "no")
+
+INDEX_TOKEN = "index"
+SYNC_RETRY_SECONDS = 60
+
+DRIVE_FOLDER_MIME = "application/vnd.google-apps.folder"
+DRIVE_FILE_FIELDS = "id, name, mimeType, parents, modifiedTime, trashed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    backend TEXT NOT NULL,
+    id TEXT NOT NULL,
+    path TEXT,
+    name TEXT NOT NULL,
+    name_lower TEXT NOT NULL,
+    mime_type TEXT,
+    parent TEXT,
+    modified_time TEXT,
+    is_folder INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (backend, id)
+);
+CREATE INDEX IF NOT EXISTS idx_files_parent ON files (backend, parent, is_folder, name_lower);
+CREATE INDEX IF NOT EXISTS idx_files_name ON files (backend, name_lower);
+CREATE TABLE IF NOT EXISTS sync_state (
+    backend TEXT PRIMARY KEY,
+    cursor TEXT,
+    last_sync REAL NOT NULL
+);
+"""
+
+
+class MetadataIndex:
+    """
+    On-disk SQLite mirror of file metadata for every backend.
+
+    The first sync for a backend runs in a background thread and walks the
+    whole account; after that the mirror is brought up to date from Drive's
+    changes.list page token or Dropbox's list_folder cursor whenever it is
+    older than MAX_STALENESS_SECONDS. The local backend has no change feed,
+    so it is re-walked with scandir instead. Drive rows are keyed by file id,
+    Dropbox rows by path_lower and local rows by path, matching the ids the
+    tools already expose.
+    """
+
+    def __init__(self, path=INDEX_PATH, max_staleness=MAX_STALENESS_SECONDS):
+        self.max_staleness = max_staleness
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._db_lock = threading.Lock()
+        self._sync_locks = {"google": threading.Lock(), "dropbox": threading.Lock(), "local": threading.Lock()}
+        self._sync_threads = {}
+        self._sync_failed_at = {}
+        self._thread_lock = threading.Lock()
+        self.generation = {"google": 0, "dropbox": 0, "local": 0}
+
+        with self._db_lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+            self._conn.commit()
+
+    def ensure_fresh(self, backend, client=None):
+        """
+        Return True when the mirror can answer for `backend` without a live
+        listing call. Performs an incremental sync if the mirror is stale and
+        starts the initial full sync in the background if it has never run.
+        A stale local mirror is re-walked in the background instead.
+        """
+        state = self._get_state(backend)
+
+        if state is None:
+            self._start_background_sync(backend)
+            return False
+
+        if time.time() - state["last_sync"] <= self.max_staleness:
+            return True
+
+        if backend == "local":
+            # A re-walk of a large or network-mounted root is slow; serve
+            # the current rows and refresh them in the background.
+            self._start_background_sync(backend)
+            return True
+
+        lock = self._sync_locks[backend]
+        if not lock.acquire(blocking=False):
+            # Another request is already syncing; the current rows are at
+            # most one sync interval old, which is good enough to serve.
+            return True
+
+        try:
+            if client is None:
+                client = clients.drive() if backend == "google" else clients.dropbox()
+            if backend == "google":
+                self._sync_drive_changes(client, state["cursor"])
+            else:
+                self._sync_dropbox_changes(client, state["cursor"])
+            return True
+        except Exception as e:
+            print(f"Error syncing {backend} metadata index: {e}")
+            return False
+        finally:
+            lock.release()
+
+    def list_children(self, backend, parent, limit, offset=0):
+        rows = self._query(
+            "SELECT * FROM files WHERE backend = ? AND parent = ? "
+            "ORDER BY is_folder DESC, name_lower LIMIT ? OFFSET ?",
+            (backend, parent, limit + 1, offset),
+        )
+        return self._page(rows, limit, offset)
+
+    def has_folder(self, backend, folder_id):
+        rows = self._query(
+            "SELECT 1 FROM files WHERE backend = ? AND id = ? AND is_folder = 1 LIMIT 1",
+            (backend, folder_id),
+        )
+        return bool(rows)
+
+    def search_names(self, backend, query, parent=None, limit=25, offset=0, files_only=True):
+        sql = "SELECT * FROM files WHERE backend = ? AND instr(name_lower, ?) > 0"
+        params = [backend, query.lower()]
+
+        if parent is not None:
+            sql += " AND parent = ?"
+            params.append(parent)
+        if files_only:
+            sql += " AND is_folder = 0"
+
+        sql += " ORDER BY name_lower LIMIT ? OFFSET ?"
+        params.extend([limit + 1, offset])
+
+        return self._page(self._query(sql, params), limit, offset)
+
+    def all_files(self, backend):
+        return [
+            dict(row)
+            for row in self._query("SELECT * FROM files WHERE backend = ? AND is_folder = 0", (backend,))
+        ]
+
+    def all_folders(self, backend):
+        return [
+            dict(row)
+            for row in self._query("SELECT * FROM files WHERE backend = ? AND is_folder = 1", (backend,))
+        ]
+
+    def _page(self, rows, limit, offset):
+        rows = [dict(row) for row in rows]
+        if len(rows) > limit:
+            return rows[:limit], (INDEX_TOKEN, offset + limit)
+        return rows, None
+
+    def _query(self, sql, params):
+        with self._db_lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _get_state(self, backend):
+        rows = self._query("SELECT cursor, last_sync FROM sync_state WHERE backend = ?", (backend,))
+        return rows[0] if rows else None
+
+    def _start_background_sync(self, backend):
+        with self._thread_lock:
+            thread = self._sync_threads.get(backend)
+            if thread is not None and thread.is_alive():
+                return
+            if time.time() - self._sync_failed_at.get(backend, 0) < SYNC_RETRY_SECONDS:
+                return
+
+            thread = threading.Thread(
+                target=self._run_background_sync,
+                args=(backend,),
+                name=f"metadata-sync-{backend}",
+                daemon=True,
+            )
+            self._sync_threads[backend] = thread
+            thread.start()
+
+    def _run_background_sync(self, backend):
+        # The sync thread builds its own client: Drive services are bound to
+        # the thread that created them. Local re-walks also run here.
+        with self._sync_locks[backend]:
+            try:
+                if backend == "google":
+                    self._full_sync_drive(clients.drive())
+                elif backend == "local":
+                    self._sync_local()
+                else:
+                    self._full_sync_dropbox(clients.dropbox())
+            except Exception as e:
+                self._sync_failed_at[backend] = time.time()
+                print(f"Error building {backend} metadata index: {e}")
+
+    def _write(self, backend, upserts, deletes, cursor, reset=False):
+        with self._db_lock:
+            with self._conn:
+                if reset:
+                    self._conn.execute("DELETE FROM files WHERE backend = ?", (backend,))
+                for key in deletes:
+                    self._conn.execute(
+                        "DELETE FROM files WHERE backend = ? AND (id = ? OR substr(path, 1, ?) = ?)",
+                        (backend, key, len(key) + 1, f"{key}/"),
+                    )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO files "
+                    "(backend, id, path, name, name_lower, mime_type, parent, modified_time, is_folder) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(backend,) + row for row in upserts],
+                )
+                if cursor is not None:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO sync_state (backend, cursor, last_sync) VALUES (?, ?, ?)",
+                        (backend, cursor, time.time()),
+                    )
+
+            # Lets in-memory views built from the mirror tell whether it
+            # changed. Bumped under the lock so concurrent writes never
+            # lose an increment.
+            if upserts or deletes or reset:
+                self.generation[backend] += 1
+
+    def _drive_row(self, f):
+        parents = f.get("parents") or [None]
+        mime = f.get("mimeType")
+        return (
+            f["id"], None, f.get("name", ""), f.get("name", "").lower(),
+            mime, parents[0], f.get("modifiedTime"), int(mime == DRIVE_FOLDER_MIME),
+        )
+
+    def _full_sync_drive(self, service):
+        start_token = service.changes().getStartPageToken().execute()["startPageToken"]
+        page_token = None
+        first = True
+
+        while True:
+            params = {
+                "q": "trashed=false",
+                "pageSize": 1000,
+                "fields": f"nextPageToken, files({DRIVE_FILE_FIELDS})",
+            }
+            if page_token:
+                params["pageToken"] = page_token
+
+            results = service.files().list(**params).execute()
+            rows = [self._drive_row(f) for f in results.get("files", [])]
+            page_token = results.get("nextPageToken")
+
+            # Only record the change token once the whole listing is stored,
+            # so a crash mid-walk restarts the initial sync.
+            self._write("google", rows, [], None if page_token else start_token, reset=first)
+            first = False
+
+            if not page_token:
+                return
+
+    def _sync_drive_changes(self, service, page_token):
+        while page_token:
+            results = service.changes().list(
+                pageToken=page_token,
+                pageSize=1000,
+                includeRemoved=True,
+                fields=f"nextPageToken, newStartPageToken, changes(fileId, removed, file({DRIVE_FILE_FIELDS}))",
+            ).execute()
+
+            upserts, deletes = [], []
+            for change in results.get("changes", []):
+                f = change.get("file")
+                if change.get("removed") or not f or f.get("trashed"):
+                    deletes.append(change["fileId"])
+                else:
+                    upserts.append(self._drive_row(f))
+
+            next_token = results.get("nextPageToken")
+            new_start = results.get("newStartPageToken")
+            self._write("google", upserts, deletes, next_token or new_start)
+            page_token = next_token
+
+    def _dropbox_rows(self, entries):
+        upserts, deletes = [], []
+
+        for entry in entries:
+            path = entry.path_lower
+            parent = path.rsplit("/", 1)[0]
+
+            if isinstance(entry, dropbox.files.DeletedMetadata):
+                deletes.append(path)
+            elif isinstance(entry, dropbox.files.FolderMetadata):
+                upserts.append((path, path, entry.name, entry.name.lower(), None, parent, None, 1))
+            elif isinstance(entry, dropbox.files.FileMetadata):
+                modified = entry.server_modified.isoformat() if entry.server_modified else None
+                upserts.append((path, path, entry.name, entry.name.lower(), None, parent, modified, 0))
+
+        return upserts, deletes
+
+    def _full_sync_dropbox(self, dbx):
+        result = dbx.files_list_folder("", recursive=True, limit=2000)
+        first = True
+
+        while True:
+            upserts, deletes = self._dropbox_rows(result.entries)
+            self._write("dropbox", upserts, deletes, None if result.has_more else result.cursor, reset=first)
+            first = False
+
+            if not result.has_more:
+                return
+            result = dbx.files_list_folder_continue(result.cursor)
+
+    def _sync_dropbox_changes(self, dbx, cursor):
+        while True:
+            try:
+                result = dbx.files_list_folder_continue(cursor)
+            except dropbox.exceptions.ApiError as e:
+                if isinstance(e.error, dropbox.files.ListFolderContinueError) and e.error.is_reset():
+                    self._full_sync_dropbox(dbx)
+                    return
+                raise
+
+            upserts, deletes = self._dropbox_rows(result.entries)
+            self._write("dropbox", upserts, deletes, result.cursor)
+            cursor = result.cursor
+
+            if not result.has_more:
+                return
+
+    def _sync_local(self):
+        """
+        Walk the local root and replace its rows in one transaction. The
+        generation is only bumped when something actually changed, so views
+        built on the mirror are not rebuilt on every re-walk.
+        """
+        rows = [
+            (
+                e["id"], e["id"], e["name"], e["name"].lower(), None, e["parent"],
+                None if e["is_folder"] else e["modified"], int(e["is_folder"]),
+            )
+            for e in local_utils.walk("")
+        ]
+        existing = {
+            tuple(row)
+            for row in self._query(
+                "SELECT id, path, name, name_lower, mime_type, parent, modified_time, is_folder "
+                "FROM files WHERE backend = 'local'", ()
+            )
+        }
+
+        if set(rows) == existing:
+            self._write("local", [], [], "local")
+        else:
+            self._write("local", rows, [], "local", reset=True)
+
+
+metadata_index = MetadataIndex() if METADATA_INDEX_ENABLED else None
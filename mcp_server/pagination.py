@@ -0,0 +1,139 @@
+import base64
+import json
+
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 200
+
+
+def clamp_page_size(page_size):
+    try:
+        page_size = int(page_size)
+    except (TypeError, ValueError):
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(page_size, MAX_PAGE_SIZE))
+
+
+def encode_cursor(backend, folder, position, query=None, page_size=None, depth=None):
+    """
+    Pack everything needed to resume a listing into an opaque string.
+    `position` is the (page_token, offset) pair returned by take_page. The
+    page size is kept too: the offset points into a server page fetched at
+    that size, so a continuation must reuse it. `depth` is the tree depth
+    for list_tree cursors.
+    """
+    token, offset = position
+    state = {"b": backend, "f": folder, "q": query, "t": token, "o": offset, "s": page_size}
+    if depth is not None:
+        state["d"] = depth
+    raw = json.dumps(state, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def _load_cursor(cursor):
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception:
+        raise ValueError("cursor is malformed")
+    if not isinstance(state, dict):
+        raise ValueError("cursor is malformed")
+    return state
+
+
+def cursor_backend(cursor):
+    """The backend a cursor was issued by, so backend='all' calls can route it."""
+    backend = _load_cursor(cursor).get("b")
+    if not backend:
+        raise ValueError("cursor is malformed")
+    return backend
+
+
+def decode_cursor(cursor, backend):
+    state = _load_cursor(cursor)
+
+    if state.get("b") != backend:
+        raise ValueError(f"cursor does not belong to backend '{backend}'")
+
+    return {
+        "folder": state.get("f"),
+        "query": state.get("q"),
+        "token": state.get("t"),
+        "offset": int(state.get("o") or 0),
+        "page_size": clamp_page_size(state["s"]) if state.get("s") else None,
+        "depth": state.get("d"),
+    }
+
+
+def format_next_cursor(cursor):
+    if not cursor:
+        return ""
+    return f"\nMore results available. Call again with cursor='{cursor}' to get the next page."
+
+
+def iter_drive_pages(service, q, fields, page_size, page_token=None, order_by=None):
+    """
+    Lazily yield (files, page_token, next_page_token) for a Drive files.list
+    query. `page_token` is the token that fetched the yielded page.
+    """
+    while True:
+        params = {
+            "q": q,
+            "pageSize": page_size,
+            "fields": f"nextPageToken, files({fields})",
+        }
+        if page_token:
+            params["pageToken"] = page_token
+        if order_by:
+            params["orderBy"] = order_by
+
+        results = service.files().list(**params).execute()
+        next_token = results.get("nextPageToken")
+        yield results.get("files", []), page_token, next_token
+
+        if not next_token:
+            return
+        page_token = next_token
+
+
+def iter_dropbox_pages(dbx, path, page_size, cursor=None, recursive=False):
+    """
+    Lazily yield (entries, cursor, next_cursor) for a Dropbox folder listing,
+    following has_more with files_list_folder_continue.
+    """
+    if cursor:
+        result = dbx.files_list_folder_continue(cursor)
+    else:
+        result = dbx.files_list_folder(path, recursive=recursive, limit=page_size)
+
+    while True:
+        next_cursor = result.cursor if result.has_more else None
+        yield result.entries, cursor, next_cursor
+
+        if not next_cursor:
+            return
+        cursor = next_cursor
+        result = dbx.files_list_folder_continue(cursor)
+
+
+def take_page(pages, page_size, offset=0, match=None):
+    """
+    Pull entries from a page generator until `page_size` entries have been
+    collected. Returns (items, position) where position is the (page_token,
+    offset) to resume from, or None when the listing is exhausted.
+    """
+    items = []
+
+    for entries, token, next_token in pages:
+        for i in range(offset, len(entries)):
+            entry = entries[i]
+            if match is not None and not match(entry):
+                continue
+
+            items.append(entry)
+            if len(items) == page_size:
+                if i + 1 < len(entries):
+                    return items, (token, i + 1)
+                return items, ((next_token, 0) if next_token else None)
+
+        offset = 0
+
+    return items, None
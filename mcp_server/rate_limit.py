@@ -0,0 +1,239 @@
+import hashlib
+import os
+import random
+import threading
+import time
+from collections import Counter
+
+import dropbox
+from google_auth_httplib2 import AuthorizedHttp
+
+from dotenv import load_dotenv
+load_dotenv()
+
+RATE_LIMITS = {
+    "google": (
+        float(os.getenv("GOOGLE_REQUESTS_PER_SECOND", "10")),
+        int(os.getenv("GOOGLE_BURST", "20")),
+    ),
+    "dropbox": (
+        float(os.getenv("DROPBOX_REQUESTS_PER_SECOND", "10")),
+        int(os.getenv("DROPBOX_BURST", "20")),
+    ),
+}
+MAX_RETRIES = int(os.getenv("RATE_LIMIT_MAX_RETRIES", "5"))
+BASE_BACKOFF_SECONDS = 0.5
+MAX_BACKOFF_SECONDS = 32.0
+
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+DRIVE_RATE_LIMIT_REASONS = (b"userRateLimitExceeded", b"rateLimitExceeded")
+
+
+def credential_key(*parts):
+    """Short stable id for a credential, so buckets never hold raw tokens."""
+    raw = "\0".join(str(p or "") for p in parts)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:12]
+
+
+def backoff_delay(attempt, hint=None):
+    """
+    Exponential backoff with full jitter. A server-provided hint is a floor,
+    with a little jitter on top so throttled callers do not retry in step.
+    """
+    if hint:
+        return hint + random.uniform(0, BASE_BACKOFF_SECONDS)
+    return random.uniform(0, min(MAX_BACKOFF_SECONDS, BASE_BACKOFF_SECONDS * 2 ** attempt))
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available. Returns the seconds waited."""
+        waited = 0.0
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                elif self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                else:
+                    wait = (1 - self.tokens) / self.rate
+
+            time.sleep(wait)
+            waited += wait
+
+    def pause(self, seconds):
+        """Hold every caller on this bucket back, e.g. after a 429."""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class RateLimiter:
+    """
+    Token buckets per (backend, credential) plus retry with backoff.
+
+    Every upstream request takes a token first, so bursts are smoothed out
+    before they reach the API. When the API throttles anyway, the bucket is
+    paused for the backoff delay, which makes all callers sharing that
+    credential back off together rather than each retrying on its own.
+    """
+
+    def __init__(self, limits=RATE_LIMITS, max_retries=MAX_RETRIES):
+        self.limits = limits
+        self.max_retries = max_retries
+        self._buckets = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, backend, credential):
+        key = (backend, credential)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(*self.limits[backend])
+                self._buckets[key] = bucket
+            return bucket
+
+    def count(self, backend, name, amount=1):
+        with self._lock:
+            self._counters.setdefault(backend, Counter())[name] += amount
+
+    def stats(self):
+        with self._lock:
+            return {backend: dict(counter) for backend, counter in self._counters.items()}
+
+    def call(self, backend, credential, fn, retry_hint):
+        """
+        Call fn() under the limiter. `retry_hint(error)` returns None if the
+        error is final, or the server's suggested delay in seconds (0 when
+        retryable without a hint).
+        """
+        bucket = self.bucket(backend, credential)
+
+        for attempt in range(self.max_retries + 1):
+            self.count(backend, "wait_seconds", bucket.acquire())
+            self.count(backend, "requests")
+
+            try:
+                return fn()
+            except Exception as e:
+                hint = retry_hint(e)
+                if hint is None:
+                    raise
+                self.count(backend, "throttled")
+                if attempt == self.max_retries:
+                    self.count(backend, "gave_up")
+                    raise
+
+                self.count(backend, "retries")
+                delay = backoff_delay(attempt, hint)
+                bucket.pause(delay)
+
+    def drive_request(self, credential, send):
+        """
+        Same as call() for raw Drive HTTP responses, where throttling comes
+        back as a status code rather than an exception.
+        """
+        bucket = self.bucket("google", credential)
+
+        for attempt in range(self.max_retries + 1):
+            self.count("google", "wait_seconds", bucket.acquire())
+            self.count("google", "requests")
+
+            resp, content = send()
+            hint = drive_retry_hint(resp, content)
+            if hint is None:
+                return resp, content
+
+            self.count("google", "throttled")
+            if attempt == self.max_retries:
+                self.count("google", "gave_up")
+                return resp, content
+
+            self.count("google", "retries")
+            bucket.pause(backoff_delay(attempt, hint))
+
+
+def _retry_after(value):
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def drive_retry_hint(resp, content):
+    status = int(getattr(resp, "status", 0) or 0)
+    throttled = status in RETRYABLE_STATUSES or (
+        status == 403 and isinstance(content, bytes)
+        and any(reason in content for reason in DRIVE_RATE_LIMIT_REASONS)
+    )
+    if not throttled:
+        return None
+    return _retry_after(resp.get("retry-after"))
+
+
+def drive_error_retry_hint(error):
+    """Retry hint for an HttpError raised from a Drive batch sub-request."""
+    resp = getattr(error, "resp", None)
+    if resp is None:
+        return None
+    return drive_retry_hint(resp, getattr(error, "content", b""))
+
+
+def dropbox_retry_hint(error):
+    if isinstance(error, dropbox.exceptions.RateLimitError):
+        return float(error.backoff or 0)
+    return None
+
+
+class RateLimitedHttp(AuthorizedHttp):
+    """AuthorizedHttp that sends every Drive request through the limiter."""
+
+    def __init__(self, credentials, credential, **kwargs):
+        super().__init__(credentials, **kwargs)
+        self.credential = credential
+
+    def request(self, uri, method="GET", body=None, headers=None, **kwargs):
+        return rate_limiter.drive_request(
+            self.credential,
+            lambda: super(RateLimitedHttp, self).request(uri, method, body=body, headers=headers, **kwargs),
+        )
+
+
+class RateLimitedDropbox(dropbox.Dropbox):
+    """
+    Dropbox client whose route calls go through the limiter. The SDK's own
+    unlimited rate-limit retry loop is turned off so throttles are counted
+    and shaped here instead.
+    """
+
+    def __init__(self, *args, credential=None, **kwargs):
+        kwargs.setdefault("max_retries_on_rate_limit", 0)
+        super().__init__(*args, **kwargs)
+        self.credential = credential or "default"
+
+    def request(self, route, namespace, request_arg, request_binary, timeout=None, **kwargs):
+        return rate_limiter.call(
+            "dropbox",
+            self.credential,
+            lambda: super(RateLimitedDropbox, self).request(
+                route, namespace, request_arg, request_binary, timeout=timeout, **kwargs
+            ),
+            dropbox_retry_hint,
+        )
+
+
+rate_limiter = RateLimiter()
@@ -3,55 +3,154 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from tool_functions import list_files_fn
+from pagination import DEFAULT_PAGE_SIZE
+from tool_executor import run_tool
 
 mcp = FastMCP(name="drive-dropbox-mcp")
 
 @mcp.tool()
-def list_files(
+async def list_files(
     backend: str = "google",
     folder_id: str = None,
-    folder_name: str = None
+    folder_name: str = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    cursor: str = None
 ) -> str:
-    return list_files_fn(
+    return await run_tool(
+        backend,
+        list_files_fn,
         backend=backend,
         folder_id=folder_id,
-        folder_name=folder_name
+        folder_name=folder_name,
+        page_size=page_size,
+        cursor=cursor
     )
 
 from tool_functions import search_files_fn
 
 @mcp.tool()
-def search_files(
+async def search_files(
     backend: str = "google",
     query: str = "",
     folder_id: str = None,
-    folder_name: str = None
+    folder_name: str = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    cursor: str = None
 ):
-    return search_files_fn(
+    return await run_tool(
+        backend,
+        search_files_fn,
         backend=backend,
         query=query,
         folder_id=folder_id,
-        folder_name=folder_name
+        folder_name=folder_name,
+        page_size=page_size,
+        cursor=cursor
+    )
+
+from tool_functions import list_tree_fn
+from folder_tree import TREE_MAX_DEPTH
+
+@mcp.tool()
+async def list_tree(
+    backend: str = "google",
+    folder_id: str = None,
+    folder_name: str = None,
+    max_depth: int = TREE_MAX_DEPTH,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    cursor: str = None
+) -> str:
+    return await run_tool(
+        backend,
+        list_tree_fn,
+        backend=backend,
+        folder_id=folder_id,
+        folder_name=folder_name,
+        max_depth=max_depth,
+        page_size=page_size,
+        cursor=cursor
     )
 
 from tool_functions import get_file_fn
 @mcp.tool()
-def get_file(
+async def get_file(
     backend: str,
     file_id: str = None,
-    file_path: str = None
+    file_path: str = None,
+    offset: int = 0,
+    max_chars: int = None,
+    max_tokens: int = None
 ) -> str:
-    return get_file_fn(
+    return await run_tool(
+        backend,
+        get_file_fn,
         backend=backend,
         file_id=file_id,
-        file_path=file_path
+        file_path=file_path,
+        offset=offset,
+        max_chars=max_chars,
+        max_tokens=max_tokens
+    )
+
+from tool_functions import preview_file_fn
+from streaming import PREVIEW_BYTES
+
+@mcp.tool()
+async def preview_file(
+    backend: str,
+    file_id: str = None,
+    file_path: str = None,
+    max_bytes: int = PREVIEW_BYTES
+) -> str:
+    return await run_tool(
+        backend,
+        preview_file_fn,
+        backend=backend,
+        file_id=file_id,
+        file_path=file_path,
+        max_bytes=max_bytes
+    )
+
+from tool_functions import get_files_metadata_fn
+@mcp.tool()
+async def get_files_metadata(backend: str, file_ids: list[str] = None, file_paths: list[str] = None) -> str:
+    return await run_tool(
+        backend,
+        get_files_metadata_fn,
+        backend=backend,
+        file_ids=file_ids,
+        file_paths=file_paths
     )
 
 from tool_functions import summarize_file_fn
 @mcp.tool()
-def summarize_file(backend: str, file_id: str = None, file_path: str = None):
-    return summarize_file_fn(
+async def summarize_file(backend: str, file_id: str = None, file_path: str = None):
+    return await run_tool(
+        backend,
+        summarize_file_fn,
         backend=backend,
         file_id=file_id,
         file_path=file_path
+    )
+
+from tool_functions import search_content_fn
+@mcp.tool()
+async def search_content(query: str, backend: str = "all", limit: int = 10) -> str:
+    return await run_tool(
+        None,
+        search_content_fn,
+        backend=backend,
+        query=query,
+        limit=limit
+    )
+
+from tool_functions import semantic_search_fn
+@mcp.tool()
+async def semantic_search(query: str, backend: str = "all", limit: int = 5) -> str:
+    return await run_tool(
+        None,
+        semantic_search_fn,
+        backend=backend,
+        query=query,
+        limit=limit
     )
\ No newline at end of file
@@ -0,0 +1,140 @@
+import codecs
+import os
+import tempfile
+
+from googleapiclient.errors import HttpError
+from googleapiclient.http import MediaIoBaseDownload
+
+from dotenv import load_dotenv
+load_dotenv()
+
+MAX_DOWNLOAD_BYTES = int(os.getenv("MAX_DOWNLOAD_BYTES", str(50 * 1024 * 1024)))
+SPOOL_MEMORY_BYTES = int(os.getenv("SPOOL_MEMORY_BYTES", str(1024 * 1024)))
+DOWNLOAD_CHUNK_BYTES = 1024 * 1024
+PREVIEW_BYTES = int(os.getenv("PREVIEW_BYTES", "4096"))
+
+
+class FileTooLargeError(Exception):
+    def __init__(self, size, limit=MAX_DOWNLOAD_BYTES):
+        self.size = size
+        self.limit = limit
+        super().__init__(
+            f"File is larger than the {limit / (1024 * 1024):.1f} MB download limit"
+            + (f" ({size / (1024 * 1024):.1f} MB)" if size else "")
+        )
+
+
+def new_spool():
+    """Buffer in memory up to SPOOL_MEMORY_BYTES, then roll over to disk."""
+    return tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES)
+
+
+def check_size(size, limit=MAX_DOWNLOAD_BYTES):
+    if size is not None and int(size) > limit:
+        raise FileTooLargeError(int(size), limit)
+
+
+def spool_drive_request(request, limit=MAX_DOWNLOAD_BYTES):
+    spool = new_spool()
+    try:
+        downloader = MediaIoBaseDownload(spool, request, chunksize=DOWNLOAD_CHUNK_BYTES)
+        done = False
+        while not done:
+            _, done = downloader.next_chunk()
+            if spool.tell() > limit:
+                raise FileTooLargeError(spool.tell(), limit)
+    except Exception:
+        spool.close()
+        raise
+
+    spool.seek(0)
+    return spool
+
+
+def spool_dropbox_download(dbx, path, limit=MAX_DOWNLOAD_BYTES):
+    md, response = dbx.files_download(path)
+    spool = new_spool()
+
+    try:
+        check_size(getattr(md, "size", None), limit)
+        total = 0
+        for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_BYTES):
+            total += len(chunk)
+            if total > limit:
+                raise FileTooLargeError(total, limit)
+            spool.write(chunk)
+    except Exception:
+        spool.close()
+        raise
+    finally:
+        response.close()
+
+    spool.seek(0)
+    return md, spool
+
+
+def range_header(length):
+    return {"Range": f"bytes=0-{length - 1}"}
+
+
+def read_drive_prefix(service, file_id, length=PREVIEW_BYTES, size=None):
+    """
+    First `length` bytes of a Drive file via an HTTP Range request. An
+    empty file has no byte 0 to range over, so Drive answers 416; that, or
+    a known size of 0, is read as no bytes.
+    """
+    if size is not None and int(size) == 0:
+        return b""
+
+    request = service.files().get_media(fileId=file_id)
+    request.headers.update(range_header(length))
+    try:
+        return request.execute()[:length]
+    except HttpError as e:
+        if e.resp.status == 416:
+            return b""
+        raise
+
+
+def read_dropbox_prefix(dbx, path, length=PREVIEW_BYTES):
+    """
+    First `length` bytes of a Dropbox file via an HTTP Range request. The
+    body is read only up to `length`, so a server that ignores Range still
+    costs no more than that.
+    """
+    md, response = dbx.files_download(path, extra_headers=range_header(length))
+    data = bytearray()
+
+    try:
+        for chunk in response.iter_content(chunk_size=min(length, DOWNLOAD_CHUNK_BYTES)):
+            data.extend(chunk)
+            if len(data) >= length:
+                break
+    finally:
+        response.close()
+
+    return md, bytes(data[:length])
+
+
+def complete_utf8_prefix(data):
+    """Drop a multi-byte character cut in half at the end of a byte range."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    decoder.decode(data)
+    pending = decoder.getstate()[0]
+    return data[:len(data) - len(pending)]
+
+
+def decode_text(fileobj, errors="replace"):
+    """Decode UTF-8 chunk by chunk so multi-byte characters split across
+    chunk boundaries are handled without reading the raw bytes at once."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors=errors)
+    parts = []
+
+    while True:
+        chunk = fileobj.read(DOWNLOAD_CHUNK_BYTES)
+        if not chunk:
+            break
+        parts.append(decoder.decode(chunk))
+
+    parts.append(decoder.decode(b"", final=True))
+    return "".join(parts)
@@ -0,0 +1,164 @@
+import hashlib
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from chunking import compute_boundaries
+from text_cache import text_cache, make_cache_key
+
+from dotenv import load_dotenv
+load_dotenv()
+
+SUMMARY_CLIENT = os.getenv("SUMMARY_CLIENT", "auto").lower()
+SUMMARY_MODEL = os.getenv("SUMMARY_MODEL", "gpt-4o-mini")
+SUMMARY_CHUNK_CHARS = int(os.getenv("SUMMARY_CHUNK_CHARS", "12000"))
+SUMMARY_MAX_TOKENS = int(os.getenv("SUMMARY_MAX_TOKENS", "400"))
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "4"))
+SUMMARY_TIMEOUT_SECONDS = float(os.getenv("SUMMARY_TIMEOUT_SECONDS", "60"))
+
+# Bump when the prompts change so cached summaries are not reused.
+PROMPT_VERSION = "1"
+
+MAP_PROMPT = (
+    "Summarize this section of the document '{name}' in a few sentences. "
+    "Keep names, numbers, dates and decisions.\n\n{text}"
+)
+REDUCE_PROMPT = (
+    "These are summaries of consecutive sections of the document '{name}'. "
+    "Combine them into one coherent summary of the whole document.\n\n{text}"
+)
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+_executor = ThreadPoolExecutor(max_workers=SUMMARY_CONCURRENCY, thread_name_prefix="summary")
+
+
+class OpenAISummaryClient:
+    def __init__(self, model=SUMMARY_MODEL):
+        from openai import OpenAI
+
+        self.model = model
+        self._client = OpenAI(timeout=SUMMARY_TIMEOUT_SECONDS)
+
+    def complete(self, prompt, max_tokens):
+        response = self._client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=max_tokens,
+        )
+        return response.choices[0].message.content.strip()
+
+
+class StubSummaryClient:
+    """
+    Offline client: keeps the first sentences of the section it is given.
+    Used when no LLM is configured, and in tests.
+    """
+
+    model = "stub"
+
+    def complete(self, prompt, max_tokens):
+        text = prompt.split("\n\n", 1)[-1]
+        budget = max_tokens * 4
+        sentences = []
+
+        for sentence in _SENTENCE_RE.split(" ".join(text.split())):
+            if sum(len(s) + 1 for s in sentences) + len(sentence) > budget:
+                break
+            sentences.append(sentence)
+
+        return " ".join(sentences) or text[:budget]
+
+
+def default_client():
+    if SUMMARY_CLIENT == "stub":
+        return StubSummaryClient()
+    if SUMMARY_CLIENT == "openai" or os.getenv("OPENAI_API_KEY"):
+        try:
+            return OpenAISummaryClient()
+        except ImportError:
+            if SUMMARY_CLIENT == "openai":
+                raise
+    return StubSummaryClient()
+
+
+class Summarizer:
+    """
+    Map-reduce summarization over paragraph-aligned chunks.
+
+    Each chunk is summarized concurrently (map), then the chunk summaries
+    are summarized together (reduce). If the joined summaries are still
+    longer than one chunk the reduce step repeats on them, so any document
+    size ends in a single summary. A round that does not reduce the number
+    of chunks ends the loop with one reduce over truncated summaries.
+
+    Every call is cached by a hash of its input text and document name,
+    the model and the prompt version: an unchanged document is free and an
+    edited one only re-summarizes the chunks that changed.
+    """
+
+    def __init__(self, client=None, chunk_chars=SUMMARY_CHUNK_CHARS, max_tokens=SUMMARY_MAX_TOKENS):
+        self.client = client or default_client()
+        self.chunk_chars = chunk_chars
+        self.max_tokens = max_tokens
+
+    def summarize(self, text, name=""):
+        summaries = self._map(MAP_PROMPT, self._split(text), name)
+
+        while len(summaries) > 1:
+            joined = "\n\n".join(summaries)
+            if len(joined) <= self.chunk_chars:
+                return self._complete(REDUCE_PROMPT, joined, name)
+
+            chunks = self._split(joined)
+            if len(chunks) >= len(summaries):
+                # Summaries as long as the chunks they came from (max_tokens
+                # allows more than chunk_chars) would never converge: reduce
+                # once, over an equal share of each summary.
+                return self._complete(REDUCE_PROMPT, self._fit(summaries), name)
+            summaries = self._map(REDUCE_PROMPT, chunks, name)
+
+        return summaries[0] if summaries else ""
+
+    def _fit(self, summaries):
+        share = max(1, self.chunk_chars // len(summaries) - 2)
+        return "\n\n".join(summary[:share] for summary in summaries)[:self.chunk_chars]
+
+    def _split(self, text):
+        starts = compute_boundaries(text, self.chunk_chars)
+        ends = starts[1:] + [len(text)]
+        return [text[start:end] for start, end in zip(starts, ends) if text[start:end].strip()]
+
+    def _map(self, template, chunks, name):
+        if len(chunks) == 1:
+            return [self._complete(template, chunks[0], name)]
+        futures = [_executor.submit(self._complete, template, chunk, name) for chunk in chunks]
+        return [future.result() for future in futures]
+
+    def _complete(self, template, text, name):
+        # The prompt names the document, so the same text under another
+        # name is a different call.
+        digest = hashlib.sha256(f"{name}\0{text}".encode("utf-8")).hexdigest()
+        key = None
+
+        if text_cache is not None:
+            version = f"{self.client.model}:{PROMPT_VERSION}:{template == MAP_PROMPT}:{self.max_tokens}"
+            key = make_cache_key("summary", digest, version)
+            cached = text_cache.get(key)
+            if cached is not None:
+                return cached
+
+        summary = self.client.complete(template.format(name=name, text=text), self.max_tokens)
+
+        if key is not None:
+            text_cache.put(key, summary)
+        return summary
+
+
+_summarizer = None
+
+
+def get_summarizer():
+    global _summarizer
+    if _summarizer is None:
+        _summarizer = Summarizer()
+    return _summarizer
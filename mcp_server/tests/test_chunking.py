@@ -0,0 +1,56 @@
+import random
+
+import chunking
+from chunking import compute_boundaries, get_boundaries, get_chunk
+
+
+def chunks_of(text, max_chars):
+    starts = compute_boundaries(text, max_chars)
+    ends = starts[1:] + [len(text)]
+    return [text[start:end] for start, end in zip(starts, ends)]
+
+
+def test_separator_at_limit_does_not_overflow():
+    text = "a" * 10 + "\n" + "b" * 20
+    assert all(len(chunk) <= 10 for chunk in chunks_of(text, 10))
+
+    text = "a" * 10 + " " + "b" * 20
+    assert all(len(chunk) <= 10 for chunk in chunks_of(text, 10))
+
+
+def test_chunks_never_exceed_max_chars_and_cover_text():
+    rng = random.Random(0)
+    for _ in range(200):
+        text = "".join(rng.choice("ab \n") for _ in range(rng.randint(0, 400)))
+        max_chars = rng.randint(1, 50)
+        chunks = chunks_of(text, max_chars)
+        assert "".join(chunks) == text
+        assert all(len(chunk) <= max_chars for chunk in chunks)
+
+
+def test_prefers_paragraph_breaks():
+    text = "first paragraph\nsecond one here"
+    assert chunks_of(text, 20) == ["first paragraph\n", "second one here"]
+
+
+def test_boundaries_cached_by_file_identity():
+    chunking._boundary_cache.clear()
+    key = ("google", "file-1", "v1")
+
+    first = get_boundaries("x" * 500, 200, key)
+    # Same identity is served from the cache without looking at the text.
+    assert get_boundaries("", 200, key) is first
+    assert get_boundaries("x" * 500, 300, key) is not first
+
+    get_boundaries("y" * 500, 200)
+    assert len(chunking._boundary_cache) == 2
+
+
+def test_get_chunk_reports_next_offset():
+    text = "para one\n" * 100
+    chunk, info = get_chunk(text, 0, max_chars=200, key=("local", "/a.txt", "1:900"))
+    assert len(chunk) <= 200
+    assert info["next_offset"] == info["end"] == len(chunk)
+
+    rest, info = get_chunk(text, info["next_offset"], max_chars=200)
+    assert text.startswith(chunk + rest)
@@ -0,0 +1,52 @@
+from content_index import ContentIndex
+
+
+class FakeMirror:
+    def __init__(self, files):
+        self.files = files
+
+    def ensure_fresh(self, backend):
+        return True
+
+    def all_files(self, backend):
+        return [
+            {"id": file_id, "name": name, "mime_type": "text/plain", "modified_time": version}
+            for file_id, (name, version) in self.files.items()
+        ]
+
+
+class CountingReader:
+    def __init__(self, texts):
+        self.texts = texts
+        self.reads = []
+
+    def __call__(self, backend, file_id):
+        self.reads.append(file_id)
+        return self.texts.get(file_id)
+
+
+def test_unreadable_file_is_skipped_until_it_changes(tmp_path):
+    index = ContentIndex(str(tmp_path / "content.sqlite3"))
+    mirror = FakeMirror({"a": ("a.txt", "v1"), "bad": ("bad.txt", "v1")})
+    read = CountingReader({"a": "alpha text"})
+
+    index.refresh_backend("local", mirror, read)
+    index.refresh_backend("local", mirror, read)
+    assert sorted(read.reads) == ["a", "bad"]
+    assert index.doc_count(["local"]) == 1
+
+    mirror.files["bad"] = ("bad.txt", "v2")
+    read.texts["bad"] = "fixed text"
+    index.refresh_backend("local", mirror, read)
+    assert read.reads[-1] == "bad"
+    assert [r["file_id"] for r in index.search("fixed", ["local"])] == ["bad"]
+
+
+def test_deleted_failed_file_is_forgotten(tmp_path):
+    index = ContentIndex(str(tmp_path / "content.sqlite3"))
+    mirror = FakeMirror({"bad": ("bad.txt", "v1")})
+    index.refresh_backend("local", mirror, CountingReader({}))
+
+    mirror.files.clear()
+    index.refresh_backend("local", mirror, CountingReader({}))
+    assert index._query("SELECT * FROM failed", ()) == []
@@ -0,0 +1,38 @@
+import folder_index
+from folder_index import FolderIndex, _Snapshot
+
+
+class CountingIndex(FolderIndex):
+    """Builds live snapshots from a fixed folder list and counts the builds."""
+
+    def __init__(self, folders):
+        super().__init__()
+        self.folders = folders
+        self.loads = 0
+
+    def _load(self, backend):
+        self.loads += 1
+        return _Snapshot(self.folders)
+
+
+def folder(name, path):
+    return {"id": path, "name": name, "path": path, "modified": None}
+
+
+def test_exact_and_approximate_matches_are_reported():
+    index = CountingIndex([folder("Reports", "/reports"), folder("Receipts 2024", "/receipts 2024")])
+
+    assert index.resolve("local", "reports") == ("/reports", "Reports", True)
+    assert index.resolve("local", "Receipts") == ("/receipts 2024", "Receipts 2024", False)
+    assert index.resolve("local", "Reprots") == ("/reports", "Reports", False)
+
+
+def test_misses_rebuild_at_most_once_per_interval(monkeypatch):
+    monkeypatch.setattr(folder_index, "MISS_REFRESH_SECONDS", 60)
+    index = CountingIndex([folder("Reports", "/reports")])
+
+    for _ in range(5):
+        assert index.resolve("local", "no such folder") is None
+
+    # The first build, plus one forced rebuild for the first miss.
+    assert index.loads == 2
@@ -0,0 +1,100 @@
+import pytest
+
+import rate_limit
+from rate_limit import RateLimiter, TokenBucket
+
+
+class FakeClock:
+    """Stands in for the time module; sleeping only advances the clock."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(round(seconds, 6))
+        self.now += seconds
+
+
+class Throttled(Exception):
+    pass
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit, "time", clock)
+    # Take the top of each jitter range so the backoff is predictable.
+    monkeypatch.setattr(rate_limit.random, "uniform", lambda low, high: high)
+    return clock
+
+
+def throttled_hint(error):
+    return 0 if isinstance(error, Throttled) else None
+
+
+def test_bucket_refills_at_the_configured_rate(clock):
+    bucket = TokenBucket(rate=4, burst=2)
+
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0
+    # The burst is spent; the next token arrives 1 / rate later.
+    assert bucket.acquire() == 0.25
+
+    # 0.375s later there are 1.5 tokens: one is free, the next is half a
+    # token (0.125s) away.
+    clock.now += 0.375
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0.125
+
+    # Idle time refills only up to the burst.
+    clock.now += 10
+    assert [bucket.acquire() for _ in range(3)] == [0, 0, 0.25]
+
+
+def test_throttled_call_is_retried_with_backoff(clock):
+    limiter = RateLimiter(limits={"dropbox": (100, 100)}, max_retries=5)
+    attempts = []
+
+    def fn():
+        attempts.append(clock.now)
+        if len(attempts) < 3:
+            raise Throttled()
+        return "ok"
+
+    assert limiter.call("dropbox", "cred", fn, throttled_hint) == "ok"
+    assert clock.sleeps == [0.5, 1.0]
+    assert limiter.stats()["dropbox"]["retries"] == 2
+
+
+def test_throttled_call_gives_up_after_max_retries(clock):
+    limiter = RateLimiter(limits={"dropbox": (100, 100)}, max_retries=3)
+    attempts = []
+
+    def fn():
+        attempts.append(clock.now)
+        raise Throttled()
+
+    with pytest.raises(Throttled):
+        limiter.call("dropbox", "cred", fn, throttled_hint)
+
+    assert len(attempts) == 4
+    assert clock.sleeps == [0.5, 1.0, 2.0]
+    assert limiter.stats()["dropbox"]["gave_up"] == 1
+
+
+def test_final_errors_are_not_retried(clock):
+    limiter = RateLimiter(limits={"dropbox": (100, 100)}, max_retries=3)
+    attempts = []
+
+    def fn():
+        attempts.append(clock.now)
+        raise ValueError("bad path")
+
+    with pytest.raises(ValueError):
+        limiter.call("dropbox", "cred", fn, throttled_hint)
+
+    assert len(attempts) == 1
@@ -0,0 +1,42 @@
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+from streaming import read_drive_prefix
+
+
+class FakeRequest:
+    def __init__(self, status, body=b""):
+        self.headers = {}
+        self.status = status
+        self.body = body
+
+    def execute(self):
+        if self.status != 200:
+            raise HttpError(httplib2.Response({"status": self.status}), b"")
+        return self.body
+
+
+class FakeService:
+    def __init__(self, request):
+        self.request = request
+
+    def files(self):
+        return self
+
+    def get_media(self, fileId):
+        return self.request
+
+
+def test_prefix_of_empty_drive_file_is_empty():
+    assert read_drive_prefix(FakeService(FakeRequest(416)), "id", 10) == b""
+    assert read_drive_prefix(FakeService(FakeRequest(500)), "id", 10, size="0") == b""
+
+
+def test_prefix_reads_range_and_reraises_other_errors():
+    request = FakeRequest(200, b"0123456789abc")
+    assert read_drive_prefix(FakeService(request), "id", 10) == b"0123456789"
+    assert request.headers["Range"] == "bytes=0-9"
+
+    with pytest.raises(HttpError):
+        read_drive_prefix(FakeService(FakeRequest(404)), "id", 10)
@@ -0,0 +1,78 @@
+import pytest
+
+import summarizer
+from summarizer import MAP_PROMPT, Summarizer, StubSummaryClient
+from text_cache import TextCache
+
+
+class RecordingClient(StubSummaryClient):
+    """The stub client, recording whether each call was a map or a reduce."""
+
+    def __init__(self):
+        self.calls = []
+
+    def complete(self, prompt, max_tokens):
+        self.calls.append("map" if prompt.startswith(MAP_PROMPT.split("{")[0]) else "reduce")
+        return super().complete(prompt, max_tokens)
+
+
+def document(paragraphs, sentences=8):
+    return "\n\n".join(
+        " ".join(f"Paragraph {p} sentence {s} has some words." for s in range(sentences))
+        for p in range(paragraphs)
+    )
+
+
+@pytest.fixture(autouse=True)
+def no_cache(monkeypatch):
+    monkeypatch.setattr(summarizer, "text_cache", None)
+
+
+def test_short_text_is_one_map_call():
+    client = RecordingClient()
+    summary = Summarizer(client, chunk_chars=2000, max_tokens=50).summarize("One sentence. Two sentences.")
+
+    assert summary == "One sentence. Two sentences."
+    assert client.calls == ["map"]
+
+
+def test_long_text_maps_each_chunk_then_reduces():
+    client = RecordingClient()
+    summary = Summarizer(client, chunk_chars=1000, max_tokens=20).summarize(document(20))
+
+    assert client.calls.count("map") > 1
+    assert client.calls[-1] == "reduce"
+    assert summary.startswith("Paragraph 0 sentence 0")
+
+
+def test_reduce_stops_when_summaries_do_not_shrink():
+    # Summaries may be up to 2000 characters, so chunks of 1000 come back
+    # unchanged and repeated reduce rounds would never converge.
+    client = RecordingClient()
+    summary = Summarizer(client, chunk_chars=1000, max_tokens=500).summarize("x" * 20000 + ". " + document(40))
+
+    assert summary
+    assert len(client.calls) < 100
+
+
+def test_unchanged_text_is_served_from_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(summarizer, "text_cache", TextCache(str(tmp_path)))
+    text = document(20)
+
+    first = RecordingClient()
+    summary = Summarizer(first, chunk_chars=1000, max_tokens=20).summarize(text)
+    assert first.calls
+
+    second = RecordingClient()
+    assert Summarizer(second, chunk_chars=1000, max_tokens=20).summarize(text) == summary
+    assert second.calls == []
+
+
+def test_same_text_under_another_name_is_not_served_from_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(summarizer, "text_cache", TextCache(str(tmp_path)))
+
+    Summarizer(RecordingClient(), max_tokens=20).summarize("One sentence.", "a.txt")
+    client = RecordingClient()
+    Summarizer(client, max_tokens=20).summarize("One sentence.", "b.txt")
+
+    assert client.calls == ["map"]
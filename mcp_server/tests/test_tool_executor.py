@@ -0,0 +1,58 @@
+import asyncio
+import threading
+
+import tool_executor
+from tool_executor import run_tool
+
+
+class FakeClients:
+    """Hands out whatever credential id the test sets."""
+
+    def __init__(self, credential):
+        self.credential = credential
+
+    def credential_id(self, backend):
+        return self.credential
+
+
+def blocking_tool(calls, release):
+    def list_files(backend, path):
+        calls.append(path)
+        release.wait(5)
+        return f"listing of {path}"
+    return list_files
+
+
+def test_identical_concurrent_calls_run_once(monkeypatch):
+    monkeypatch.setattr(tool_executor, "clients", FakeClients("token-a"))
+    calls, release = [], threading.Event()
+    fn = blocking_tool(calls, release)
+
+    async def both():
+        first = asyncio.ensure_future(run_tool("local", fn, backend="local", path="/a"))
+        second = asyncio.ensure_future(run_tool("local", fn, backend=" LOCAL", path="/a "))
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(first, second)
+
+    assert asyncio.run(both()) == ["listing of /a", "listing of /a"]
+    assert calls == ["/a"]
+
+
+def test_calls_under_different_credentials_are_not_coalesced(monkeypatch):
+    clients = FakeClients("token-a")
+    monkeypatch.setattr(tool_executor, "clients", clients)
+    calls, release = [], threading.Event()
+    fn = blocking_tool(calls, release)
+
+    async def both():
+        first = asyncio.ensure_future(run_tool("local", fn, backend="local", path="/a"))
+        await asyncio.sleep(0.05)
+        clients.credential = "token-b"
+        second = asyncio.ensure_future(run_tool("local", fn, backend="local", path="/a"))
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(first, second)
+
+    asyncio.run(both())
+    assert calls == ["/a", "/a"]
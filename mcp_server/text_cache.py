@@ -0,0 +1,138 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from dotenv import load_dotenv
+load_dotenv()
+
+CACHE_DIR = os.getenv("TEXT_CACHE_DIR", ".text_cache")
+CACHE_MAX_BYTES = int(os.getenv("TEXT_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+TEXT_CACHE_ENABLED = os.getenv("TEXT_CACHE_ENABLED", "true").lower() not in ("0", "false", "no")
+
+
+def make_cache_key(backend, file_id, version):
+    """
+    Key extracted text by file identity plus the backend's version marker
+    (Drive modifiedTime/md5Checksum, Dropbox rev/content_hash), so a changed
+    file can never be served from a stale entry.
+    """
+    raw = f"{backend}\0{file_id}\0{version}".encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()
+
+
+class TextCache:
+    """
+    Disk-backed LRU cache of extracted document text, bounded by total bytes.
+    Entries survive restarts; recency is rebuilt from file mtimes on startup.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        self._load_existing()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self._forget(key)
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return text
+
+    def put(self, key, text):
+        data = text.encode("utf-8")
+        if len(data) > self.max_bytes:
+            return
+
+        # Best effort, like get(): a full disk or a permissions problem
+        # must not fail the read whose result is being cached.
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            print(f"Error writing text cache entry: {e}")
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+            return
+
+        with self._lock:
+            self._forget(key)
+            self._entries[key] = len(data)
+            self._total_bytes += len(data)
+            self._evict()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.txt")
+
+    def _forget(self, key):
+        size = self._entries.pop(key, None)
+        if size is not None:
+            self._total_bytes -= size
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def _load_existing(self):
+        found = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".tmp"):
+                os.remove(entry.path)
+            elif entry.name.endswith(".txt"):
+                stat = entry.stat()
+                found.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._total_bytes += size
+        self._evict()
+
+
+text_cache = TextCache() if TEXT_CACHE_ENABLED else None
@@ -0,0 +1,99 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from fastmcp.exceptions import ToolError
+
+from client_manager import clients
+
+from dotenv import load_dotenv
+load_dotenv()
+
+BACKEND_CONCURRENCY = {
+    "google": int(os.getenv("GOOGLE_MAX_CONCURRENCY", "8")),
+    "dropbox": int(os.getenv("DROPBOX_MAX_CONCURRENCY", "8")),
+    "local": int(os.getenv("LOCAL_MAX_CONCURRENCY", "8")),
+}
+SHARED_CONCURRENCY = int(os.getenv("TOOL_MAX_CONCURRENCY", "8"))
+
+_executors = {
+    backend: ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"tool-{backend}")
+    for backend, workers in BACKEND_CONCURRENCY.items()
+}
+_shared_executor = ThreadPoolExecutor(max_workers=SHARED_CONCURRENCY, thread_name_prefix="tool-shared")
+
+_inflight = {}
+coalesce_stats = {"calls": 0, "coalesced": 0}
+
+
+class ToolErrorText(str):
+    """A tool's message for a call that failed, as opposed to a result."""
+
+
+def tool_error(message):
+    return ToolErrorText(message)
+
+
+def _raise_if_error(result):
+    # Sent as an MCP result with isError set, so clients need not guess
+    # from the wording whether a call failed.
+    if isinstance(result, ToolErrorText):
+        raise ToolError(str(result))
+    return result
+
+
+def executor_for(pool):
+    """
+    Google Drive, Dropbox and local calls each get their own bounded pool,
+    so a slow backend can only tie up its own workers. Calls that span both
+    backends or only touch local indexes use the shared pool.
+    """
+    return _executors.get((pool or "").lower().strip(), _shared_executor)
+
+
+def _normalize(name, value):
+    if isinstance(value, str):
+        value = value.strip()
+        return value.lower() if name == "backend" else value
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalize(None, v) for v in value)
+    return value
+
+
+def coalesce_key(fn, kwargs):
+    backend = _normalize("backend", kwargs.get("backend") or "")
+    if backend in BACKEND_CONCURRENCY:
+        credential = clients.credential_id(backend)
+    else:
+        credential = tuple(clients.credential_id(b) for b in BACKEND_CONCURRENCY)
+
+    args = tuple(sorted((k, _normalize(k, v)) for k, v in kwargs.items()))
+    return fn.__name__, args, credential
+
+
+async def run_tool(pool, fn, **kwargs):
+    """
+    Run a blocking tool function off the event loop on the `pool` executor.
+
+    Identical calls (same function, normalized arguments and credential)
+    that arrive while one is already running share its result instead of
+    making their own upstream requests. Results are not kept once the call
+    finishes; caching is left to the layers below. A `tool_error` message
+    is raised as a ToolError so the client sees it flagged as an error.
+    """
+    key = coalesce_key(fn, kwargs)
+    coalesce_stats["calls"] += 1
+
+    future = _inflight.get(key)
+    if future is not None:
+        coalesce_stats["coalesced"] += 1
+        return _raise_if_error(await asyncio.shield(future))
+
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(executor_for(pool), functools.partial(fn, **kwargs))
+    _inflight[key] = future
+    future.add_done_callback(lambda _: _inflight.pop(key, None))
+
+    return _raise_if_error(await asyncio.shield(future))
+
@@ -1,38 +1,168 @@
 import io
+
 import dropbox
-from googleapiclient.http import MediaIoBaseDownload
-from docx import Document
 
 from drive_utils import (
     get_drive_service,
     get_first_5_folders_with_names as drive_get_first_5_folders_with_names,
-    find_folder_by_name as drive_find_folder_by_name
+    find_folder_by_name as drive_find_folder_by_name,
+    get_files_metadata as drive_get_files_metadata,
+    FILE_FIELDS as DRIVE_FILE_FIELDS
 )
 
 from dropbox_utils import (
     get_dropbox_client,
     get_first_5_folders_with_names as dbx_get_first_5_folders_with_names,
-    find_folder_by_name as dbx_find_folder_by_name
+    find_folder_by_name as dbx_find_folder_by_name,
+    get_files_metadata as dbx_get_files_metadata
+)
+
+from local_utils import (
+    is_configured as local_is_configured,
+    normalize_local_path,
+    list_folder as local_list_folder,
+    stat_file as local_stat_file,
+    get_files_metadata as local_get_files_metadata,
+    open_mapped,
+    read_prefix as local_read_prefix
+)
+
+from pagination import (
+    DEFAULT_PAGE_SIZE,
+    clamp_page_size,
+    encode_cursor,
+    decode_cursor,
+    cursor_backend,
+    format_next_cursor,
+    iter_drive_pages,
+    iter_dropbox_pages,
+    take_page
 )
 
+from metadata_index import metadata_index, INDEX_TOKEN
+from text_cache import text_cache, make_cache_key
+from content_index import content_index
+from streaming import (
+    FileTooLargeError,
+    PREVIEW_BYTES,
+    check_size,
+    spool_drive_request,
+    spool_dropbox_download,
+    read_drive_prefix,
+    read_dropbox_prefix,
+    complete_utf8_prefix
+)
+from extractors import resolve as resolve_extractor, extract, ExtractionError
+from vector_index import vector_index
+from chunking import get_chunk, format_chunk_header
+from fanout import run_concurrently, rank_hits
+from summarizer import get_summarizer
+from folder_tree import walk_tree, clamp_depth, TREE_MAX_DEPTH
+from folder_index import folder_index
+from tool_executor import tool_error
+
+BACKEND_LABELS = {"google": "Google Drive", "dropbox": "Dropbox", "local": "Local"}
+LOCAL_NOT_CONFIGURED = tool_error("[Backend: Local]\nLocal backend not configured. Set LOCAL_ROOT in mcp_server/.env")
+
+
+def all_backends():
+    """Backends covered by backend="all"; local joins once LOCAL_ROOT is set."""
+    return ["google", "dropbox"] + (["local"] if local_is_configured() else [])
+
 
-def list_files_fn(backend: str = "google", folder_id: str = None, folder_name: str = None):
+def backends_for_folder_id(folder_id):
+    """
+    The backends in all_backends() whose ids look like `folder_id`: Dropbox
+    and local ids are paths, Drive ids never contain a slash. Keeps a
+    backend="all" call from sending one backend's id to the others.
+    """
+    if folder_id is None:
+        return all_backends()
+    if "/" in folder_id:
+        return [b for b in all_backends() if b != "google"]
+    return ["google"]
+
+
+def local_find_folder(name):
+    if not local_is_configured():
+        return None
+    return folder_index.resolve("local", name)
+
+
+def with_folder_note(result, folder_name, match):
+    """Say which folder was used when `folder_name` only matched approximately."""
+    label, _, rest = result.partition("\n")
+    return f"{label}\nNo folder named '{folder_name}'; using '{match.name}'.\n{rest}"
+
+
+def result_location(backend, file_id):
+    if backend == "google":
+        return f"Backend: Google Drive, ID: {file_id}"
+    return f"Backend: {BACKEND_LABELS[backend]}, Path: {file_id}"
+
+
+def use_metadata_index(backend, client, token, offset):
+    if metadata_index is None:
+        return False
+    if token == INDEX_TOKEN:
+        return True
+    if token is None and offset == 0:
+        return metadata_index.ensure_fresh(backend, client)
+    return False
+
+
+def list_files_fn(
+    backend: str = "google",
+    folder_id: str = None,
+    folder_name: str = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    cursor: str = None
+):
     backend = backend.lower().strip()
+    page_size = clamp_page_size(page_size)
+
+    if backend == "all" and cursor:
+        # Each section of an "all" listing carries its own backend's
+        # cursor; continue on that backend alone.
+        try:
+            return list_files_fn(cursor_backend(cursor), page_size=page_size, cursor=cursor)
+        except ValueError as e:
+            return tool_error(f"[Backend: All]\nInvalid cursor: {e}")
+
+    if backend == "all":
+        tasks = [
+            (b, list_files_fn, (b, folder_id, folder_name, page_size))
+            for b in backends_for_folder_id(folder_id)
+        ]
+        sections = []
+        for (b, _, _), (result, error) in zip(tasks, run_concurrently(tasks)):
+            sections.append(result if error is None else f"[Backend: {BACKEND_LABELS[b]}]\nError: {error}")
+        return "\n\n".join(sections)
 
     if backend == "google":
         service = get_drive_service()
-        folder_ids = []
+        token, offset = None, 0
 
-        if folder_name:
-            target_folder_id = drive_find_folder_by_name(service, folder_name)
-            if not target_folder_id:
+        if cursor:
+            try:
+                state = decode_cursor(cursor, "google")
+            except ValueError as e:
+                return tool_error(f"[Backend: Google Drive]\nInvalid cursor: {e}")
+            f_id, token, offset = state["folder"], state["token"], state["offset"]
+            page_size = state["page_size"] or page_size
+
+        elif folder_name:
+            match = drive_find_folder_by_name(service, folder_name)
+            if not match:
                 folders = drive_get_first_5_folders_with_names(service)
                 names = [f["name"] for f in folders]
-                return f"[Backend: Google Drive]\nFolder '{folder_name}' not found. Available: {', '.join(names)}"
-            folder_ids = [target_folder_id]
+                return tool_error(f"[Backend: Google Drive]\nFolder '{folder_name}' not found. Available: {', '.join(names)}")
+            if not match.exact:
+                return with_folder_note(list_files_fn("google", match.id, page_size=page_size), folder_name, match)
+            f_id = match.id
 
         elif folder_id:
-            folder_ids = [folder_id]
+            f_id = folder_id
 
         else:
             folders = drive_get_first_5_folders_with_names(service)
@@ -44,22 +174,34 @@ def list_files_fn(backend: str = "google", folder_id: str = None, folder_name: s
                 msg += f"- {f['name']} (ID: {f['id']})\n"
             return msg
 
-        results_text = []
-        for f_id in folder_ids[:5]:
-            try:
-                results = service.files().list(
+        try:
+            if use_metadata_index("google", service, token, offset):
+                files, position = metadata_index.list_children("google", f_id, page_size, offset)
+                # The mirror cannot tell an empty folder from a wrong id;
+                # the live listing would have failed on the latter.
+                if not files and not offset and f_id != "root" and not metadata_index.has_folder("google", f_id):
+                    return tool_error(f"[Backend: Google Drive]\nError: Folder '{f_id}' not found or inaccessible.")
+            else:
+                pages = iter_drive_pages(
+                    service,
                     q=f"'{f_id}' in parents and trashed=false",
-                    pageSize=10,
-                    fields="files(id, name, mimeType)"
-                ).execute()
+                    fields="id, name, mimeType",
+                    page_size=page_size,
+                    page_token=token
+                )
+                files, position = take_page(pages, page_size, offset)
+        except Exception as e:
+            return tool_error(f"[Backend: Google Drive]\nError: {e}")
+
+        results_text = [f"[Backend: Google Drive]\nGoogle Folder: {f_id}\n"]
+        for f in files:
+            results_text.append(f"- {f['name']} (ID: {f['id']})")
 
-                files = results.get("files", [])
-                results_text.append(f"\n[Backend: Google Drive]\nGoogle Folder: {f_id}\n")
+        if not files:
+            results_text.append("This folder is empty.")
 
-                for f in files:
-                    results_text.append(f"- {f['name']} (ID: {f['id']})")
-            except Exception as e:
-                results_text.append(f"[Backend: Google Drive]\nError: {e}")
+        if position:
+            results_text.append(format_next_cursor(encode_cursor("google", f_id, position, page_size=page_size)))
 
         return "\n".join(results_text)
 
@@ -69,19 +211,31 @@ def list_files_fn(backend: str = "google", folder_id: str = None, folder_name: s
         except RuntimeError as e:
             error_msg = str(e)
             if "DROPBOX_ACCESS_TOKEN is missing" in error_msg:
-                return "[Backend: Dropbox]\nDropbox access not configured. Add DROPBOX_ACCESS_TOKEN to mcp_server/.env"
-            return f"[Backend: Dropbox]\nDropbox authentication error: {error_msg}"
+                return tool_error("[Backend: Dropbox]\nDropbox access not configured. Add DROPBOX_ACCESS_TOKEN to mcp_server/.env")
+            return tool_error(f"[Backend: Dropbox]\nDropbox authentication error: {error_msg}")
         except Exception as e:
-            return f"[Backend: Dropbox]\nError connecting to Dropbox: {str(e)}"
+            return tool_error(f"[Backend: Dropbox]\nError connecting to Dropbox: {str(e)}")
 
-        target_path = None
+        target_path = ""
+        token, offset = None, 0
 
-        if folder_name:
-            target_path = dbx_find_folder_by_name(dbx, folder_name)
-            if not target_path:
+        if cursor:
+            try:
+                state = decode_cursor(cursor, "dropbox")
+            except ValueError as e:
+                return tool_error(f"[Backend: Dropbox]\nInvalid cursor: {e}")
+            target_path, token, offset = state["folder"], state["token"], state["offset"]
+            page_size = state["page_size"] or page_size
+
+        elif folder_name:
+            match = dbx_find_folder_by_name(dbx, folder_name)
+            if not match:
                 folders = dbx_get_first_5_folders_with_names(dbx)
                 names = [f["name"] for f in folders]
-                return f"[Backend: Dropbox]\nDropbox folder '{folder_name}' not found. Available: {', '.join(names)}"
+                return tool_error(f"[Backend: Dropbox]\nDropbox folder '{folder_name}' not found. Available: {', '.join(names)}")
+            if not match.exact:
+                return with_folder_note(list_files_fn("dropbox", match.id, page_size=page_size), folder_name, match)
+            target_path = match.id
 
         elif folder_id:
             target_path = folder_id.strip()
@@ -89,143 +243,182 @@ def list_files_fn(backend: str = "google", folder_id: str = None, folder_name: s
                 target_path = "/" + target_path
             target_path = target_path.lower()
 
-        if not target_path:
-            try:
-                result = dbx.files_list_folder("", recursive=False)
+        try:
+            if use_metadata_index("dropbox", dbx, token, offset):
+                rows, position = metadata_index.list_children("dropbox", target_path, page_size, offset)
+                if not rows and not offset and target_path and not metadata_index.has_folder("dropbox", target_path):
+                    return tool_error(f"[Backend: Dropbox]\nError: Path '{target_path}' not found or inaccessible.")
+                folders = [(r["name"], r["id"]) for r in rows if r["is_folder"]]
+                files = [(r["name"], r["id"]) for r in rows if not r["is_folder"]]
+            else:
+                pages = iter_dropbox_pages(dbx, target_path, page_size, cursor=token)
+                entries, position = take_page(pages, page_size, offset)
+                folders = [(e.name, e.path_lower) for e in entries if isinstance(e, dropbox.files.FolderMetadata)]
+                files = [(e.name, e.path_lower) for e in entries if isinstance(e, dropbox.files.FileMetadata)]
+        except Exception as e:
+            error_str = str(e)
+            if not target_path:
+                return tool_error(f"[Backend: Dropbox]\nError listing Dropbox root: {error_str}")
+            if "not_found" in error_str.lower() or "not found" in error_str.lower():
+                return tool_error(f"[Backend: Dropbox]\nError: Path '{target_path}' not found or inaccessible.")
+            return tool_error(f"[Backend: Dropbox]\nError accessing Dropbox folder: {error_str}")
 
-                folders = []
-                files = []
+        if target_path:
+            msg = f"[Backend: Dropbox]\nDropbox Folder: {target_path}\n\n"
+        else:
+            msg = "[Backend: Dropbox]\nDropbox Root Contents:\n\n"
 
-                for entry in result.entries:
-                    if isinstance(entry, dropbox.files.FolderMetadata):
-                        folders.append(entry)
-                    elif isinstance(entry, dropbox.files.FileMetadata):
-                        files.append(entry)
+        if folders:
+            msg += "Folders:\n"
+            for name, path in folders:
+                msg += f"- {name} (Use folder_id: '{path}' to open)\n"
 
-                msg = "[Backend: Dropbox]\nDropbox Root Contents:\n\n"
+        if files:
+            msg += "\nFiles:\n"
+            for name, path in files:
+                msg += f"- {name} (Path: {path})\n"
 
-                if folders:
-                    msg += f"Folders (showing first {min(len(folders), 10)}):\n"
-                    for f in folders[:10]:
-                        msg += f"- {f.name} (Use folder_id: '{f.path_lower}' to open)\n"
-                    if len(folders) > 10:
-                        msg += f"\n... and {len(folders) - 10} more folders\n"
+        if not folders and not files:
+            msg += "Root folder is empty.\n" if not target_path else "This folder is empty.\n"
 
-                if files:
-                    msg += "\nFiles:\n"
-                    for f in files[:10]:
-                        msg += f"- {f.name}\n"
-                    if len(files) > 10:
-                        msg += f"\n... and {len(files) - 10} more files\n"
+        if position:
+            msg += format_next_cursor(encode_cursor("dropbox", target_path, position, page_size=page_size))
 
-                if not folders and not files:
-                    msg += "Root folder is empty.\n"
+        return msg
 
-                return msg
+    elif backend == "local":
+        if not local_is_configured():
+            return LOCAL_NOT_CONFIGURED
 
-            except Exception as e:
-                return f"[Backend: Dropbox]\nError listing Dropbox root: {e}"
+        target_path, offset = "", 0
 
-        try:
-            result = dbx.files_list_folder(target_path, recursive=False)
+        if cursor:
+            try:
+                state = decode_cursor(cursor, "local")
+            except ValueError as e:
+                return tool_error(f"[Backend: Local]\nInvalid cursor: {e}")
+            target_path, offset = state["folder"], state["offset"]
+            page_size = state["page_size"] or page_size
+
+        elif folder_name:
+            match = local_find_folder(folder_name)
+            if match is None:
+                names = folder_index.suggest("local", folder_name)
+                return tool_error(f"[Backend: Local]\nLocal folder '{folder_name}' not found. Similar: {', '.join(names)}")
+            if not match.exact:
+                return with_folder_note(list_files_fn("local", match.id, page_size=page_size), folder_name, match)
+            target_path = match.id
 
-            folders = []
-            files = []
+        elif folder_id:
+            target_path = normalize_local_path(folder_id)
 
-            for entry in result.entries:
-                if isinstance(entry, dropbox.files.FolderMetadata):
-                    folders.append(entry)
-                elif isinstance(entry, dropbox.files.FileMetadata):
-                    files.append(entry)
+        try:
+            entries = local_list_folder(target_path)
+        except Exception as e:
+            return tool_error(f"[Backend: Local]\nError listing local folder '{target_path or '/'}': {e}")
 
-            msg = f"[Backend: Dropbox]\nDropbox Folder: {target_path}\n\n"
+        page = entries[offset:offset + page_size]
+        folders = [e for e in page if e["is_folder"]]
+        files = [e for e in page if not e["is_folder"]]
 
-            if folders:
-                msg += "Folders:\n"
-                for f in folders[:10]:
-                    msg += f"- {f.name} (Use folder_id: '{f.path_lower}' to open)\n"
+        msg = f"[Backend: Local]\nLocal Folder: {target_path or '/'}\n\n"
 
-            if files:
-                msg += "\nFiles:\n"
-                for f in files[:10]:
-                    msg += f"- {f.name}\n"
+        if folders:
+            msg += "Folders:\n"
+            for e in folders:
+                msg += f"- {e['name']} (Use folder_id: '{e['id']}' to open)\n"
 
-            if not folders and not files:
-                msg += "This folder is empty.\n"
+        if files:
+            msg += "\nFiles:\n"
+            for e in files:
+                msg += f"- {e['name']} (Path: {e['id']})\n"
 
-            return msg
+        if not page:
+            msg += "This folder is empty.\n"
 
-        except Exception as e:
-            error_str = str(e)
-            if "not_found" in error_str.lower() or "not found" in error_str.lower():
-                return f"[Backend: Dropbox]\nError: Path '{target_path}' not found or inaccessible."
-            return f"[Backend: Dropbox]\nError accessing Dropbox folder: {error_str}"
+        if offset + page_size < len(entries):
+            msg += format_next_cursor(encode_cursor("local", target_path, (None, offset + page_size), page_size=page_size))
+
+        return msg
 
-    return "Invalid backend."
+    return tool_error("Invalid backend.")
 
 
-def search_files_fn(backend: str = "google", query: str = "", folder_id: str = None, folder_name: str = None):
+def search_files_fn(
+    backend: str = "google",
+    query: str = "",
+    folder_id: str = None,
+    folder_name: str = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    cursor: str = None
+):
     backend = backend.lower().strip()
     query = query.lower().strip()
+    page_size = clamp_page_size(page_size)
+
+    if backend == "all" and cursor:
+        try:
+            return search_files_fn(cursor_backend(cursor), page_size=page_size, cursor=cursor)
+        except ValueError as e:
+            return tool_error(f"[Backend: All]\nInvalid cursor: {e}")
+
+    if backend == "all":
+        return search_fan_out(backends_for_folder_id(folder_id), query, folder_id, folder_name, page_size)
 
     if backend == "google":
         service = get_drive_service()
-        folder_ids = []
+        token, offset = None, 0
 
-        if folder_name:
-            target_folder_id = drive_find_folder_by_name(service, folder_name)
-            if not target_folder_id:
+        if cursor:
+            try:
+                state = decode_cursor(cursor, "google")
+            except ValueError as e:
+                return tool_error(f"[Backend: Google Drive]\nInvalid cursor: {e}")
+            f_id, query = state["folder"], state["query"] or ""
+            token, offset = state["token"], state["offset"]
+            page_size = state["page_size"] or page_size
+
+        elif folder_name:
+            match = drive_find_folder_by_name(service, folder_name)
+            if not match:
                 folders = drive_get_first_5_folders_with_names(service)
                 names = [f["name"] for f in folders]
-                return f"[Backend: Google Drive]\nFolder '{folder_name}' not found. Available: {', '.join(names)}"
-            folder_ids = [target_folder_id]
+                return tool_error(f"[Backend: Google Drive]\nFolder '{folder_name}' not found. Available: {', '.join(names)}")
+            if not match.exact:
+                return with_folder_note(search_files_fn("google", query, match.id, page_size=page_size), folder_name, match)
+            f_id = match.id
 
         elif folder_id:
-            folder_ids = [folder_id]
+            f_id = folder_id
 
         else:
-            folders = drive_get_first_5_folders_with_names(service)
+            return search_fan_out(["google"], query, None, None, page_size)
 
-            if not folders:
-                return "[Backend: Google Drive]\nNo folders found in Google Drive."
-
-            msg = "[Backend: Google Drive]\nFirst 5 Google Drive folders:\n\n"
-
-            for f in folders:
-                msg += f"- {f['name']} (ID: {f['id']})\n"
-
-            msg += "\nPlease specify a folder to search."
-            return msg
-
-        results_text = []
-
-        for f_id in folder_ids[:5]:
-            full_query = (
-                f"'{f_id}' in parents and "
-                f"(name contains '{query}' or fullText contains '{query}') and trashed=false"
+        try:
+            pages = iter_drive_pages(
+                service,
+                q=drive_search_query(f_id, query),
+                fields="id, name, mimeType, modifiedTime",
+                page_size=page_size,
+                page_token=token
             )
+            files, position = take_page(pages, page_size, offset)
+        except Exception as e:
+            return tool_error(f"[Backend: Google Drive]\nError searching folder {f_id}: {e}")
 
-            try:
-                results = service.files().list(
-                    q=full_query,
-                    pageSize=10,
-                    fields="files(id, name, mimeType, modifiedTime)"
-                ).execute()
-
-                files = results.get("files", [])
-                if not files:
-                    continue
+        if not files:
+            return "[Backend: Google Drive]\nNo matching files found."
 
-                results_text.append(f"\n[Backend: Google Drive]\nGoogle Folder: {f_id}\n")
-                for f in files:
-                    results_text.append(
-                        f"- {f['name']} (ID: {f['id']}, Type: {f['mimeType']})"
-                    )
+        results_text = [f"[Backend: Google Drive]\nGoogle Folder: {f_id}\n"]
+        for f in files:
+            results_text.append(
+                f"- {f['name']} (ID: {f['id']}, Type: {f['mimeType']})"
+            )
 
-            except Exception as e:
-                results_text.append(f"[Backend: Google Drive]\nError searching folder {f_id}: {e}")
+        if position:
+            results_text.append(format_next_cursor(encode_cursor("google", f_id, position, query, page_size=page_size)))
 
-        return "\n".join(results_text) if results_text else "[Backend: Google Drive]\nNo matching files found."
+        return "\n".join(results_text)
 
     elif backend == "dropbox":
         try:
@@ -233,23 +426,36 @@ def search_files_fn(backend: str = "google", query: str = "", folder_id: str = N
         except RuntimeError as e:
             error_msg = str(e)
             if "DROPBOX_ACCESS_TOKEN is missing" in error_msg:
-                return "[Backend: Dropbox]\nDropbox access not configured. Add DROPBOX_ACCESS_TOKEN to mcp_server/.env"
-            return f"[Backend: Dropbox]\nDropbox authentication error: {error_msg}"
+                return tool_error("[Backend: Dropbox]\nDropbox access not configured. Add DROPBOX_ACCESS_TOKEN to mcp_server/.env")
+            return tool_error(f"[Backend: Dropbox]\nDropbox authentication error: {error_msg}")
         except Exception as e:
-            return f"[Backend: Dropbox]\nError connecting to Dropbox: {str(e)}"
+            return tool_error(f"[Backend: Dropbox]\nError connecting to Dropbox: {str(e)}")
 
-        target_path = None
+        target_path = ""
+        token, offset = None, 0
 
-        if folder_name:
-            target_path = dbx_find_folder_by_name(dbx, folder_name)
-            if not target_path:
+        if cursor:
+            try:
+                state = decode_cursor(cursor, "dropbox")
+            except ValueError as e:
+                return tool_error(f"[Backend: Dropbox]\nInvalid cursor: {e}")
+            target_path, query = state["folder"], state["query"] or ""
+            token, offset = state["token"], state["offset"]
+            page_size = state["page_size"] or page_size
+
+        elif folder_name:
+            match = dbx_find_folder_by_name(dbx, folder_name)
+            if not match:
                 try:
                     result = dbx.files_list_folder("", recursive=False)
                     folders = [e for e in result.entries if isinstance(e, dropbox.files.FolderMetadata)]
                     names = [f.name for f in folders]
                 except:
                     names = []
-                return f"[Backend: Dropbox]\nDropbox folder '{folder_name}' not found. Available: {', '.join(names)}"
+                return tool_error(f"[Backend: Dropbox]\nDropbox folder '{folder_name}' not found. Available: {', '.join(names)}")
+            if not match.exact:
+                return with_folder_note(search_files_fn("dropbox", query, match.id, page_size=page_size), folder_name, match)
+            target_path = match.id
 
         elif folder_id:
             target_path = folder_id.strip()
@@ -258,131 +464,730 @@ def search_files_fn(backend: str = "google", query: str = "", folder_id: str = N
                 target_path = "/" + target_path
             target_path = target_path.lower()
 
-        if not target_path:
+        def matches(entry):
+            return isinstance(entry, dropbox.files.FileMetadata) and query in entry.name.lower()
+
+        try:
+            if use_metadata_index("dropbox", dbx, token, offset):
+                rows, position = metadata_index.search_names("dropbox", query, target_path, page_size, offset)
+                matched = [(r["name"], r["id"]) for r in rows]
+            else:
+                pages = iter_dropbox_pages(dbx, target_path, page_size, cursor=token)
+                entries, position = take_page(pages, page_size, offset, match=matches)
+                matched = [(e.name, e.path_lower) for e in entries]
+        except Exception as e:
+            error_str = str(e)
+            if not target_path:
+                return tool_error(f"[Backend: Dropbox]\nError searching Dropbox root: {error_str}")
+            if "not_found" in error_str.lower() or "not found" in error_str.lower():
+                return tool_error(f"[Backend: Dropbox]\nError: Path '{target_path}' not found or inaccessible.")
+            return tool_error(f"[Backend: Dropbox]\nError searching Dropbox folder: {error_str}")
+
+        if not matched:
+            if not target_path:
+                return f"[Backend: Dropbox]\nNo root Dropbox files match '{query}'."
+            return f"[Backend: Dropbox]\nNo Dropbox files in '{target_path}' match '{query}'."
+
+        if target_path:
+            msg = f"[Backend: Dropbox]\nDropbox Folder Search: {target_path}\n\n"
+        else:
+            msg = "[Backend: Dropbox]\nDropbox Root Search Results:\n\n"
+
+        for name, path in matched:
+            msg += f"- {name} (Path: {path})\n"
+
+        if position:
+            msg += format_next_cursor(encode_cursor("dropbox", target_path, position, query, page_size=page_size))
+
+        return msg
+
+    elif backend == "local":
+        if not local_is_configured():
+            return LOCAL_NOT_CONFIGURED
+
+        target_path, offset = "", 0
+
+        if cursor:
             try:
-                result = dbx.files_list_folder("", recursive=False)
-                files = [e for e in result.entries if isinstance(e, dropbox.files.FileMetadata)]
+                state = decode_cursor(cursor, "local")
+            except ValueError as e:
+                return tool_error(f"[Backend: Local]\nInvalid cursor: {e}")
+            target_path, query, offset = state["folder"], state["query"] or "", state["offset"]
+            page_size = state["page_size"] or page_size
+
+        elif folder_name:
+            match = local_find_folder(folder_name)
+            if match is None:
+                names = folder_index.suggest("local", folder_name)
+                return tool_error(f"[Backend: Local]\nLocal folder '{folder_name}' not found. Similar: {', '.join(names)}")
+            if not match.exact:
+                return with_folder_note(search_files_fn("local", query, match.id, page_size=page_size), folder_name, match)
+            target_path = match.id
+
+        elif folder_id:
+            target_path = normalize_local_path(folder_id)
+
+        try:
+            matched = [
+                e for e in local_list_folder(target_path)
+                if not e["is_folder"] and query in e["name"].lower()
+            ]
+        except Exception as e:
+            return tool_error(f"[Backend: Local]\nError searching local folder '{target_path or '/'}': {e}")
 
-                matched = [f for f in files if query in f.name.lower()]
+        if not matched:
+            return f"[Backend: Local]\nNo local files in '{target_path or '/'}' match '{query}'."
 
-                if matched:
-                    msg = "[Backend: Dropbox]\nDropbox Root Search Results:\n\n"
-                    for f in matched:
-                        msg += f"- {f.name} (Path: {f.path_lower})\n"
-                    return msg
+        msg = f"[Backend: Local]\nLocal Folder Search: {target_path or '/'}\n\n"
+        for e in matched[offset:offset + page_size]:
+            msg += f"- {e['name']} (Path: {e['id']})\n"
 
-                return f"[Backend: Dropbox]\nNo root Dropbox files match '{query}'."
+        if offset + page_size < len(matched):
+            msg += format_next_cursor(encode_cursor("local", target_path, (None, offset + page_size), query, page_size=page_size))
+
+        return msg
+
+    return tool_error("Invalid backend.")
 
-            except Exception as e:
-                return f"[Backend: Dropbox]\nError searching Dropbox root: {e}"
 
+def list_tree_fn(
+    backend: str = "google",
+    folder_id: str = None,
+    folder_name: str = None,
+    max_depth: int = TREE_MAX_DEPTH,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    cursor: str = None
+):
+    backend = backend.lower().strip()
+    page_size = clamp_page_size(page_size)
+
+    if backend not in BACKEND_LABELS:
+        return tool_error("Invalid backend. Use 'google', 'dropbox' or 'local'.")
+    if backend == "local" and not local_is_configured():
+        return LOCAL_NOT_CONFIGURED
+
+    label = f"[Backend: {BACKEND_LABELS[backend]}]"
+    offset = 0
+    match = None
+
+    if cursor:
         try:
-            result = dbx.files_list_folder(target_path, recursive=False)
-            files = [e for e in result.entries if isinstance(e, dropbox.files.FileMetadata)]
+            state = decode_cursor(cursor, backend)
+        except ValueError as e:
+            return tool_error(f"{label}\nInvalid cursor: {e}")
+        root, max_depth, offset = state["folder"], state["depth"], state["offset"]
+        page_size = state["page_size"] or page_size
 
-            matched = [f for f in files if query in f.name.lower()]
+    elif backend == "google":
+        if folder_name:
+            match = drive_find_folder_by_name(get_drive_service(), folder_name)
+            if not match:
+                return tool_error(f"{label}\nFolder '{folder_name}' not found.")
+            root = match.id
+        else:
+            root = folder_id or "root"
 
-            if not matched:
-                return f"[Backend: Dropbox]\nNo Dropbox files in '{target_path}' match '{query}'."
+    elif backend == "local":
+        if folder_name:
+            match = local_find_folder(folder_name)
+            if match is None:
+                return tool_error(f"{label}\nLocal folder '{folder_name}' not found.")
+            root = match.id
+        else:
+            root = normalize_local_path(folder_id)
 
-            msg = f"[Backend: Dropbox]\nDropbox Folder Search: {target_path}\n\n"
-            for f in matched:
-                msg += f"- {f.name} (Path: {f.path_lower})\n"
+    else:
+        if folder_name:
+            match = dbx_find_folder_by_name(get_dropbox_client(), folder_name)
+            if not match:
+                return tool_error(f"{label}\nDropbox folder '{folder_name}' not found.")
+            root = match.id
+        elif folder_id:
+            root = normalize_dropbox_path(folder_id).lower()
+        else:
+            root = ""
 
-            return msg
+    max_depth = clamp_depth(max_depth)
 
-        except Exception as e:
-            error_str = str(e)
-            if "not_found" in error_str.lower() or "not found" in error_str.lower():
-                return f"[Backend: Dropbox]\nError: Path '{target_path}' not found or inaccessible."
-            return f"[Backend: Dropbox]\nError searching Dropbox folder: {error_str}"
+    try:
+        entries, truncated, errors = walk_tree(backend, root, max_depth)
+    except Exception as e:
+        return tool_error(f"{label}\nError walking folder tree: {e}")
+
+    if not entries and not errors:
+        return f"{label}\nThis folder is empty."
+
+    id_label = "ID" if backend == "google" else "Path"
+    msg = f"{label}\nFolder tree of {root or '/'} (depth {max_depth}, {len(entries)} entries):\n\n"
+    if match and not match.exact:
+        msg = with_folder_note(msg, folder_name, match)
+
+    for entry in entries[offset:offset + page_size]:
+        indent = "  " * (entry["depth"] - 1)
+        suffix = "/" if entry["is_folder"] else ""
+        msg += f"{indent}- {entry['name']}{suffix} ({id_label}: {entry['id']})\n"
+
+    if truncated:
+        msg += "\nThe tree was cut off at the entry limit. List a subfolder to see more.\n"
+    if errors:
+        msg += "\nSome folders could not be listed:\n" + "\n".join(f"- {e}" for e in errors) + "\n"
 
+    if offset + page_size < len(entries):
+        msg += format_next_cursor(encode_cursor(backend, root, (None, offset + page_size), page_size=page_size, depth=max_depth))
 
-def drive_read_file(service, file_id):
-    meta = service.files().get(fileId=file_id, fields="id,name,mimeType").execute()
+    return msg
+
+
+def drive_search_query(f_id, query):
+    escaped = query.replace("\\", "\\\\").replace("'", "\\'")
+    return (
+        f"'{f_id}' in parents and "
+        f"(name contains '{escaped}' or fullText contains '{escaped}') and trashed=false"
+    )
+
+
+def resolve_search_folders(backend, folder_id, folder_name):
+    if backend == "google":
+        service = get_drive_service()
+        if folder_name:
+            match = drive_find_folder_by_name(service, folder_name)
+            return [match.id] if match else []
+        if folder_id:
+            return [folder_id]
+        return [f["id"] for f in drive_get_first_5_folders_with_names(service)]
+
+    if backend == "local":
+        if folder_name:
+            match = local_find_folder(folder_name)
+            return [match.id] if match is not None else []
+        return [normalize_local_path(folder_id)]
+
+    dbx = get_dropbox_client()
+    if folder_name:
+        match = dbx_find_folder_by_name(dbx, folder_name)
+        return [match.id] if match else []
+    if folder_id:
+        path = folder_id.strip().lower()
+        return [path if path.startswith("/") else "/" + path]
+    return [""]
+
+
+def drive_search_hits(f_id, query, limit):
+    pages = iter_drive_pages(
+        get_drive_service(),
+        q=drive_search_query(f_id, query),
+        fields="id, name, mimeType, modifiedTime",
+        page_size=limit
+    )
+    files, _ = take_page(pages, limit)
+    return [
+        {"backend": "google", "id": f["id"], "name": f["name"], "mime_type": f.get("mimeType"), "modified": f.get("modifiedTime")}
+        for f in files
+    ]
+
+
+def dropbox_search_hits(path, query, limit):
+    dbx = get_dropbox_client()
+
+    if use_metadata_index("dropbox", dbx, None, 0):
+        rows, _ = metadata_index.search_names("dropbox", query, path, limit)
+        return [
+            {"backend": "dropbox", "id": r["id"], "name": r["name"], "modified": r["modified_time"]}
+            for r in rows
+        ]
+
+    def matches(entry):
+        return isinstance(entry, dropbox.files.FileMetadata) and query in entry.name.lower()
+
+    entries, _ = take_page(iter_dropbox_pages(dbx, path, limit), limit, match=matches)
+    return [
+        {
+            "backend": "dropbox",
+            "id": e.path_lower,
+            "name": e.name,
+            "modified": e.server_modified.isoformat() if e.server_modified else None
+        }
+        for e in entries
+    ]
+
+
+def local_search_hits(path, query, limit):
+    matched = [
+        e for e in local_list_folder(path)
+        if not e["is_folder"] and query in e["name"].lower()
+    ]
+    return [
+        {"backend": "local", "id": e["id"], "name": e["name"], "modified": e["modified"]}
+        for e in matched[:limit]
+    ]
+
+
+SEARCH_HITS = {"google": drive_search_hits, "dropbox": dropbox_search_hits, "local": local_search_hits}
+
+
+def search_fan_out(backends, query, folder_id, folder_name, limit):
+    """
+    Search every requested backend, and every target folder within it,
+    concurrently. Folder resolution runs first (one task per backend), then
+    one search task per folder. Results are merged into a single ranked,
+    deduplicated list.
+    """
+    errors = []
+    resolved = run_concurrently([
+        (b, resolve_search_folders, (b, folder_id, folder_name)) for b in backends
+    ])
+
+    tasks = []
+    for b, (folders, error) in zip(backends, resolved):
+        if error is not None:
+            errors.append(f"{BACKEND_LABELS[b]}: {error}")
+            continue
+        if not folders and folder_name:
+            errors.append(f"{BACKEND_LABELS[b]}: folder '{folder_name}' not found")
+        tasks.extend((b, SEARCH_HITS[b], (folder, query, limit)) for folder in folders[:5])
+
+    hits = []
+    for (b, _, args), (result, error) in zip(tasks, run_concurrently(tasks)):
+        if error is not None:
+            errors.append(f"{BACKEND_LABELS[b]} ({args[0] or 'root'}): {error}")
+        else:
+            hits.extend(result)
+
+    ranked = rank_hits(hits, query)[:limit]
+    label = BACKEND_LABELS[backends[0]] if len(backends) == 1 else "All"
+    msg = f"[Backend: {label}]\n"
+
+    if ranked:
+        msg += f"Search results for '{query}':\n\n"
+        for hit in ranked:
+            if hit["backend"] == "google":
+                msg += f"- {hit['name']} ({result_location('google', hit['id'])}, Type: {hit['mime_type']})\n"
+            else:
+                msg += f"- {hit['name']} ({result_location(hit['backend'], hit['id'])})\n"
+    else:
+        msg += f"No files match '{query}'.\n"
+
+    if errors:
+        msg += "\nSome searches failed:\n" + "\n".join(f"- {e}" for e in errors) + "\n"
+
+    return msg
+
+
+def drive_read_file(service, file_id, meta=None):
+    if meta is None:
+        meta = service.files().get(fileId=file_id, fields=DRIVE_FILE_FIELDS).execute()
     mime = meta["mimeType"]
     name = meta["name"]
 
-    fh = io.BytesIO()
+    version = f"{meta.get('modifiedTime')}:{meta.get('md5Checksum')}"
+    identity = ("google", file_id, version)
 
-    if mime == "application/vnd.google-apps.document":
-        request = service.files().export_media(fileId=file_id, mimeType="text/plain")
-        downloader = MediaIoBaseDownload(fh, request)
-    elif mime == "text/plain" or name.lower().endswith(".md"):
-        request = service.files().get_media(fileId=file_id)
-        downloader = MediaIoBaseDownload(fh, request)
-    elif mime == "application/vnd.openxmlformats-officedocument.wordprocessingml.document" or name.lower().endswith(".docx"):
-        request = service.files().get_media(fileId=file_id)
-        downloader = MediaIoBaseDownload(fh, request)
+    cache_key = None
+    if text_cache is not None:
+        cache_key = make_cache_key(*identity)
+        cached = text_cache.get(cache_key)
+        if cached is not None:
+            return cached, name, identity
+
+    extractor, export_mime = resolve_extractor(name, mime)
+    if extractor is None:
+        return None, tool_error(f"Unsupported Google Drive file type: {mime}"), None
+
+    if export_mime:
+        request = service.files().export_media(fileId=file_id, mimeType=export_mime)
     else:
-        return None, f"Unsupported Google Drive file type: {mime}"
+        request = service.files().get_media(fileId=file_id)
+
+    try:
+        check_size(meta.get("size"))
+        spool = spool_drive_request(request)
+    except FileTooLargeError as e:
+        return None, tool_error(f"Cannot read Google Drive file '{name}': {e}"), None
+
+    try:
+        with spool:
+            text = extract(extractor, spool)
+    except ExtractionError as e:
+        return None, tool_error(f"Cannot read Google Drive file '{name}': {e}"), None
 
-    done = False
-    while not done:
-        _, done = downloader.next_chunk()
-    fh.seek(0)
+    if cache_key is not None:
+        text_cache.put(cache_key, text)
+    return text, name, identity
 
-    if name.lower().endswith(".docx"):
-        doc = Document(fh)
-        text = "\n".join(p.text for p in doc.paragraphs)
-        return text, name
 
-    text = fh.read().decode("utf-8", errors="replace")
-    return text, name
+def normalize_dropbox_path(path):
+    path = path.strip()
+    return path if path.startswith("/") else "/" + path
 
 
 def dropbox_read_file(dbx, file_path):
     if not file_path:
-        return None, "file_path is required for Dropbox files"
+        return None, tool_error("file_path is required for Dropbox files"), None
 
-    normalized_path = file_path.strip()
-    if not normalized_path.startswith("/"):
-        normalized_path = "/" + normalized_path
+    normalized_path = normalize_dropbox_path(file_path)
 
     try:
-        _, result = dbx.files_download(normalized_path)
-        raw = result.content
         name = normalized_path.split("/")[-1]
 
-        if name.lower().endswith((".txt", ".md")):
-            return raw.decode("utf-8", errors="replace"), name
+        extractor, _ = resolve_extractor(name)
+        if extractor is None:
+            return None, tool_error(f"Unsupported Dropbox file type: {name}"), None
+
+        # A metadata call decides a cache hit, so a hit transfers no body
+        # and keeps the pooled connection; the download runs on a miss only.
+        if text_cache is not None:
+            md = dbx.files_get_metadata(normalized_path)
+            identity = ("dropbox", md.id, md.content_hash or md.rev)
+            cached = text_cache.get(make_cache_key(*identity))
+            if cached is not None:
+                return cached, name, identity
+
+        md, spool = spool_dropbox_download(dbx, normalized_path)
+        identity = ("dropbox", md.id, md.content_hash or md.rev)
+
+        with spool:
+            text = extract(extractor, spool)
+
+        if text_cache is not None:
+            text_cache.put(make_cache_key(*identity), text)
+        return text, name, identity
+
+    except Exception as e:
+        return None, tool_error(f"Error reading Dropbox file '{normalized_path}': {e}"), None
+
+
+def local_read_file(file_path):
+    if not file_path:
+        return None, tool_error("file_path is required for local files"), None
+
+    path = normalize_local_path(file_path)
+    name = path.rsplit("/", 1)[-1]
+
+    try:
+        extractor, _ = resolve_extractor(name)
+        if extractor is None:
+            return None, tool_error(f"Unsupported local file type: {name}"), None
+
+        meta = local_stat_file(path)
+        if meta["is_folder"]:
+            return None, tool_error(f"'{path}' is a folder. Use list_files to see its contents."), None
+
+        identity = ("local", path, meta["version"])
 
-        if name.lower().endswith(".docx"):
-            doc = Document(io.BytesIO(raw))
-            text = "\n".join(p.text for p in doc.paragraphs)
-            return text, name
+        cache_key = None
+        if text_cache is not None:
+            cache_key = make_cache_key(*identity)
+            cached = text_cache.get(cache_key)
+            if cached is not None:
+                return cached, name, identity
 
-        return None, f"Unsupported Dropbox file type: {name}"
+        check_size(meta["size"])
+        with open_mapped(path) as mapped:
+            text = extract(extractor, mapped)
+
+        if cache_key is not None:
+            text_cache.put(cache_key, text)
+        return text, name, identity
 
     except Exception as e:
-        return None, f"Error reading Dropbox file '{normalized_path}': {e}"
+        return None, tool_error(f"Error reading local file '{path}': {e}"), None
+
+
+def get_files_metadata_fn(
+    backend: str,
+    file_ids: list = None,
+    file_paths: list = None
+) -> str:
+    backend = backend.lower().strip()
+
+    if backend == "google":
+        if not file_ids:
+            return tool_error("[Backend: Google Drive]\nfile_ids is required for Google Drive files")
+        try:
+            results = drive_get_files_metadata(get_drive_service(), file_ids)
+        except Exception as e:
+            return tool_error(f"[Backend: Google Drive]\nError fetching file metadata: {e}")
+
+        lines = ["[Backend: Google Drive]"]
+        for file_id, meta in results.items():
+            if isinstance(meta, Exception):
+                lines.append(f"- {file_id}: Error: {meta}")
+                continue
+            lines.append(
+                f"- {meta['name']} (ID: {meta['id']}, Type: {meta['mimeType']}, "
+                f"Modified: {meta.get('modifiedTime')}, Size: {meta.get('size', 'n/a')})"
+            )
+        return "\n".join(lines)
+
+    elif backend == "dropbox":
+        if not file_paths:
+            return tool_error("[Backend: Dropbox]\nfile_paths is required for Dropbox files")
+        try:
+            dbx = get_dropbox_client()
+        except RuntimeError as e:
+            error_msg = str(e)
+            if "DROPBOX_ACCESS_TOKEN is missing" in error_msg:
+                return tool_error("[Backend: Dropbox]\nDropbox access not configured. Add DROPBOX_ACCESS_TOKEN to mcp_server/.env")
+            return tool_error(f"[Backend: Dropbox]\nDropbox authentication error: {error_msg}")
+
+        results = dbx_get_files_metadata(dbx, [normalize_dropbox_path(p) for p in file_paths])
+
+        lines = ["[Backend: Dropbox]"]
+        for path, md in results.items():
+            if isinstance(md, Exception):
+                lines.append(f"- {path}: Error: {md}")
+            elif isinstance(md, dropbox.files.FileMetadata):
+                lines.append(
+                    f"- {md.name} (Path: {md.path_lower}, Modified: {md.server_modified}, Size: {md.size})"
+                )
+            else:
+                lines.append(f"- {md.name} (Path: {md.path_lower}, Type: folder)")
+        return "\n".join(lines)
+
+    elif backend == "local":
+        if not local_is_configured():
+            return LOCAL_NOT_CONFIGURED
+        if not file_paths:
+            return tool_error("[Backend: Local]\nfile_paths is required for local files")
+
+        results = local_get_files_metadata([normalize_local_path(p) for p in file_paths])
+
+        lines = ["[Backend: Local]"]
+        for path, meta in results.items():
+            if isinstance(meta, Exception):
+                lines.append(f"- {path}: Error: {meta}")
+            elif meta["is_folder"]:
+                lines.append(f"- {meta['name']} (Path: {meta['id']}, Type: folder)")
+            else:
+                lines.append(
+                    f"- {meta['name']} (Path: {meta['id']}, Modified: {meta['modified']}, Size: {meta['size']})"
+                )
+        return "\n".join(lines)
+
+    else:
+        return tool_error("Invalid backend. Use 'google', 'dropbox' or 'local'.")
+
+
+def preview_text(extractor, read_prefix, read_spool, read_full, max_bytes):
+    """
+    Cheapest preview the format allows: a byte range for text-like files,
+    a partial parse for formats with a previewer, otherwise the cached full
+    text. Returns (text, truncated).
+    """
+    if extractor.prefix_ok:
+        data = read_prefix(max_bytes + 1)
+        truncated = len(data) > max_bytes
+        text = extract(extractor, io.BytesIO(complete_utf8_prefix(data[:max_bytes])))
+    elif extractor.preview:
+        with read_spool() as spool:
+            text = extractor.preview(spool, max_bytes + 1)
+        truncated = len(text) > max_bytes
+    else:
+        text = read_full()
+        if text is None:
+            return None, False
+        truncated = len(text) > max_bytes
+
+    return text[:max_bytes], truncated
+
+
+def format_preview(header, text, truncated):
+    if text is None:
+        return header + "\nNo text preview is available for this file type."
+    if not text.strip():
+        return header + "\nThe file contains no readable text."
+
+    msg = f"{header}\nPreview:\n\n{text}"
+    if truncated:
+        msg += "\n\n[Preview truncated. Use get_file to read the whole file.]"
+    return msg
+
+
+def preview_file_fn(
+    backend: str,
+    file_id: str = None,
+    file_path: str = None,
+    max_bytes: int = PREVIEW_BYTES
+) -> str:
+    backend = backend.lower().strip()
+    max_bytes = max(1, min(int(max_bytes or PREVIEW_BYTES), 10 * PREVIEW_BYTES))
+
+    if backend == "google":
+        if not file_id:
+            return tool_error("[Backend: Google Drive]\nfile_id is required for Google Drive files")
+        service = get_drive_service()
+
+        try:
+            meta = service.files().get(fileId=file_id, fields=DRIVE_FILE_FIELDS).execute()
+        except Exception as e:
+            return tool_error(f"[Backend: Google Drive]\nError: File with ID '{file_id}' not found or inaccessible: {e}")
+
+        header = (
+            f"[Backend: Google Drive]\nFile: {meta['name']}\n"
+            f"ID: {meta['id']}, Type: {meta['mimeType']}, "
+            f"Size: {meta.get('size', 'n/a')}, Modified: {meta.get('modifiedTime')}"
+        )
+
+        extractor, export_mime = resolve_extractor(meta["name"], meta["mimeType"])
+        if extractor is None:
+            return format_preview(header, None, False)
+        if export_mime:
+            # Exports cannot be range-read; reuse the cached full text.
+            extractor = extractor._replace(prefix_ok=False, preview=None)
+
+        def read_full():
+            text, _, _ = drive_read_file(service, file_id, meta)
+            return text
+
+        def read_spool():
+            check_size(meta.get("size"))
+            return spool_drive_request(service.files().get_media(fileId=file_id))
+
+        try:
+            text, truncated = preview_text(
+                extractor,
+                lambda length: read_drive_prefix(service, file_id, length, meta.get("size")),
+                read_spool,
+                read_full,
+                max_bytes
+            )
+        except (FileTooLargeError, ExtractionError) as e:
+            return tool_error(f"{header}\nCannot preview file: {e}")
+        except Exception as e:
+            return tool_error(f"{header}\nError previewing file: {e}")
+        return format_preview(header, text, truncated)
+
+    elif backend == "dropbox":
+        if not file_path:
+            return tool_error("[Backend: Dropbox]\nfile_path is required for Dropbox files")
+        path = normalize_dropbox_path(file_path)
+
+        try:
+            dbx = get_dropbox_client()
+            md = dbx.files_get_metadata(path)
+        except Exception as e:
+            return tool_error(f"[Backend: Dropbox]\nError: Path '{path}' not found or inaccessible: {e}")
+
+        if not isinstance(md, dropbox.files.FileMetadata):
+            return tool_error(f"[Backend: Dropbox]\n'{path}' is a folder. Use list_files to see its contents.")
+
+        header = (
+            f"[Backend: Dropbox]\nFile: {md.name}\n"
+            f"Path: {md.path_lower}, Size: {md.size}, Modified: {md.server_modified}"
+        )
+
+        extractor, _ = resolve_extractor(md.name)
+        if extractor is None:
+            return format_preview(header, None, False)
+
+        def read_full():
+            text, _, _ = dropbox_read_file(dbx, path)
+            return text
+
+        try:
+            text, truncated = preview_text(
+                extractor,
+                lambda length: read_dropbox_prefix(dbx, path, length)[1],
+                lambda: spool_dropbox_download(dbx, path)[1],
+                read_full,
+                max_bytes
+            )
+        except (FileTooLargeError, ExtractionError) as e:
+            return tool_error(f"{header}\nCannot preview file: {e}")
+        except Exception as e:
+            return tool_error(f"{header}\nError previewing file: {e}")
+        return format_preview(header, text, truncated)
+
+    elif backend == "local":
+        if not local_is_configured():
+            return LOCAL_NOT_CONFIGURED
+        if not file_path:
+            return tool_error("[Backend: Local]\nfile_path is required for local files")
+        path = normalize_local_path(file_path)
+
+        try:
+            meta = local_stat_file(path)
+        except Exception as e:
+            return tool_error(f"[Backend: Local]\nError: Path '{path}' not found or inaccessible: {e}")
+
+        if meta["is_folder"]:
+            return tool_error(f"[Backend: Local]\n'{path}' is a folder. Use list_files to see its contents.")
+
+        header = (
+            f"[Backend: Local]\nFile: {meta['name']}\n"
+            f"Path: {meta['id']}, Size: {meta['size']}, Modified: {meta['modified']}"
+        )
+
+        extractor, _ = resolve_extractor(meta["name"])
+        if extractor is None:
+            return format_preview(header, None, False)
+
+        def read_full():
+            text, _, _ = local_read_file(path)
+            return text
+
+        def read_spool():
+            check_size(meta["size"])
+            return open_mapped(path)
+
+        try:
+            text, truncated = preview_text(
+                extractor,
+                lambda length: local_read_prefix(path, length),
+                read_spool,
+                read_full,
+                max_bytes
+            )
+        except (FileTooLargeError, ExtractionError) as e:
+            return tool_error(f"{header}\nCannot preview file: {e}")
+        except Exception as e:
+            return tool_error(f"{header}\nError previewing file: {e}")
+        return format_preview(header, text, truncated)
+
+    else:
+        return tool_error("Invalid backend. Use 'google', 'dropbox' or 'local'.")
 
 
 def get_file_fn(
     backend: str,
     file_id: str = None,
-    file_path: str = None
+    file_path: str = None,
+    offset: int = 0,
+    max_chars: int = None,
+    max_tokens: int = None
 ):
     backend = backend.lower().strip()
 
     if backend == "google":
         service = get_drive_service()
-        text, name = drive_read_file(service, file_id)
+        text, name, identity = drive_read_file(service, file_id)
 
         if text is None:
             return name
-        return f"[Google Drive File: {name}]\n\n{text}"
+        chunk, info = get_chunk(text, offset, max_chars, max_tokens, key=identity)
+        return f"[Google Drive File: {name}]\n{format_chunk_header(info)}\n{chunk}"
 
     elif backend == "dropbox":
         dbx = get_dropbox_client()
-        text, name = dropbox_read_file(dbx, file_path)
+        text, name, identity = dropbox_read_file(dbx, file_path)
 
         if text is None:
             return name
-        return f"[Dropbox File: {name}]\n\n{text}"
+        chunk, info = get_chunk(text, offset, max_chars, max_tokens, key=identity)
+        return f"[Dropbox File: {name}]\n{format_chunk_header(info)}\n{chunk}"
+
+    elif backend == "local":
+        if not local_is_configured():
+            return LOCAL_NOT_CONFIGURED
+        text, name, identity = local_read_file(file_path)
+
+        if text is None:
+            return name
+        chunk, info = get_chunk(text, offset, max_chars, max_tokens, key=identity)
+        return f"[Local File: {name}]\n{format_chunk_header(info)}\n{chunk}"
 
     else:
-        return "Invalid backend. Use 'google' or 'dropbox'."
+        return tool_error("Invalid backend. Use 'google', 'dropbox' or 'local'.")
 
 
 def summarize_file_fn(
@@ -397,42 +1202,15 @@ def summarize_file_fn(
         try:
             service = get_drive_service()
 
-            meta = service.files().get(
-                fileId=file_id,
-                fields="id, name, mimeType"
-            ).execute()
-
-            file_name = meta["name"]
-            mime = meta["mimeType"]
-
-            if mime == "text/plain" or file_name.lower().endswith(".txt"):
-                request = service.files().get_media(fileId=file_id)
-                fh = io.BytesIO()
-                downloader = MediaIoBaseDownload(fh, request)
-                done = False
-                while not done:
-                    _, done = downloader.next_chunk()
-                fh.seek(0)
-                text = fh.read().decode("utf-8", errors="ignore")
-
-            elif file_name.lower().endswith(".docx"):
-                request = service.files().get_media(fileId=file_id)
-                fh = io.BytesIO()
-                downloader = MediaIoBaseDownload(fh, request)
-                done = False
-                while not done:
-                    _, done = downloader.next_chunk()
-                fh.seek(0)
-                doc = Document(fh)
-                text = "\n".join(p.text for p in doc.paragraphs)
-
-            else:
-                return f"Unsupported file type: {file_name}. Only .txt and .docx are supported."
+            text, file_name, _ = drive_read_file(service, file_id)
         except Exception as e:
             error_str = str(e)
             if "not found" in error_str.lower() or "404" in error_str.lower():
-                return f"[Backend: Google Drive]\nError: File with ID '{file_id}' not found or inaccessible."
-            return f"[Backend: Google Drive]\nError reading Google Drive file: {error_str}"
+                return tool_error(f"[Backend: Google Drive]\nError: File with ID '{file_id}' not found or inaccessible.")
+            return tool_error(f"[Backend: Google Drive]\nError reading Google Drive file: {error_str}")
+
+        if text is None:
+            return file_name
 
     elif backend == "dropbox":
         try:
@@ -440,47 +1218,119 @@ def summarize_file_fn(
         except RuntimeError as e:
             error_msg = str(e)
             if "DROPBOX_ACCESS_TOKEN is missing" in error_msg:
-                return "[Backend: Dropbox]\nDropbox access not configured. Add DROPBOX_ACCESS_TOKEN to mcp_server/.env"
-            return f"[Backend: Dropbox]\nDropbox authentication error: {error_msg}"
+                return tool_error("[Backend: Dropbox]\nDropbox access not configured. Add DROPBOX_ACCESS_TOKEN to mcp_server/.env")
+            return tool_error(f"[Backend: Dropbox]\nDropbox authentication error: {error_msg}")
         except Exception as e:
-            return f"[Backend: Dropbox]\nError connecting to Dropbox: {str(e)}"
-
-        if not file_path:
-            return "file_path is required for Dropbox files"
-
-        normalized_path = file_path.strip()
-        if not normalized_path.startswith("/"):
-            normalized_path = "/" + normalized_path
+            return tool_error(f"[Backend: Dropbox]\nError connecting to Dropbox: {str(e)}")
 
-        try:
-            md, response = dbx.files_download(normalized_path)
-            file_name = normalized_path.split("/")[-1]
-            raw = response.content
+        text, file_name, _ = dropbox_read_file(dbx, file_path)
 
-            if file_name.lower().endswith(".txt"):
-                text = raw.decode("utf-8", errors="ignore")
+        if text is None:
+            return file_name
 
-            elif file_name.lower().endswith(".docx"):
-                buf = io.BytesIO(raw)
-                doc = Document(buf)
-                text = "\n".join(p.text for p in doc.paragraphs)
+    elif backend == "local":
+        if not local_is_configured():
+            return LOCAL_NOT_CONFIGURED
+        text, file_name, _ = local_read_file(file_path)
 
-            else:
-                return f"Unsupported file type: {file_name}. Only .txt and .docx are supported."
-        except Exception as e:
-            error_str = str(e)
-            if "not_found" in error_str.lower() or "not found" in error_str.lower():
-                return f"[Backend: Dropbox]\nError: File path '{normalized_path}' not found or inaccessible."
-            return f"[Backend: Dropbox]\nError reading Dropbox file '{normalized_path}': {error_str}"
+        if text is None:
+            return file_name
 
     else:
-        return "Invalid backend."
+        return tool_error("Invalid backend.")
 
     if not text.strip():
         return f"The file '{file_name}' contains no readable text."
 
+    summarizer = get_summarizer()
+    try:
+        summary = summarizer.summarize(text, file_name)
+    except Exception as e:
+        return tool_error(f"Error summarizing '{file_name}': {e}")
+
     return (
         f"File: {file_name}\n"
         f"Backend: {backend}\n"
-        f"Content:\n\n{text}"
+        f"Length: {len(text)} characters\n"
+        f"Summarized with: {summarizer.client.model}\n"
+        f"Summary:\n\n{summary}"
     )
+
+
+def read_text_for_index(backend, file_id):
+    if backend == "google":
+        text, _, _ = drive_read_file(get_drive_service(), file_id)
+    elif backend == "local":
+        text, _, _ = local_read_file(file_id)
+    else:
+        text, _, _ = dropbox_read_file(get_dropbox_client(), file_id)
+    return text
+
+
+def search_content_fn(query: str, backend: str = "all", limit: int = 10) -> str:
+    backend = backend.lower().strip()
+    limit = clamp_page_size(limit)
+
+    if backend == "all":
+        backends = all_backends()
+    elif backend in BACKEND_LABELS:
+        backends = [backend]
+    else:
+        return tool_error("Invalid backend. Use 'google', 'dropbox', 'local' or 'all'.")
+    if backend == "local" and not local_is_configured():
+        return LOCAL_NOT_CONFIGURED
+
+    if metadata_index is None:
+        return tool_error("Content search requires the metadata index. Set METADATA_INDEX_ENABLED=true.")
+
+    content_index.refresh_in_background(backends, metadata_index, read_text_for_index)
+    results = content_index.search(query, backends, limit)
+
+    if not results:
+        if content_index.refreshing or not content_index.doc_count(backends):
+            return f"No indexed files match '{query}' yet. The content index is still being built; try again shortly."
+        return f"No indexed files match '{query}'."
+
+    msg = f"Content search results for '{query}':\n"
+    for i, r in enumerate(results, 1):
+        location = result_location(r["backend"], r["file_id"])
+        msg += f"\n{i}. {r['name']} ({location}, Score: {r['score']:.2f})\n   {r['snippet']}\n"
+
+    if content_index.refreshing:
+        msg += "\nThe content index is still updating; results may be incomplete."
+
+    return msg
+
+
+def semantic_search_fn(query: str, backend: str = "all", limit: int = 5) -> str:
+    backend = backend.lower().strip()
+    limit = clamp_page_size(limit)
+
+    if backend == "all":
+        backends = all_backends()
+    elif backend in BACKEND_LABELS:
+        backends = [backend]
+    else:
+        return tool_error("Invalid backend. Use 'google', 'dropbox', 'local' or 'all'.")
+    if backend == "local" and not local_is_configured():
+        return LOCAL_NOT_CONFIGURED
+
+    if metadata_index is None:
+        return tool_error("Semantic search requires the metadata index. Set METADATA_INDEX_ENABLED=true.")
+
+    content_index.refresh_in_background(backends, metadata_index, read_text_for_index)
+    vector_index.refresh_in_background(content_index)
+    results = vector_index.search(query, backends, limit)
+
+    if not results:
+        if vector_index.building or content_index.refreshing or vector_index.doc_vectors is None:
+            return f"No semantic matches for '{query}' yet. The document index is still being built; try again shortly."
+        return f"No semantic matches for '{query}'."
+
+    msg = f"Semantic search results for '{query}':\n"
+    for i, r in enumerate(results, 1):
+        location = result_location(r["backend"], r["file_id"])
+        snippet = content_index.snippet(r["backend"], r["file_id"], query)
+        msg += f"\n{i}. {r['name']} ({location}, Similarity: {r['score']:.2f})\n   {snippet}\n"
+
+    return msg
@@ -0,0 +1,269 @@
+import json
+import math
+import os
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+
+from content_index import tokenize
+
+from dotenv import load_dotenv
+load_dotenv()
+
+VECTOR_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", ".vector_index")
+VECTOR_DIMENSIONS = int(os.getenv("VECTOR_DIMENSIONS", "128"))
+VECTOR_REBUILD_SECONDS = float(os.getenv("VECTOR_REBUILD_SECONDS", "300"))
+
+OVERSAMPLE = 10
+POWER_ITERATIONS = 2
+CHUNK_SIZE = 200_000
+
+
+class SparseMatrix:
+    """Minimal COO matrix with the two products randomized SVD needs."""
+
+    def __init__(self, rows, cols, vals, shape):
+        self.rows = rows
+        self.cols = cols
+        self.vals = vals
+        self.shape = shape
+
+    def dot(self, dense):
+        out = np.zeros((self.shape[0], dense.shape[1]), dtype=np.float64)
+        for start in range(0, len(self.vals), CHUNK_SIZE):
+            end = start + CHUNK_SIZE
+            np.add.at(out, self.rows[start:end], self.vals[start:end, None] * dense[self.cols[start:end]])
+        return out
+
+    def tdot(self, dense):
+        out = np.zeros((self.shape[1], dense.shape[1]), dtype=np.float64)
+        for start in range(0, len(self.vals), CHUNK_SIZE):
+            end = start + CHUNK_SIZE
+            np.add.at(out, self.cols[start:end], self.vals[start:end, None] * dense[self.rows[start:end]])
+        return out
+
+
+def randomized_svd(matrix, k, seed=0):
+    rng = np.random.default_rng(seed)
+    omega = rng.standard_normal((matrix.shape[1], k + OVERSAMPLE))
+
+    q, _ = np.linalg.qr(matrix.dot(omega))
+    for _ in range(POWER_ITERATIONS):
+        q, _ = np.linalg.qr(matrix.tdot(q))
+        q, _ = np.linalg.qr(matrix.dot(q))
+
+    b = matrix.tdot(q).T
+    u_b, s, vt = np.linalg.svd(b, full_matrices=False)
+    u = q @ u_b
+    return u[:, :k], s[:k], vt[:k]
+
+
+def normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class VectorIndex:
+    """
+    Latent semantic index over the documents in the content index.
+
+    TF-IDF weights from the content index postings are reduced to
+    VECTOR_DIMENSIONS with a randomized SVD. Document vectors are stored
+    L2-normalized as one contiguous float32 matrix on disk and memory-mapped
+    on load, so a query is a single matrix-vector product plus a top-k
+    partition. The index is rebuilt in the background whenever the content
+    index changes.
+    """
+
+    def __init__(self, directory=VECTOR_INDEX_DIR, dimensions=VECTOR_DIMENSIONS):
+        self.directory = directory
+        self.dimensions = dimensions
+        self.doc_vectors = None
+        self.components = None
+        self.idf = None
+        self.vocab = {}
+        self.docs = []
+        self.signature = None
+        self._backend_masks = {}
+        self._lock = threading.Lock()
+        self._build_thread = None
+        self._last_build = 0.0
+
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    @property
+    def building(self):
+        return self._build_thread is not None and self._build_thread.is_alive()
+
+    def refresh_in_background(self, content_index):
+        signature = list(content_index.signature())
+        if signature == self.signature or not signature[0]:
+            return
+        if self.doc_vectors is not None and time.time() - self._last_build < VECTOR_REBUILD_SECONDS:
+            return
+
+        with self._lock:
+            if self.building:
+                return
+            self._build_thread = threading.Thread(
+                target=self._build_safely,
+                args=(content_index,),
+                name="vector-index-build",
+                daemon=True,
+            )
+            self._build_thread.start()
+
+    def _build_safely(self, content_index):
+        try:
+            self.build(content_index)
+        except Exception as e:
+            print(f"Error building vector index: {e}")
+
+    def build(self, content_index):
+        signature = list(content_index.signature())
+        docs = content_index.documents()
+        postings = content_index.postings()
+        n_docs = len(docs)
+        if not n_docs:
+            return
+
+        row_of = {doc["doc_id"]: i for i, doc in enumerate(docs)}
+        df = Counter(p["term"] for p in postings)
+
+        min_df = 2 if n_docs >= 20 else 1
+        max_df = 0.5 * n_docs if n_docs >= 20 else n_docs
+        vocab_terms = sorted(t for t, count in df.items() if min_df <= count <= max_df)
+        vocab = {t: i for i, t in enumerate(vocab_terms)}
+        if not vocab:
+            # Nothing to embed yet; remember this signature so searches do
+            # not start a new build until the content index changes.
+            with self._lock:
+                self.signature = signature
+                self._last_build = time.time()
+            return
+
+        idf = np.array([math.log((1 + n_docs) / (1 + df[t])) + 1 for t in vocab_terms], dtype=np.float64)
+
+        kept = [p for p in postings if p["term"] in vocab]
+        rows = np.array([row_of[p["doc_id"]] for p in kept], dtype=np.int64)
+        cols = np.array([vocab[p["term"]] for p in kept], dtype=np.int64)
+        vals = np.array([1 + math.log(p["tf"]) for p in kept], dtype=np.float64) * idf[cols]
+
+        norms = np.zeros(n_docs)
+        np.add.at(norms, rows, vals ** 2)
+        norms = np.sqrt(norms)
+        norms[norms == 0] = 1.0
+        vals = vals / norms[rows]
+
+        k = min(self.dimensions, n_docs, len(vocab))
+        u, s, vt = randomized_svd(SparseMatrix(rows, cols, vals, (n_docs, len(vocab))), k)
+
+        doc_vectors = normalize_rows(u * s).astype(np.float32)
+        components = vt.astype(np.float32)
+        doc_meta = [{"backend": d["backend"], "file_id": d["file_id"], "name": d["name"]} for d in docs]
+
+        self._save(doc_vectors, components, idf.astype(np.float32), vocab_terms, doc_meta, signature)
+
+        with self._lock:
+            self.doc_vectors = doc_vectors
+            self.components = components
+            self.idf = idf.astype(np.float32)
+            self.vocab = vocab
+            self.docs = doc_meta
+            self.signature = signature
+            self._backend_masks = {}
+            self._last_build = time.time()
+
+    def embed(self, queries, components, vocab, idf):
+        """Project query strings into the latent space as normalized rows."""
+        out = np.zeros((len(queries), components.shape[0]), dtype=np.float32)
+
+        for i, query in enumerate(queries):
+            counts = Counter(t for t in tokenize(query) if t in vocab)
+            if not counts:
+                continue
+            idx = np.array([vocab[t] for t in counts], dtype=np.int64)
+            weights = np.array([1 + math.log(c) for c in counts.values()], dtype=np.float32) * idf[idx]
+            out[i] = components[:, idx] @ weights
+
+        return normalize_rows(out)
+
+    def search_many(self, queries, backends, limit=10):
+        """Batched cosine top-k: one matrix product for all queries."""
+        with self._lock:
+            if self.doc_vectors is None or not queries:
+                return [[] for _ in queries]
+            doc_vectors, docs = self.doc_vectors, self.docs
+            components, vocab, idf = self.components, self.vocab, self.idf
+            mask = self._mask(tuple(backends))
+
+        scores = self.embed(queries, components, vocab, idf) @ doc_vectors.T
+        scores[:, ~mask] = -np.inf
+
+        k = min(limit, int(mask.sum()))
+        if k <= 0:
+            return [[] for _ in queries]
+
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+
+        for row, candidates in zip(scores, top):
+            ranked = candidates[np.argsort(-row[candidates])]
+            results.append([
+                dict(docs[j], score=float(row[j]))
+                for j in ranked
+                if row[j] > 0
+            ])
+
+        return results
+
+    def search(self, query, backends, limit=10):
+        return self.search_many([query], backends, limit)[0]
+
+    def _mask(self, backends):
+        mask = self._backend_masks.get(backends)
+        if mask is None:
+            mask = np.array([d["backend"] in backends for d in self.docs], dtype=bool)
+            self._backend_masks[backends] = mask
+        return mask
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _save(self, doc_vectors, components, idf, vocab_terms, doc_meta, signature):
+        np.save(self._path("doc_vectors.tmp.npy"), doc_vectors)
+        np.save(self._path("components.tmp.npy"), components)
+        np.save(self._path("idf.tmp.npy"), idf)
+        with open(self._path("meta.tmp.json"), "w", encoding="utf-8") as f:
+            json.dump({"vocab": vocab_terms, "docs": doc_meta, "signature": signature}, f)
+
+        for name in ("doc_vectors", "components", "idf"):
+            os.replace(self._path(f"{name}.tmp.npy"), self._path(f"{name}.npy"))
+        os.replace(self._path("meta.tmp.json"), self._path("meta.json"))
+
+    def _load(self):
+        try:
+            with open(self._path("meta.json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            self.doc_vectors = np.load(self._path("doc_vectors.npy"), mmap_mode="r")
+            self.components = np.load(self._path("components.npy"))
+            self.idf = np.load(self._path("idf.npy"))
+        except (OSError, ValueError):
+            self.doc_vectors = None
+            return
+
+        if self.doc_vectors.shape[0] != len(meta["docs"]):
+            self.doc_vectors = None
+            return
+
+        self.vocab = {t: i for i, t in enumerate(meta["vocab"])}
+        self.docs = meta["docs"]
+        self.signature = meta["signature"]
+        self._last_build = os.path.getmtime(self._path("meta.json"))
+
+
+vector_index = VectorIndex()